@@ -1,24 +1,150 @@
-from fastapi import FastAPI, Request
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
 import uvicorn
 
+from app.preview_relay import router as preview_router
+
 app = FastAPI()
+# デモは翻訳と同じこのサーバに生成中プレビューを配信する
+app.include_router(preview_router)
+
+# 使用可能な翻訳モデル（選択されたものだけを初回リクエスト時にロードする）
+MODELS = {
+    "opus-mt-ja-en": {"model": "Helsinki-NLP/opus-mt-ja-en"},
+    "nllb-200": {
+        "model": "facebook/nllb-200-distilled-600M",
+        "src_lang": "jpn_Jpan",
+        "tgt_lang": "eng_Latn",
+    },
+}
+DEFAULT_MODEL = os.environ.get("TRANSLATION_MODEL", "opus-mt-ja-en")
+
+# マイクロバッチ設定: 最初のリクエストから BATCH_WINDOW_MS 待って同時リクエストをまとめる
+BATCH_WINDOW_MS = float(os.environ.get("TRANSLATION_BATCH_WINDOW_MS", "20"))
+MAX_BATCH_SIZE = int(os.environ.get("TRANSLATION_MAX_BATCH_SIZE", "16"))
+# 翻訳結果キャッシュの最大件数
+CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "1024"))
+
+_translators = {}
+_translators_lock = threading.Lock()
+
+
+def get_translator(model_key: str):
+    """選択されたモデルの翻訳パイプラインを返す（未ロードならここでロード）"""
+    with _translators_lock:
+        if model_key not in _translators:
+            from transformers import pipeline
+
+            spec = MODELS[model_key]
+            kwargs = {k: v for k, v in spec.items() if k != "model"}
+            # device=-1でCPU
+            _translators[model_key] = pipeline(
+                "translation", model=spec["model"], device=-1, **kwargs
+            )
+        return _translators[model_key]
+
+
+class TranslationCache:
+    """件数上限付きのLRU翻訳キャッシュ"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+    def get(self, key):
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+
+class MicroBatcher:
+    """短い時間窓に届いたリクエストを1回のforwardにまとめて翻訳する"""
+
+    def __init__(self, model_key: str):
+        self.model_key = model_key
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def translate(self, text: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = asyncio.get_running_loop().time() + BATCH_WINDOW_MS / 1000
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 同じ文は1回だけ翻訳する
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                results = await asyncio.to_thread(self._translate_batch, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            translated = dict(zip(texts, results))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(translated[text])
+
+    def _translate_batch(self, texts):
+        translator = get_translator(self.model_key)
+        results = translator(texts, batch_size=len(texts))
+        return [r["translation_text"] for r in results]
+
+
+cache = TranslationCache(CACHE_SIZE)
+_batchers = {}
 
-# モデルとトークナイザーのロード
-model_name = "facebook/nllb-200-distilled-600M"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-# 日本語→英語に修正
-translator = pipeline("translation", model="Helsinki-NLP/opus-mt-ja-en", device=-1)  # device=-1でCPU
 
 class TranslationRequest(BaseModel):
     text: str
+    model: Optional[str] = None
+
 
 @app.post("/translate")
-def translate(req: TranslationRequest):
-    result = translator(req.text)
-    return {"translatedText": result[0]['translation_text']}
+async def translate(req: TranslationRequest):
+    model_key = req.model or DEFAULT_MODEL
+    if model_key not in MODELS:
+        raise HTTPException(status_code=400, detail=f"Unknown model: {model_key}")
+
+    text = req.text.strip()
+    if not text:
+        return {"translatedText": req.text}
+
+    cached = cache.get((model_key, text))
+    if cached is not None:
+        return {"translatedText": cached}
+
+    if model_key not in _batchers:
+        _batchers[model_key] = MicroBatcher(model_key)
+    result = await _batchers[model_key].translate(text)
+    cache.put((model_key, text), result)
+    return {"translatedText": result}
+
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
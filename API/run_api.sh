@@ -1,7 +1,9 @@
 #!/bin/bash
 # MLLB APIサーバをバックグラウンドで起動
 
-LOGFILE="$(dirname "$0")/mlbb_api.log"
+LOGFILE="$(cd "$(dirname "$0")" && pwd)/mlbb_api.log"
+# app/（プレビュー配信）を読み込むのでリポジトリのルートから起動する
+cd "$(dirname "$0")/.."
 
 nohup uvicorn API.MLLB:app --host 0.0.0.0 --port 8000 > "$LOGFILE" 2>&1 &
 echo "MLLB APIサーバをバックグラウンドで起動しました。ログ: $LOGFILE" 
\ No newline at end of file
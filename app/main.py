@@ -7,6 +7,8 @@ from fastapi.staticfiles import StaticFiles
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 app = FastAPI()
+# "/" の StaticFiles より先に登録しないと /ws がマウントに吸われる
+app.include_router(ws_router)
 
 app.mount(
     "/", StaticFiles(directory=BASE_DIR / "fronted", html=True), name="static"
@@ -16,8 +18,6 @@ app.mount(
 async def root():
     return "<h3>AI Video Generator backend is running 🎬</h3>"
 
-app.include_router(ws_router)
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""生成中プレビューの配信（/ws/previews）
+
+生成側（Streamlit のプロセス）が /ws/previews/{job_id}/publish に接続して
+進捗（JSON テキスト）とプレビュー画像（JPEG バイナリ）を送り、
+閲覧側（ブラウザ）は /ws/previews/{job_id} で受け取る。
+閲覧側が "cancel" を送ると生成側へ転送し、生成側はジョブを止める。
+
+デモが自動起動する API サーバ（API/MLLB.py）と app/main.py の両方に
+マウントするため、OpenCV などの重い依存は持たない。
+"""
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import asyncio
+import itertools
+import json
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_subscriber_ids = itertools.count()
+# 閲覧側1接続あたりの未送信メッセージ数の上限（遅い閲覧側は古いものから捨てる）
+PREVIEW_QUEUE_SIZE = 4
+
+
+def _put_latest(queue: asyncio.Queue, item):
+    """キューが一杯なら一番古い要素を捨てて入れる"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+class PreviewChannel:
+    """ジョブ1件分の配信（生成側1本 → 閲覧側複数）
+
+    閲覧側が生成側より先に接続してもよいように、どちらの接続でも作られ、
+    両方いなくなったら破棄する。途中から接続した閲覧側には最新の進捗と
+    プレビューを最初に送る。
+    """
+
+    def __init__(self):
+        self.publisher: WebSocket | None = None
+        self.subscribers: dict[int, asyncio.Queue] = {}
+        self.last_status: str | None = None
+        self.last_frame: bytes | None = None
+        self.cancel_requested = False
+
+    @property
+    def is_unused(self) -> bool:
+        return self.publisher is None and not self.subscribers
+
+    def broadcast(self, message):
+        if isinstance(message, bytes):
+            self.last_frame = message
+        else:
+            self.last_status = message
+        for queue in self.subscribers.values():
+            _put_latest(queue, message)
+
+    async def request_cancel(self):
+        self.cancel_requested = True
+        if self.publisher is not None:
+            await self.publisher.send_text("cancel")
+
+
+# job_id -> PreviewChannel
+preview_channels: dict[str, PreviewChannel] = {}
+
+
+def _release_channel(job_id: str, channel: PreviewChannel):
+    if channel.is_unused and preview_channels.get(job_id) is channel:
+        del preview_channels[job_id]
+
+
+@router.websocket("/ws/previews/{job_id}/publish")
+async def preview_publish_endpoint(ws: WebSocket, job_id: str):
+    await ws.accept()
+    channel = preview_channels.setdefault(job_id, PreviewChannel())
+    channel.publisher = ws
+    try:
+        if channel.cancel_requested:
+            # 生成側の接続前に押されたキャンセルも伝える
+            await ws.send_text("cancel")
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                channel.broadcast(message["bytes"])
+            elif message.get("text") is not None:
+                channel.broadcast(message["text"])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        channel.publisher = None
+        # 閲覧側に配信の終わりを知らせる
+        for queue in channel.subscribers.values():
+            _put_latest(queue, None)
+        _release_channel(job_id, channel)
+
+
+@router.websocket("/ws/previews/{job_id}")
+async def preview_subscribe_endpoint(ws: WebSocket, job_id: str):
+    await ws.accept()
+    channel = preview_channels.setdefault(job_id, PreviewChannel())
+    subscriber_id = next(_subscriber_ids)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=PREVIEW_QUEUE_SIZE)
+    for message in (channel.last_status, channel.last_frame):
+        if message is not None:
+            queue.put_nowait(message)
+    channel.subscribers[subscriber_id] = queue
+
+    async def send():
+        while True:
+            message = await queue.get()
+            if message is None:
+                return
+            if isinstance(message, bytes):
+                await ws.send_bytes(message)
+            else:
+                await ws.send_text(message)
+
+    async def receive():
+        while True:
+            if await ws.receive_text() == "cancel":
+                logger.info("preview %s: cancel requested", job_id)
+                await channel.request_cancel()
+                channel.broadcast(json.dumps({"status": "cancelling"}))
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        del channel.subscribers[subscriber_id]
+        _release_channel(job_id, channel)
+        try:
+            await ws.close()
+        except RuntimeError:
+            # 閲覧側が先に切断していれば閉じるものは無い
+            pass
+
+
+@router.get("/ws/previews")
+async def preview_channels_stats():
+    return {
+        job_id: {
+            "publishing": channel.publisher is not None,
+            "subscribers": len(channel.subscribers),
+            "cancel_requested": channel.cancel_requested,
+        }
+        for job_id, channel in preview_channels.items()
+    }
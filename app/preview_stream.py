@@ -0,0 +1,126 @@
+"""生成中プレビューの送信（Streamlit 側）と表示（ブラウザ側）
+
+LTX-Video の preview_callback でプレビューを受け取り、FastAPI の WebSocket
+（app/preview_relay.py の /ws/previews/{job_id}/publish。デモが起動する
+API/MLLB.py のサーバにマウントされている）へ送る。ブラウザは
+preview_viewer_html の埋め込み HTML で /ws/previews/{job_id} を購読し、
+キャンセルボタンで生成を止められる。
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import threading
+
+from PIL import Image
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+
+from ltx_video.utils.cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+
+class PreviewPublisher:
+    """生成ジョブ1件分のプレビュー送信とキャンセル受信
+
+    preview_callback として渡すと、プレビューの中央フレームを JPEG にして送る。
+    閲覧側から "cancel" が届いたら token をキャンセルし、パイプラインは次の
+    ステップの前で止まる。API サーバに繋がらなくても生成はそのまま続ける。
+    """
+
+    def __init__(self, job_id: str, base_url: str, max_width: int = 512, jpeg_quality: int = 80):
+        self.job_id = job_id
+        self.token = CancellationToken()
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        # 最後にプレビューを送ったステップ（1始まり）
+        self.step: int | None = None
+        self._ws = None
+        try:
+            self._ws = connect(f"{base_url}/{job_id}/publish", open_timeout=5)
+        except Exception as e:
+            logger.warning("プレビュー配信に接続できません（生成は続けます）: %s", e)
+            return
+        threading.Thread(target=self._receive, name=f"preview-{job_id}", daemon=True).start()
+
+    def _receive(self):
+        try:
+            for message in self._ws:
+                if message == "cancel":
+                    self.token.cancel()
+        except ConnectionClosed:
+            pass
+
+    def _send(self, message):
+        if self._ws is None:
+            return
+        try:
+            self._ws.send(message)
+        except ConnectionClosed:
+            logger.warning("プレビュー配信が切断されました")
+            self._ws = None
+
+    def __call__(self, step, frames):
+        self.step = step + 1
+        # frames: (batch, フレーム, 高さ, 幅, 3) の uint8。先頭の動画の中央フレームを送る
+        image = Image.fromarray(frames[0, frames.shape[1] // 2].numpy())
+        height = max(1, round(image.height * self.max_width / image.width))
+        image = image.resize((self.max_width, height), Image.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=self.jpeg_quality)
+        self._send(json.dumps({"status": "running", "step": self.step}))
+        self._send(buffer.getvalue())
+
+    def finish(self, status: str):
+        """"done" / "cancelled" / "error" を閲覧側に知らせて接続を閉じる"""
+        self._send(json.dumps({"status": status, "step": self.step}))
+        if self._ws is not None:
+            self._ws.close()
+            self._ws = None
+
+
+def preview_viewer_html(job_id: str, port: int) -> str:
+    """st.components.v1.html で埋め込む、プレビュー表示とキャンセルボタン"""
+    return f"""
+<div style="font-family: sans-serif">
+  <img id="preview" style="width: 100%; border-radius: 4px; background: #111; min-height: 120px">
+  <div style="display: flex; align-items: center; gap: 12px; margin-top: 6px">
+    <button id="cancel">⏹ キャンセル</button>
+    <span id="status">プレビュー待ち…</span>
+  </div>
+</div>
+<script>
+  // iframe の中なので、接続先のホストは親ページから取る
+  let host = "localhost", secure = false;
+  try {{
+    host = window.parent.location.hostname || host;
+    secure = window.parent.location.protocol === "https:";
+  }} catch (e) {{}}
+  const ws = new WebSocket(`${{secure ? "wss" : "ws"}}://${{host}}:{port}/ws/previews/{job_id}`);
+  ws.binaryType = "blob";
+  const img = document.getElementById("preview");
+  const status = document.getElementById("status");
+  const labels = {{
+    running: "生成中", cancelling: "キャンセル中…", cancelled: "キャンセルしました",
+    done: "完了", error: "エラー",
+  }};
+  ws.onmessage = (event) => {{
+    if (typeof event.data === "string") {{
+      const message = JSON.parse(event.data);
+      const step = message.step ? ` (ステップ ${{message.step}})` : "";
+      status.textContent = (labels[message.status] || message.status) + step;
+    }} else {{
+      const previous = img.src;
+      img.src = URL.createObjectURL(event.data);
+      if (previous) URL.revokeObjectURL(previous);
+    }}
+  }};
+  ws.onerror = () => {{ status.textContent = "プレビュー配信に接続できません"; }};
+  document.getElementById("cancel").onclick = () => {{
+    if (ws.readyState === WebSocket.OPEN) ws.send("cancel");
+  }};
+</script>
+"""
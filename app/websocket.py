@@ -1,14 +1,146 @@
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from processing.pipeline import process_frame
+from app.preview_relay import router as preview_router
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import itertools
+import logging
+import os
+import time
 
 router = APIRouter()
+# 生成中プレビューの配信（/ws/previews）も同じサーバで受ける
+router.include_router(preview_router)
+logger = logging.getLogger(__name__)
+
+# 1接続あたり同時に処理できるフレーム数
+MAX_IN_FLIGHT = int(os.environ.get("WS_MAX_IN_FLIGHT", "2"))
+# 全接続で共有するワーカープール（コア数に合わせる）
+_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="ws-frame"
+)
+_connection_ids = itertools.count()
+# 接続ID -> ConnectionStats
+connection_stats = {}
+
+
+class ConnectionStats:
+    """接続ごとのフレーム数・FPS・レイテンシの集計"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def record_sent(self, received_at: float):
+        latency = time.monotonic() - received_at
+        self.sent += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def as_dict(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            "received": self.received,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "fps": self.sent / elapsed,
+            "latency_avg_ms": 1000 * self.latency_sum / max(self.sent, 1),
+            "latency_max_ms": 1000 * self.latency_max,
+        }
+
+
+class FramePipeline:
+    """受信→処理→送信を並行に回すパイプライン
+
+    受信キューと送信待ちの枠はどちらも上限付きで、詰まったときは古いフレームを
+    捨てて最新のフレームを残す。処理は最大 max_in_flight フレームまで同時に行い、
+    追い越された（より新しいフレームが先に送られた）結果は送らずに捨てる。
+    """
+
+    def __init__(self, ws: WebSocket, stats: ConnectionStats, max_in_flight: int):
+        self.ws = ws
+        self.stats = stats
+        self.max_in_flight = max(1, max_in_flight)
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize=self.max_in_flight)
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.last_queued_seq = -1
+
+    @staticmethod
+    def _put_latest(queue: asyncio.Queue, item) -> bool:
+        """キューが一杯なら一番古い要素を捨てて入れる。捨てたら True"""
+        dropped = False
+        if queue.full():
+            queue.get_nowait()
+            dropped = True
+        queue.put_nowait(item)
+        return dropped
+
+    async def _receive(self):
+        for seq in itertools.count():
+            data = await self.ws.receive_bytes()
+            self.stats.received += 1
+            if self._put_latest(self.inbox, (seq, time.monotonic(), data)):
+                self.stats.dropped += 1
+
+    async def _process(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            seq, received_at, data = await self.inbox.get()
+            try:
+                processed = await loop.run_in_executor(_executor, process_frame, data)
+            except ValueError as e:
+                # 壊れたフレームは捨てて、接続は続ける
+                self.stats.dropped += 1
+                logger.warning("frame %d dropped: %s", seq, e)
+                continue
+            if seq < self.last_queued_seq:
+                # 後から来たフレームが先に処理を終えていれば、古い結果は捨てる
+                self.stats.dropped += 1
+                continue
+            self.last_queued_seq = seq
+            if self._put_latest(self.outbox, (received_at, processed)):
+                self.stats.dropped += 1
+
+    async def _send(self):
+        while True:
+            received_at, processed = await self.outbox.get()
+            await self.ws.send_bytes(processed)
+            self.stats.record_sent(received_at)
+
+    async def run(self):
+        tasks = [
+            asyncio.create_task(self._receive()),
+            asyncio.create_task(self._send()),
+        ] + [asyncio.create_task(self._process()) for _ in range(self.max_in_flight)]
+        try:
+            # どれか1つ（通常は切断による受信/送信エラー）が終わったら全体を止める
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
 
 @router.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
-    while True:
-        data = await ws.receive_bytes()
-        # 後述の pipeline.process_frame を呼び出す
-        processed = await asyncio.to_thread(process_frame, data)
-        await ws.send_bytes(processed)
\ No newline at end of file
+    connection_id = next(_connection_ids)
+    stats = connection_stats[connection_id] = ConnectionStats()
+    try:
+        await FramePipeline(ws, stats, MAX_IN_FLIGHT).run()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        del connection_stats[connection_id]
+        logger.info("ws connection %d closed: %s", connection_id, stats.as_dict())
+
+
+@router.get("/ws/stats")
+async def websocket_stats():
+    return {str(cid): stats.as_dict() for cid, stats in connection_stats.items()}
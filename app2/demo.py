@@ -9,8 +9,10 @@ upstream tool adds this option we default to the 14 B model only.
 
 from __future__ import annotations
 
+import json
 import os
 import subprocess
+import sys
 import tempfile
 import textwrap
 from pathlib import Path
@@ -20,8 +22,43 @@ from PIL import Image
 import requests
 import re
 import socket
+import uuid
+from concurrent.futures import wait
+
+import streamlit.components.v1 as components
 
 WEIGHTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../external/weights"))
+LTX_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../external/LTX-Video"))
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# LTX-Videoはサブプロセスではなくこのプロセス内で実行する（CUDA初期化前に設定）
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+if LTX_DIR not in sys.path:
+    sys.path.insert(0, LTX_DIR)
+# app.preview_stream を読み込むためにリポジトリのルートも通す
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from ltx_video.inference import InferenceConfig, get_cached_result  # noqa: E402
+from ltx_video.pipelines.device_pool import DevicePoolScheduler  # noqa: E402
+from ltx_video.pipelines.prompt_embedding_cache import PromptEmbeddingCache  # noqa: E402
+from ltx_video.utils.cancellation import GenerationCancelled  # noqa: E402
+
+from app.preview_stream import PreviewPublisher, preview_viewer_html  # noqa: E402
+
+# プロンプト埋め込みのディスクキャッシュ（再起動後も同じプロンプトでT5を再実行しない）
+PROMPT_EMBEDDING_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ltx_prompt_embeddings")
+# 生成結果のキャッシュ（同じ画像・プロンプト・シード・設定なら保存済みの動画をすぐ返す）
+RESULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ltx_results")
+
+
+@st.cache_resource
+def get_ltx_scheduler() -> DevicePoolScheduler:
+    """GPUごとにワーカーを置いてパイプラインを常駐させ、同時アクセスのジョブを空いているGPUへ振り分ける"""
+    return DevicePoolScheduler(
+        prompt_embedding_cache=PromptEmbeddingCache(cache_dir=PROMPT_EMBEDDING_CACHE_DIR)
+    )
+
 
 # -----------------------------------------------------------------------------
 # 0)  Streamlit page settings
@@ -186,9 +223,12 @@ if 'video_bytes' not in st.session_state:
     st.session_state['video_bytes'] = None
 if 'gen_error' not in st.session_state:
     st.session_state['gen_error'] = None
+if 'stage_timings' not in st.session_state:
+    st.session_state['stage_timings'] = None
 
 if run_btn:
     st.session_state['gen_error'] = None
+    st.session_state['stage_timings'] = None
     try:
         # 4)  Prepare temporary paths
         with st.status("⏳ Setting up…"):
@@ -205,22 +245,25 @@ if run_btn:
         # 5)  Build command line
         run_subprocess = True
         if model.startswith("LTX-Video"):
-            config_path = "external/LTX-Video/configs/ltxv-2b-0.9.6-distilled.yaml"
-            cmd = [
-                "python", "external/LTX-Video/inference.py",
-                "--prompt", prompt,
-                "--conditioning_media_paths", tmp_img_file.name,
-                "--conditioning_start_frames", "0",
-                "--height", str(out_height),
-                "--width", str(out_width),
-                "--num_frames", str(frame_num),
-                "--frame_rate", str(fps),
-                "--output_path", str(output_dir / "ltx.mp4/output.mp4"),
-                "--pipeline_config", config_path,
-            ]
-            if offload_to_cpu:
-                cmd += ["--offload_to_cpu", "True"]
-            extra_env = {"PYTORCH_CUDA_ALLOC_CONF": "expandable_segments:True"}
+            # 常駐パイプラインを使ってプロセス内で生成する
+            run_subprocess = False
+            cmd = None
+            config_path = os.path.join(LTX_DIR, "configs", "ltxv-2b-0.9.6-distilled.yaml")
+            inference_config = InferenceConfig(
+                prompt=prompt,
+                conditioning_media_paths=[tmp_img_file.name],
+                conditioning_start_frames=[0],
+                height=out_height,
+                width=out_width,
+                num_frames=frame_num,
+                frame_rate=fps,
+                output_path=str(output_dir / "ltx"),
+                pipeline_config=config_path,
+                offload_to_cpu=offload_to_cpu,
+                result_cache_dir=RESULT_CACHE_DIR,
+                # ステージごとの時間とメモリを記録する
+                trace_path=str(output_dir / "trace.json"),
+            )
         elif model.startswith("Wan2.1"):
             task = "i2v-14B"
             ckpt_dir = os.path.join(WEIGHTS_DIR, "Wan2.1-I2V-14B-720P")
@@ -271,7 +314,8 @@ if run_btn:
             ]
             extra_env = {}
 
-        st.code("$ " + " ".join(cmd), language="bash")
+        if cmd is not None:
+            st.code("$ " + " ".join(cmd), language="bash")
         with st.status("🖥️  Running model… this can take a few minutes."):
             if run_subprocess:
                 # ここでCUDA_VISIBLE_DEVICES=0,1を追加
@@ -284,6 +328,38 @@ if run_btn:
                     env=env_multi_gpu,
                 )
             else:
+                # キャッシュにあればキューに並ばずにすぐ返す
+                ltx_outputs = get_cached_result(inference_config)
+                if ltx_outputs is None:
+                    # 空いているデバイスのワーカーで実行する（混雑時はキューで待つ）
+                    scheduler = get_ltx_scheduler()
+                    st.write(f"待ち行列: {scheduler.queue_depth} 件")
+                    # 数ステップごとの簡易プレビューを API サーバの WebSocket 経由で表示し、
+                    # プレビュー下のキャンセルボタンで生成を止められるようにする
+                    job_id = uuid.uuid4().hex
+                    publisher = PreviewPublisher(job_id, f"ws://{API_HOST}:{API_PORT}/ws/previews")
+                    components.html(preview_viewer_html(job_id, API_PORT), height=420)
+                    future = scheduler.submit(
+                        inference_config,
+                        preview_callback=publisher,
+                        cancellation_token=publisher.token,
+                    )
+                    progress = st.empty()
+                    try:
+                        # result() で待ち続けるとページを離れてもスクリプトが止まらないので、
+                        # 1秒ごとに画面を更新して Streamlit の停止要求を受け取れるようにする
+                        while not wait([future], timeout=1.0).done:
+                            progress.caption(f"ステップ {publisher.step or 0} まで完了")
+                        ltx_outputs = future.result()
+                        publisher.finish("done")
+                    except GenerationCancelled:
+                        publisher.finish("cancelled")
+                        raise
+                    except BaseException:
+                        # ページを離れた・再実行された場合もここに来るので、生成を止める
+                        publisher.token.cancel()
+                        publisher.finish("error" if future.done() else "cancelled")
+                        raise
                 proc = None
         if proc is not None and proc.returncode != 0:
             st.session_state['gen_error'] = "**Generation failed**. See logs below:"
@@ -293,7 +369,34 @@ if run_btn:
             st.session_state['gen_stderr'] = proc.stderr or "<empty>"
         else:
             # 7)  Display result
-            video_files = [f for f in output_dir.rglob("*.mp4") if f.is_file()]
+            if model.startswith("LTX-Video"):
+                # キャッシュヒット時は output_dir ではなくキャッシュ内のファイルが返る
+                video_files = [Path(f) for f in ltx_outputs if str(f).endswith(".mp4")]
+                # キャッシュヒット時は生成していないのでトレースは無い
+                trace_path = output_dir / "trace.json"
+                if trace_path.exists():
+                    summary = json.loads(trace_path.read_text())["summary"]
+                    st.session_state['stage_timings'] = [
+                        {
+                            "stage": name,
+                            "回数": entry["count"],
+                            "合計 (s)": round(entry["seconds"], 2),
+                            "平均 (s)": round(entry["mean_seconds"], 3),
+                            "GPUピーク (MiB)": (
+                                round(entry["peak_memory_bytes"] / 1024**2)
+                                if entry["peak_memory_bytes"] is not None
+                                else None
+                            ),
+                            "RSSピーク (MiB)": (
+                                round(entry["peak_rss_bytes"] / 1024**2)
+                                if entry["peak_rss_bytes"] is not None
+                                else None
+                            ),
+                        }
+                        for name, entry in summary.items()
+                    ]
+            else:
+                video_files = [f for f in output_dir.rglob("*.mp4") if f.is_file()]
             if not video_files:
                 st.session_state['gen_error'] = "No video file produced."
                 st.session_state['video_path'] = None
@@ -304,6 +407,10 @@ if run_btn:
                     video_bytes = f.read()
                 st.session_state['video_path'] = str(video_path)
                 st.session_state['video_bytes'] = video_bytes
+    except GenerationCancelled:
+        st.session_state['gen_error'] = "⏹ 生成をキャンセルしました"
+        st.session_state['video_path'] = None
+        st.session_state['video_bytes'] = None
     except Exception as e:
         st.session_state['gen_error'] = f"エラー: {e}"
         st.session_state['video_path'] = None
@@ -320,3 +427,8 @@ if st.session_state.get('gen_error'):
 if st.session_state.get('video_path') and st.session_state.get('video_bytes'):
     st.video(st.session_state['video_path'])
     st.download_button("Download video", st.session_state['video_bytes'], file_name=Path(st.session_state['video_path']).name, mime="video/mp4")
+
+# ステージ別の時間とメモリ（LTX-Video で生成した場合のみ）
+if st.session_state.get('stage_timings'):
+    with st.expander("⏱️ ステージ別の時間とメモリ"):
+        st.table(st.session_state['stage_timings'])
@@ -1,19 +1,20 @@
 import os
 import random
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
 from diffusers.utils import logging
-from typing import Optional, List, Union
+from typing import Callable, Iterable, Optional, List, Union
 import yaml
 
 import imageio
 import json
 import numpy as np
 import torch
-from safetensors import safe_open
 from PIL import Image
 import torchvision.transforms.functional as TVF
 from transformers import (
+    T5Config,
     T5EncoderModel,
     T5Tokenizer,
     AutoModelForCausalLM,
@@ -21,7 +22,7 @@ from transformers import (
     AutoTokenizer,
 )
 from huggingface_hub import hf_hub_download
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 
 from ltx_video.models.autoencoders.causal_video_autoencoder import (
     CausalVideoAutoencoder,
@@ -33,8 +34,29 @@ from ltx_video.pipelines.pipeline_ltx_video import (
     LTXVideoPipeline,
     LTXMultiScalePipeline,
 )
+from ltx_video.pipelines.prompt_embedding_cache import PromptEmbeddingCache
+from ltx_video.pipelines.result_cache import ResultCache
 from ltx_video.schedulers.rf import RectifiedFlowScheduler
+from ltx_video.utils.cancellation import CancellationToken
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+from ltx_video.utils.profiling import StageProfiler, profile_stage
+from ltx_video.utils.quantization import (
+    INT8_DYNAMIC,
+    default_quantization_cache_dir,
+    load_quantized_model,
+    quantization_cache_path,
+)
+from ltx_video.utils.media_reader import (
+    count_video_frames,
+    is_video_file,
+    iter_video_frames,
+)
 from ltx_video.utils.skip_layer_strategy import SkipLayerStrategy
+from ltx_video.utils.video_writer import (
+    BackgroundVideoWriter,
+    to_uint8_frames,
+    write_video,
+)
 from ltx_video.models.autoencoders.latent_upsampler import LatentUpsampler
 import ltx_video.pipelines.crf_compressor as crf_compressor
 
@@ -56,6 +78,25 @@ def get_device():
     return "cpu"
 
 
+def _center_crop_box(
+    input_height: int, input_width: int, target_height: int, target_width: int
+) -> tuple[int, int, int, int]:
+    """Returns `(x_start, y_start, width, height)` of the largest centered crop with the target aspect ratio."""
+    aspect_ratio_target = target_width / target_height
+    aspect_ratio_frame = input_width / input_height
+    if aspect_ratio_frame > aspect_ratio_target:
+        new_width = int(input_height * aspect_ratio_target)
+        new_height = input_height
+        x_start = (input_width - new_width) // 2
+        y_start = 0
+    else:
+        new_width = input_width
+        new_height = int(input_width / aspect_ratio_target)
+        x_start = 0
+        y_start = (input_height - new_height) // 2
+    return x_start, y_start, new_width, new_height
+
+
 def load_image_to_tensor_with_resize_and_crop(
     image_input: Union[str, Image.Image],
     target_height: int = 512,
@@ -78,18 +119,9 @@ def load_image_to_tensor_with_resize_and_crop(
         raise ValueError("image_input must be either a file path or a PIL Image object")
 
     input_width, input_height = image.size
-    aspect_ratio_target = target_width / target_height
-    aspect_ratio_frame = input_width / input_height
-    if aspect_ratio_frame > aspect_ratio_target:
-        new_width = int(input_height * aspect_ratio_target)
-        new_height = input_height
-        x_start = (input_width - new_width) // 2
-        y_start = 0
-    else:
-        new_width = input_width
-        new_height = int(input_width / aspect_ratio_target)
-        x_start = 0
-        y_start = (input_height - new_height) // 2
+    x_start, y_start, new_width, new_height = _center_crop_box(
+        input_height, input_width, target_height, target_width
+    )
 
     image = image.crop((x_start, y_start, x_start + new_width, y_start + new_height))
     if not just_crop:
@@ -105,6 +137,51 @@ def load_image_to_tensor_with_resize_and_crop(
     return frame_tensor.unsqueeze(0).unsqueeze(2)
 
 
+def load_frames_to_tensor_with_resize_and_crop(
+    frames: np.ndarray,
+    target_height: int = 512,
+    target_width: int = 768,
+    just_crop: bool = False,
+) -> torch.Tensor:
+    """Process a stack of video frames into a tensor.
+
+    Vectorized counterpart of `load_image_to_tensor_with_resize_and_crop`: the crop, resize and blur
+    run over all frames at once and the CRF compression uses a single encoder session.
+
+    Args:
+        frames: uint8 array of shape (num_frames, height, width, 3)
+        target_height: Desired height of output tensor
+        target_width: Desired width of output tensor
+        just_crop: If True, only crop the frames to the target size without resizing
+    """
+    input_height, input_width = frames.shape[1:3]
+    x_start, y_start, new_width, new_height = _center_crop_box(
+        input_height, input_width, target_height, target_width
+    )
+
+    frames_tensor = torch.from_numpy(np.ascontiguousarray(frames)).permute(0, 3, 1, 2)
+    frames_tensor = frames_tensor[
+        :, :, y_start : y_start + new_height, x_start : x_start + new_width
+    ]
+    if not just_crop:
+        # Bicubic with antialiasing, like PIL's default `Image.resize`
+        frames_tensor = TVF.resize(
+            frames_tensor,
+            [target_height, target_width],
+            interpolation=TVF.InterpolationMode.BICUBIC,
+            antialias=True,
+        )
+
+    frames_tensor = frames_tensor.float() / 255.0  # (F, C, H, W), [0,1]
+    frames_tensor = TVF.gaussian_blur(frames_tensor, kernel_size=3, sigma=1.0)
+    frames_tensor_fhwc = frames_tensor.permute(0, 2, 3, 1)  # -> (F, H, W, C)
+    frames_tensor_fhwc = crf_compressor.compress_batch(frames_tensor_fhwc)
+    frames_tensor = frames_tensor_fhwc.permute(3, 0, 1, 2) * 255.0  # -> (C, F, H, W)
+    frames_tensor = (frames_tensor / 127.5) - 1.0
+    # Create 5D tensor: (batch_size=1, channels=3, num_frames, height, width)
+    return frames_tensor.unsqueeze(0)
+
+
 def calculate_padding(
     source_height: int, source_width: int, target_height: int, target_width: int
 ) -> tuple[int, int, int, int]:
@@ -182,16 +259,48 @@ def seed_everething(seed: int):
         torch.mps.manual_seed(seed)
 
 
-def create_transformer(ckpt_path: str, precision: str) -> Transformer3DModel:
+def create_transformer(
+    checkpoint: Union[str, SafetensorsCheckpoint],
+    precision: str,
+    device: Optional[str] = None,
+    stream_blocks: bool = False,
+    quantization_cache_dir: Optional[str] = None,
+) -> Transformer3DModel:
+    if not isinstance(checkpoint, SafetensorsCheckpoint):
+        checkpoint = SafetensorsCheckpoint(checkpoint)
+    if stream_blocks and precision in ("float8_e4m3fn", INT8_DYNAMIC):
+        raise ValueError(
+            f"Streaming the transformer blocks is not supported with {precision} precision"
+        )
+    if precision == INT8_DYNAMIC:
+        _check_int8_device(device)
+
+        def build_meta_model():
+            with torch.device("meta"):
+                return Transformer3DModel.from_config(checkpoint.configs["transformer"])
+
+        # The linear layers of the blocks (attention and feed-forward) hold nearly all
+        # the weights; the small input, output and timestep projections stay in float32
+        return load_quantized_model(
+            quantization_cache_path(
+                quantization_cache_dir or default_quantization_cache_dir(),
+                checkpoint.path,
+                "transformer",
+            ),
+            load_float_model=lambda: Transformer3DModel.from_checkpoint(
+                checkpoint, dtype=torch.float32
+            ),
+            build_meta_model=build_meta_model,
+            targets=lambda transformer: [transformer.transformer_blocks],
+        )
     if precision == "float8_e4m3fn":
         try:
             from q8_kernels.integration.patch_transformer import (
                 patch_diffusers_transformer as patch_transformer_for_q8_kernels,
             )
 
-            transformer = Transformer3DModel.from_pretrained(
-                ckpt_path, dtype=torch.float8_e4m3fn
-            )
+            # The FP8 weights are loaded as stored and patched on the CPU
+            transformer = Transformer3DModel.from_checkpoint(checkpoint)
             patch_transformer_for_q8_kernels(transformer)
             return transformer
         except ImportError:
@@ -199,9 +308,57 @@ def create_transformer(ckpt_path: str, precision: str) -> Transformer3DModel:
                 "Q8-Kernels not found. To use FP8 checkpoint, please install Q8 kernels from https://github.com/Lightricks/LTXVideo-Q8-Kernels"
             )
     elif precision == "bfloat16":
-        return Transformer3DModel.from_pretrained(ckpt_path).to(torch.bfloat16)
+        return Transformer3DModel.from_checkpoint(
+            checkpoint, device=device, dtype=torch.bfloat16, stream_blocks=stream_blocks
+        )
     else:
-        return Transformer3DModel.from_pretrained(ckpt_path)
+        return Transformer3DModel.from_checkpoint(
+            checkpoint, device=device, stream_blocks=stream_blocks
+        )
+
+
+def _check_int8_device(device: Optional[str]):
+    if device is not None and torch.device(device).type != "cpu":
+        raise ValueError(f"{INT8_DYNAMIC} precision runs on the CPU, not on {device}")
+
+
+def create_text_encoder(
+    text_encoder_model_name_or_path: str,
+    device: Optional[str] = None,
+    precision: Optional[str] = None,
+    quantization_cache_dir: Optional[str] = None,
+) -> T5EncoderModel:
+    if precision == INT8_DYNAMIC:
+        _check_int8_device(device)
+
+        def build_meta_model():
+            config = T5Config.from_pretrained(
+                text_encoder_model_name_or_path, subfolder="text_encoder"
+            )
+            with torch.device("meta"):
+                return T5EncoderModel(config)
+
+        return load_quantized_model(
+            quantization_cache_path(
+                quantization_cache_dir or default_quantization_cache_dir(),
+                text_encoder_model_name_or_path,
+                "text_encoder",
+            ),
+            load_float_model=lambda: T5EncoderModel.from_pretrained(
+                text_encoder_model_name_or_path, subfolder="text_encoder"
+            ),
+            build_meta_model=build_meta_model,
+        )
+    text_encoder = T5EncoderModel.from_pretrained(
+        text_encoder_model_name_or_path, subfolder="text_encoder"
+    )
+    return text_encoder.to(device).to(torch.bfloat16)
+
+
+def create_tokenizer(text_encoder_model_name_or_path: str) -> T5Tokenizer:
+    return T5Tokenizer.from_pretrained(
+        text_encoder_model_name_or_path, subfolder="tokenizer"
+    )
 
 
 def create_ltx_video_pipeline(
@@ -209,44 +366,61 @@ def create_ltx_video_pipeline(
     precision: str,
     text_encoder_model_name_or_path: str,
     sampler: Optional[str] = None,
+    solver: Optional[str] = None,
     device: Optional[str] = None,
     enhance_prompt: bool = False,
     prompt_enhancer_image_caption_model_name_or_path: Optional[str] = None,
     prompt_enhancer_llm_model_name_or_path: Optional[str] = None,
+    text_encoder: Optional[T5EncoderModel] = None,
+    tokenizer: Optional[T5Tokenizer] = None,
+    prompt_embedding_cache: Optional[PromptEmbeddingCache] = None,
+    stream_transformer_blocks: bool = False,
+    quantization_cache_dir: Optional[str] = None,
 ) -> LTXVideoPipeline:
     ckpt_path = Path(ckpt_path)
     assert os.path.exists(
         ckpt_path
     ), f"Ckpt path provided (--ckpt_path) {ckpt_path} does not exist"
 
-    with safe_open(ckpt_path, framework="pt") as f:
-        metadata = f.metadata()
-        config_str = metadata.get("config")
-        configs = json.loads(config_str)
-        allowed_inference_steps = configs.get("allowed_inference_steps", None)
+    # The checkpoint header is parsed once and its data memory-mapped. The models are
+    # built on the meta device and each weight is copied once, from the mapped file
+    # straight to its device and dtype.
+    checkpoint = SafetensorsCheckpoint(ckpt_path)
+    allowed_inference_steps = checkpoint.configs.get("allowed_inference_steps", None)
 
-    vae = CausalVideoAutoencoder.from_pretrained(ckpt_path)
-    transformer = create_transformer(ckpt_path, precision)
+    vae = CausalVideoAutoencoder.from_checkpoint(
+        checkpoint, device=device, dtype=torch.bfloat16
+    )
+    transformer = create_transformer(
+        checkpoint,
+        precision,
+        device=device,
+        stream_blocks=stream_transformer_blocks,
+        quantization_cache_dir=quantization_cache_dir,
+    )
 
-    # Use constructor if sampler is specified, otherwise use from_pretrained
+    # Use constructor if sampler is specified, otherwise use the checkpoint config
     if sampler == "from_checkpoint" or not sampler:
-        scheduler = RectifiedFlowScheduler.from_pretrained(ckpt_path)
+        scheduler = RectifiedFlowScheduler.from_config(checkpoint.configs["scheduler"])
     else:
         scheduler = RectifiedFlowScheduler(
             sampler=("Uniform" if sampler.lower() == "uniform" else "LinearQuadratic")
         )
-
-    text_encoder = T5EncoderModel.from_pretrained(
-        text_encoder_model_name_or_path, subfolder="text_encoder"
-    )
+    if solver:
+        scheduler = RectifiedFlowScheduler.from_config(scheduler.config, solver=solver)
+
+    # A text encoder / tokenizer passed in by the caller may be shared with other
+    # pipelines, so it is only loaded here when none is given.
+    if text_encoder is None:
+        text_encoder = create_text_encoder(
+            text_encoder_model_name_or_path,
+            device,
+            precision=precision,
+            quantization_cache_dir=quantization_cache_dir,
+        )
     patchifier = SymmetricPatchifier(patch_size=1)
-    tokenizer = T5Tokenizer.from_pretrained(
-        text_encoder_model_name_or_path, subfolder="tokenizer"
-    )
-
-    transformer = transformer.to(device)
-    vae = vae.to(device)
-    text_encoder = text_encoder.to(device)
+    if tokenizer is None:
+        tokenizer = create_tokenizer(text_encoder_model_name_or_path)
 
     if enhance_prompt:
         prompt_enhancer_image_caption_model = AutoModelForCausalLM.from_pretrained(
@@ -268,9 +442,6 @@ def create_ltx_video_pipeline(
         prompt_enhancer_llm_model = None
         prompt_enhancer_llm_tokenizer = None
 
-    vae = vae.to(torch.bfloat16)
-    text_encoder = text_encoder.to(torch.bfloat16)
-
     # Use submodels for the pipeline
     submodel_dict = {
         "transformer": transformer,
@@ -284,6 +455,7 @@ def create_ltx_video_pipeline(
         "prompt_enhancer_llm_model": prompt_enhancer_llm_model,
         "prompt_enhancer_llm_tokenizer": prompt_enhancer_llm_tokenizer,
         "allowed_inference_steps": allowed_inference_steps,
+        "prompt_embedding_cache": prompt_embedding_cache,
     }
 
     pipeline = LTXVideoPipeline(**submodel_dict)
@@ -292,12 +464,85 @@ def create_ltx_video_pipeline(
 
 
 def create_latent_upsampler(latent_upsampler_model_path: str, device: str):
-    latent_upsampler = LatentUpsampler.from_pretrained(latent_upsampler_model_path)
-    latent_upsampler.to(device)
+    latent_upsampler = LatentUpsampler.from_pretrained(
+        latent_upsampler_model_path, device=device
+    )
     latent_upsampler.eval()
     return latent_upsampler
 
 
+def resolve_model_path(model_name_or_path: Optional[str]) -> Optional[str]:
+    """Return a local path for a model file, downloading it from the hub if needed."""
+    if model_name_or_path and not os.path.isfile(model_name_or_path):
+        return hf_hub_download(
+            repo_id="Lightricks/LTX-Video",
+            filename=model_name_or_path,
+            repo_type="model",
+        )
+    return model_name_or_path
+
+
+def create_pipeline_from_config(
+    pipeline_config: dict,
+    device: Optional[str] = None,
+    enhance_prompt: bool = False,
+    text_encoder: Optional[T5EncoderModel] = None,
+    tokenizer: Optional[T5Tokenizer] = None,
+    prompt_embedding_cache: Optional[PromptEmbeddingCache] = None,
+) -> Union[LTXVideoPipeline, LTXMultiScalePipeline]:
+    """Build the (single or multi-scale) pipeline described by a loaded pipeline config.
+
+    Args:
+        pipeline_config: The parsed pipeline config, as returned by `load_pipeline_config`
+        device: Device to place the models on
+        enhance_prompt: Whether to also load the prompt enhancement models
+        text_encoder: Optional already loaded text encoder to use instead of loading one
+        tokenizer: Optional already loaded tokenizer to use instead of loading one
+        prompt_embedding_cache: Optional cache of text encoder outputs for the pipeline to use
+    """
+    ltxv_model_path = resolve_model_path(pipeline_config["checkpoint_path"])
+    spatial_upscaler_model_path = resolve_model_path(
+        pipeline_config.get("spatial_upscaler_model_path")
+    )
+
+    pipeline = create_ltx_video_pipeline(
+        ckpt_path=ltxv_model_path,
+        precision=pipeline_config["precision"],
+        text_encoder_model_name_or_path=pipeline_config[
+            "text_encoder_model_name_or_path"
+        ],
+        sampler=pipeline_config.get("sampler", None),
+        solver=pipeline_config.get("solver", None),
+        device=device,
+        enhance_prompt=enhance_prompt,
+        prompt_enhancer_image_caption_model_name_or_path=pipeline_config[
+            "prompt_enhancer_image_caption_model_name_or_path"
+        ],
+        prompt_enhancer_llm_model_name_or_path=pipeline_config[
+            "prompt_enhancer_llm_model_name_or_path"
+        ],
+        text_encoder=text_encoder,
+        tokenizer=tokenizer,
+        prompt_embedding_cache=prompt_embedding_cache,
+        stream_transformer_blocks=pipeline_config.get(
+            "stream_transformer_blocks", False
+        ),
+        quantization_cache_dir=pipeline_config.get("quantization_cache_dir"),
+    )
+
+    if pipeline_config.get("pipeline_type", None) == "multi-scale":
+        if not spatial_upscaler_model_path:
+            raise ValueError(
+                "spatial upscaler model path is missing from pipeline config file and is required for multi-scale rendering"
+            )
+        latent_upsampler = create_latent_upsampler(
+            spatial_upscaler_model_path, pipeline.device
+        )
+        pipeline = LTXMultiScalePipeline(pipeline, latent_upsampler=latent_upsampler)
+
+    return pipeline
+
+
 def load_pipeline_config(pipeline_config: str):
     current_file = Path(__file__)
 
@@ -315,7 +560,12 @@ def load_pipeline_config(pipeline_config: str):
 
 @dataclass
 class InferenceConfig:
-    prompt: str = field(metadata={"help": "Prompt for the generation"})
+    prompt: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "Prompt for the generation. Required unless `manifest_path` is given."
+        },
+    )
 
     output_path: str = field(
         default_factory=lambda: Path(
@@ -385,34 +635,76 @@ class InferenceConfig:
         },
     )
 
+    vae_decode_memory_budget_gb: Optional[float] = field(
+        default=None,
+        metadata={
+            "help": "Decode the video in spatial tiles sized to fit this memory budget (GB), to lower peak memory."
+        },
+    )
+    vae_decode_chunk_size: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": "Decode the video this many latent frames at a time and encode each chunk while the next one decodes, so the decoded video is never held in memory at once. Cannot be combined with vae_decode_memory_budget_gb."
+        },
+    )
+
+    prompt_embedding_cache_dir: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "Directory to cache T5 prompt embeddings in, so repeated prompts skip the text encoder."
+        },
+    )
 
-def infer(config: InferenceConfig):
-    pipeline_config = load_pipeline_config(config.pipeline_config)
+    device: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "Device to run the pipeline on (e.g. cuda:1). Defaults to the best available device."
+        },
+    )
 
-    ltxv_model_name_or_path = pipeline_config["checkpoint_path"]
-    if not os.path.isfile(ltxv_model_name_or_path):
-        ltxv_model_path = hf_hub_download(
-            repo_id="Lightricks/LTX-Video",
-            filename=ltxv_model_name_or_path,
-            repo_type="model",
-        )
-    else:
-        ltxv_model_path = ltxv_model_name_or_path
+    result_cache_dir: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "Directory of a store of generated videos. Requests identical to an earlier one return the stored video instead of running the pipeline."
+        },
+    )
+    result_cache_max_gb: float = field(
+        default=20.0,
+        metadata={
+            "help": "Size limit of the result store (GB), least recently used videos are evicted first."
+        },
+    )
 
-    spatial_upscaler_model_name_or_path = pipeline_config.get(
-        "spatial_upscaler_model_path"
+    # Batch mode
+    manifest_path: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "JSONL file with one job per line. Each job overrides the fields of this config and all jobs share the loaded pipeline."
+        },
+    )
+    max_batch_size: int = field(
+        default=1,
+        metadata={
+            "help": "Maximum number of manifest jobs rendered together in one pipeline call."
+        },
+    )
+
+    # Instrumentation
+    trace_path: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "Write the wall time and memory of each generation stage to this JSON file, in Chrome trace format."
+        },
+    )
+    preview_every_n_steps: int = field(
+        default=1,
+        metadata={
+            "help": "Number of denoising steps between two latent previews, when `infer` is given a `preview_callback`."
+        },
     )
-    if spatial_upscaler_model_name_or_path and not os.path.isfile(
-        spatial_upscaler_model_name_or_path
-    ):
-        spatial_upscaler_model_path = hf_hub_download(
-            repo_id="Lightricks/LTX-Video",
-            filename=spatial_upscaler_model_name_or_path,
-            repo_type="model",
-        )
-    else:
-        spatial_upscaler_model_path = spatial_upscaler_model_name_or_path
 
+
+def _validate_conditioning(config: InferenceConfig):
     conditioning_media_paths = config.conditioning_media_paths
     conditioning_strengths = config.conditioning_strengths
     conditioning_start_frames = config.conditioning_start_frames
@@ -440,43 +732,23 @@ def infer(config: InferenceConfig):
             raise ValueError(
                 f"All conditioning start frames must be between 0 and {config.num_frames-1}"
             )
+    return conditioning_media_paths, conditioning_strengths, conditioning_start_frames
 
-    seed_everething(config.seed)
-    if config.offload_to_cpu and not torch.cuda.is_available():
-        logger.warning(
-            "offload_to_cpu is set to True, but offloading will not occur since the model is already running on CPU."
-        )
-        offload_to_cpu = False
-    else:
-        offload_to_cpu = config.offload_to_cpu and get_total_gpu_memory() < 30
-
-    output_dir = (
-        Path(config.output_path)
-        if config.output_path
-        else Path(f"outputs/{datetime.today().strftime('%Y-%m-%d')}")
-    )
-    output_dir.mkdir(parents=True, exist_ok=True)
 
+def _padded_dimensions(config: InferenceConfig) -> tuple[int, int, int]:
     # Adjust dimensions to be divisible by 32 and num_frames to be (N * 8 + 1)
     height_padded = ((config.height - 1) // 32 + 1) * 32
     width_padded = ((config.width - 1) // 32 + 1) * 32
     num_frames_padded = ((config.num_frames - 2) // 8 + 1) * 8 + 1
+    return height_padded, width_padded, num_frames_padded
 
-    padding = calculate_padding(
-        config.height, config.width, height_padded, width_padded
-    )
-
-    logger.warning(
-        f"Padded dimensions: {height_padded}x{width_padded}x{num_frames_padded}"
-    )
-
-    device = get_device()
 
+def _should_enhance_prompt(prompt: str, pipeline_config: dict) -> bool:
     prompt_enhancement_words_threshold = pipeline_config[
         "prompt_enhancement_words_threshold"
     ]
 
-    prompt_word_count = len(config.prompt.split())
+    prompt_word_count = len(prompt.split())
     enhance_prompt = (
         prompt_enhancement_words_threshold > 0
         and prompt_word_count < prompt_enhancement_words_threshold
@@ -486,139 +758,132 @@ def infer(config: InferenceConfig):
         logger.info(
             f"Prompt has {prompt_word_count} words, which exceeds the threshold of {prompt_enhancement_words_threshold}. Prompt enhancement disabled."
         )
+    return enhance_prompt
 
-    precision = pipeline_config["precision"]
-    text_encoder_model_name_or_path = pipeline_config["text_encoder_model_name_or_path"]
-    sampler = pipeline_config.get("sampler", None)
-    prompt_enhancer_image_caption_model_name_or_path = pipeline_config[
-        "prompt_enhancer_image_caption_model_name_or_path"
-    ]
-    prompt_enhancer_llm_model_name_or_path = pipeline_config[
-        "prompt_enhancer_llm_model_name_or_path"
-    ]
-
-    pipeline = create_ltx_video_pipeline(
-        ckpt_path=ltxv_model_path,
-        precision=precision,
-        text_encoder_model_name_or_path=text_encoder_model_name_or_path,
-        sampler=sampler,
-        device=device,
-        enhance_prompt=enhance_prompt,
-        prompt_enhancer_image_caption_model_name_or_path=prompt_enhancer_image_caption_model_name_or_path,
-        prompt_enhancer_llm_model_name_or_path=prompt_enhancer_llm_model_name_or_path,
-    )
 
-    if pipeline_config.get("pipeline_type", None) == "multi-scale":
-        if not spatial_upscaler_model_path:
-            raise ValueError(
-                "spatial upscaler model path is missing from pipeline config file and is required for multi-scale rendering"
-            )
-        latent_upsampler = create_latent_upsampler(
-            spatial_upscaler_model_path, pipeline.device
-        )
-        pipeline = LTXMultiScalePipeline(pipeline, latent_upsampler=latent_upsampler)
-
-    media_item = None
-    if config.input_media_path:
-        media_item = load_media_file(
-            media_path=config.input_media_path,
-            height=config.height,
-            width=config.width,
-            max_frames=num_frames_padded,
-            padding=padding,
+def _should_offload_to_cpu(config: InferenceConfig) -> bool:
+    if config.offload_to_cpu and not torch.cuda.is_available():
+        logger.warning(
+            "offload_to_cpu is set to True, but offloading will not occur since the model is already running on CPU."
         )
+        return False
+    return config.offload_to_cpu and get_total_gpu_memory() < 30
 
-    conditioning_items = (
-        prepare_conditioning(
-            conditioning_media_paths=conditioning_media_paths,
-            conditioning_strengths=conditioning_strengths,
-            conditioning_start_frames=conditioning_start_frames,
-            height=config.height,
-            width=config.width,
-            num_frames=config.num_frames,
-            padding=padding,
-            pipeline=pipeline,
-        )
-        if conditioning_media_paths
-        else None
-    )
 
-    stg_mode = pipeline_config.get("stg_mode", "attention_values")
-    del pipeline_config["stg_mode"]
+def get_skip_layer_strategy(stg_mode: str) -> SkipLayerStrategy:
     if stg_mode.lower() == "stg_av" or stg_mode.lower() == "attention_values":
-        skip_layer_strategy = SkipLayerStrategy.AttentionValues
+        return SkipLayerStrategy.AttentionValues
     elif stg_mode.lower() == "stg_as" or stg_mode.lower() == "attention_skip":
-        skip_layer_strategy = SkipLayerStrategy.AttentionSkip
+        return SkipLayerStrategy.AttentionSkip
     elif stg_mode.lower() == "stg_r" or stg_mode.lower() == "residual":
-        skip_layer_strategy = SkipLayerStrategy.Residual
+        return SkipLayerStrategy.Residual
     elif stg_mode.lower() == "stg_t" or stg_mode.lower() == "transformer_block":
-        skip_layer_strategy = SkipLayerStrategy.TransformerBlock
+        return SkipLayerStrategy.TransformerBlock
     else:
         raise ValueError(f"Invalid spatiotemporal guidance mode: {stg_mode}")
 
-    # Prepare input for the pipeline
-    sample = {
-        "prompt": config.prompt,
-        "prompt_attention_mask": None,
-        "negative_prompt": config.negative_prompt,
-        "negative_prompt_attention_mask": None,
-    }
-
-    generator = torch.Generator(device=device).manual_seed(config.seed)
 
-    images = pipeline(
-        **pipeline_config,
-        skip_layer_strategy=skip_layer_strategy,
-        generator=generator,
-        output_type="pt",
-        callback_on_step_end=None,
-        height=height_padded,
-        width=width_padded,
-        num_frames=num_frames_padded,
-        frame_rate=config.frame_rate,
-        **sample,
-        media_items=media_item,
-        conditioning_items=conditioning_items,
-        is_video=True,
-        vae_per_channel_normalize=True,
-        image_cond_noise_scale=config.image_cond_noise_scale,
-        mixed_precision=(precision == "mixed_precision"),
-        offload_to_cpu=offload_to_cpu,
+def _get_pipeline(
+    config: InferenceConfig,
+    pipeline_config: dict,
+    device: str,
+    enhance_prompt: bool,
+    pipeline_registry=None,
+):
+    if pipeline_registry is not None:
+        return pipeline_registry.get(
+            pipeline_config, device=device, enhance_prompt=enhance_prompt
+        )
+    return create_pipeline_from_config(
+        pipeline_config,
         device=device,
         enhance_prompt=enhance_prompt,
-    ).images
+        prompt_embedding_cache=(
+            PromptEmbeddingCache(cache_dir=config.prompt_embedding_cache_dir)
+            if config.prompt_embedding_cache_dir
+            else None
+        ),
+    )
 
-    # Crop the padded images to the desired resolution and number of frames
+
+def _batch_media_items(media_items: List[Optional[torch.Tensor]]):
+    if media_items[0] is None:
+        return None
+    return torch.cat(media_items, dim=0)
+
+
+def _batch_conditioning_items(
+    conditioning_items: List[Optional[List[ConditioningItem]]],
+) -> Optional[List[ConditioningItem]]:
+    """Merges the per-job conditioning items of a batch into items with one media entry per job."""
+    if conditioning_items[0] is None:
+        return None
+    return [
+        ConditioningItem(
+            torch.cat([items[k].media_item for items in conditioning_items], dim=0),
+            conditioning_items[0][k].media_frame_number,
+            conditioning_items[0][k].conditioning_strength,
+        )
+        for k in range(len(conditioning_items[0]))
+    ]
+
+
+def _output_dir(config: InferenceConfig) -> Path:
+    output_dir = (
+        Path(config.output_path)
+        if config.output_path
+        else Path(f"outputs/{datetime.today().strftime('%Y-%m-%d')}")
+    )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def _crop_padding(
+    images: torch.Tensor, padding: tuple[int, int, int, int]
+) -> torch.Tensor:
+    """Crops the padding off the last two (height, width) dimensions."""
     (pad_left, pad_right, pad_top, pad_bottom) = padding
     pad_bottom = -pad_bottom
     pad_right = -pad_right
     if pad_bottom == 0:
-        pad_bottom = images.shape[3]
+        pad_bottom = images.shape[-2]
     if pad_right == 0:
-        pad_right = images.shape[4]
-    images = images[:, :, : config.num_frames, pad_top:pad_bottom, pad_left:pad_right]
+        pad_right = images.shape[-1]
+    return images[..., pad_top:pad_bottom, pad_left:pad_right]
+
+
+def _save_outputs(
+    images: torch.Tensor,
+    config: InferenceConfig,
+    padding: tuple[int, int, int, int],
+    output_index: int = 0,
+) -> List[Path]:
+    output_dir = _output_dir(config)
 
+    # Crop the padded images to the desired resolution and number of frames
+    images = _crop_padding(images[:, :, : config.num_frames], padding)
+
+    output_filenames = []
     for i in range(images.shape[0]):
-        # Gathering from B, C, F, H, W to C, F, H, W and then permuting to F, H, W, C
-        video_np = images[i].permute(1, 2, 3, 0).cpu().float().numpy()
-        # Unnormalizing images to [0, 255] range
-        video_np = (video_np * 255).astype(np.uint8)
+        # Frames are converted to uint8 on the device and copied to the host chunk by chunk
         fps = config.frame_rate
-        height, width = video_np.shape[1:3]
+        height, width = images.shape[3:5]
         # In case a single image is generated
-        if video_np.shape[0] == 1:
+        if images.shape[2] == 1:
             output_filename = get_unique_filename(
-                f"image_output_{i}",
+                f"image_output_{output_index + i}",
                 ".png",
                 prompt=config.prompt,
                 seed=config.seed,
                 resolution=(height, width, config.num_frames),
                 dir=output_dir,
             )
-            imageio.imwrite(output_filename, video_np[0])
+            imageio.imwrite(
+                output_filename, to_uint8_frames(images[i])[0].cpu().numpy()
+            )
         else:
             output_filename = get_unique_filename(
-                f"video_output_{i}",
+                f"video_output_{output_index + i}",
                 ".mp4",
                 prompt=config.prompt,
                 seed=config.seed,
@@ -626,12 +891,460 @@ def infer(config: InferenceConfig):
                 dir=output_dir,
             )
 
-            # Write video
-            with imageio.get_writer(output_filename, fps=fps) as video:
-                for frame in video_np:
-                    video.append_data(frame)
+            # Write video, encoding on a background thread
+            write_video(images[i], output_filename, fps=fps)
 
         logger.warning(f"Output saved to {output_filename}")
+        output_filenames.append(output_filename)
+
+    return output_filenames
+
+
+def _save_video_stream(
+    chunks: Iterable[torch.Tensor],
+    configs: List[InferenceConfig],
+    paddings: List[tuple[int, int, int, int]],
+    output_indices: List[int],
+) -> List[List[Path]]:
+    """
+    Writes the videos of a batch from its decoded frame chunks.
+
+    Each chunk is handed to the encoding threads as soon as it is decoded, so a chunk is encoded while
+    the next one is being decoded, and the whole decoded video is never held in memory.
+    """
+    output_filenames = [
+        get_unique_filename(
+            f"video_output_{output_index}",
+            ".mp4",
+            prompt=config.prompt,
+            seed=config.seed,
+            resolution=(config.height, config.width, config.num_frames),
+            dir=_output_dir(config),
+        )
+        for config, output_index in zip(configs, output_indices)
+    ]
+    with ExitStack() as stack:
+        writers = [
+            stack.enter_context(
+                BackgroundVideoWriter(output_filename, fps=config.frame_rate)
+            )
+            for config, output_filename in zip(configs, output_filenames)
+        ]
+        start_frame = 0
+        for chunk in chunks:
+            for i, (config, padding, writer) in enumerate(
+                zip(configs, paddings, writers)
+            ):
+                # Crop the padded frames to the desired resolution and number of frames
+                frames = chunk[i, :, : max(config.num_frames - start_frame, 0)]
+                if frames.shape[1] > 0:
+                    writer.write(to_uint8_frames(_crop_padding(frames, padding)).cpu())
+            start_frame += chunk.shape[2]
+
+    for output_filename in output_filenames:
+        logger.warning(f"Output saved to {output_filename}")
+    return [[output_filename] for output_filename in output_filenames]
+
+
+def _run_batch(
+    pipeline,
+    pipeline_config: dict,
+    configs: List[InferenceConfig],
+    device: str,
+    enhance_prompt: bool,
+    output_indices: Optional[List[int]] = None,
+    profiler: Optional[StageProfiler] = None,
+    preview_callback: Optional[Callable[[int, torch.Tensor], None]] = None,
+    cancellation_token: Optional[CancellationToken] = None,
+) -> List[List[Path]]:
+    """Runs jobs that share their latent shape and pipeline settings in one pipeline call."""
+    first = configs[0]
+    height_padded, width_padded, num_frames_padded = _padded_dimensions(first)
+    logger.warning(
+        f"Padded dimensions: {height_padded}x{width_padded}x{num_frames_padded}"
+    )
+
+    paddings, media_items, conditioning_items = [], [], []
+    media_stage = profiler.begin("load_media") if profiler is not None else None
+    for config in configs:
+        padding = calculate_padding(
+            config.height, config.width, height_padded, width_padded
+        )
+        paddings.append(padding)
+        media_items.append(
+            load_media_file(
+                media_path=config.input_media_path,
+                height=config.height,
+                width=config.width,
+                max_frames=num_frames_padded,
+                padding=padding,
+            )
+            if config.input_media_path
+            else None
+        )
+        (
+            conditioning_media_paths,
+            conditioning_strengths,
+            conditioning_start_frames,
+        ) = _validate_conditioning(config)
+        conditioning_items.append(
+            prepare_conditioning(
+                conditioning_media_paths=conditioning_media_paths,
+                conditioning_strengths=conditioning_strengths,
+                conditioning_start_frames=conditioning_start_frames,
+                height=config.height,
+                width=config.width,
+                num_frames=config.num_frames,
+                padding=padding,
+                pipeline=pipeline,
+            )
+            if conditioning_media_paths
+            else None
+        )
+    if media_stage is not None:
+        profiler.end(media_stage)
+
+    # The YAML settings are passed as keyword arguments, minus the ones handled here
+    call_kwargs = {k: v for k, v in pipeline_config.items() if k != "stg_mode"}
+    if first.vae_decode_memory_budget_gb:
+        call_kwargs["vae_decode_memory_budget_gb"] = first.vae_decode_memory_budget_gb
+    # A single frame is saved as an image rather than streamed to a video encoder
+    stream_frames = bool(first.vae_decode_chunk_size) and num_frames_padded > 1
+    if stream_frames:
+        call_kwargs["vae_decode_chunk_size"] = first.vae_decode_chunk_size
+    skip_layer_strategy = get_skip_layer_strategy(
+        pipeline_config.get("stg_mode", "attention_values")
+    )
+
+    seed_everething(first.seed)
+    generators = [
+        torch.Generator(device=device).manual_seed(config.seed) for config in configs
+    ]
+
+    # Prepare input for the pipeline
+    if len(configs) == 1:
+        sample = {
+            "prompt": first.prompt,
+            "prompt_attention_mask": None,
+            "negative_prompt": first.negative_prompt,
+            "negative_prompt_attention_mask": None,
+        }
+        generator = generators[0]
+    else:
+        sample = {
+            "prompt": [config.prompt for config in configs],
+            "prompt_attention_mask": None,
+            "negative_prompt": [config.negative_prompt for config in configs],
+            "negative_prompt_attention_mask": None,
+        }
+        generator = generators
+
+    images = pipeline(
+        **call_kwargs,
+        profiler=profiler,
+        preview_callback=preview_callback,
+        preview_every_n_steps=first.preview_every_n_steps,
+        cancellation_token=cancellation_token,
+        skip_layer_strategy=skip_layer_strategy,
+        generator=generator,
+        output_type="pt",
+        callback_on_step_end=None,
+        height=height_padded,
+        width=width_padded,
+        num_frames=num_frames_padded,
+        frame_rate=first.frame_rate,
+        **sample,
+        media_items=_batch_media_items(media_items),
+        conditioning_items=_batch_conditioning_items(conditioning_items),
+        is_video=True,
+        vae_per_channel_normalize=True,
+        image_cond_noise_scale=first.image_cond_noise_scale,
+        mixed_precision=(pipeline_config["precision"] == "mixed_precision"),
+        offload_to_cpu=_should_offload_to_cpu(first),
+        device=device,
+        enhance_prompt=enhance_prompt,
+    ).images
+
+    output_indices = output_indices or [0] * len(configs)
+    with profile_stage(profiler, "video_write"):
+        if stream_frames:
+            # The frames are decoded as the writers consume them
+            return _save_video_stream(images, configs, paddings, output_indices)
+        return [
+            _save_outputs(images[i : i + 1], config, padding, output_index)
+            for i, (config, padding, output_index) in enumerate(
+                zip(configs, paddings, output_indices)
+            )
+        ]
+
+
+def infer(
+    config: InferenceConfig,
+    pipeline_registry=None,
+    profiler: Optional[StageProfiler] = None,
+    preview_callback: Optional[Callable[[int, torch.Tensor], None]] = None,
+    cancellation_token: Optional[CancellationToken] = None,
+) -> List[Path]:
+    """Run a single generation and return the paths of the written outputs.
+
+    When `config.manifest_path` is set, every job of the manifest is run
+    instead (see `infer_manifest`) and all their outputs are returned.
+    `infer` does not modify the loaded pipeline config, so it can be called
+    repeatedly in one process. With `config.result_cache_dir` set, a request
+    identical to an earlier one returns the stored video without running the
+    pipeline.
+
+    Args:
+        config: The inference settings
+        pipeline_registry: Optional `PipelineRegistry` to take an already loaded
+            pipeline from. When omitted, the pipeline is built from scratch and
+            dropped when the call returns.
+        profiler: Optional `StageProfiler` recording the time and memory of each
+            stage, e.g. with custom sinks. One is created when `config.trace_path`
+            is set, and the trace is written there when the call returns.
+        preview_callback: Optional callable receiving `(step, frames)` every
+            `config.preview_every_n_steps` denoising steps, with uint8 RGB frames
+            projected from the latents (see the `preview_callback` argument of
+            `LTXVideoPipeline`).
+        cancellation_token: Optional `CancellationToken` checked between denoising
+            steps. Cancelling it stops the run with `GenerationCancelled`.
+    """
+    if config.manifest_path:
+        return [
+            path
+            for paths in infer_manifest(
+                config,
+                pipeline_registry=pipeline_registry,
+                profiler=profiler,
+                preview_callback=preview_callback,
+                cancellation_token=cancellation_token,
+            )
+            for path in paths
+        ]
+    if not config.prompt:
+        raise ValueError("`prompt` is required unless `manifest_path` is given")
+
+    pipeline_config = load_pipeline_config(config.pipeline_config)
+    _validate_conditioning(config)
+    device = config.device or get_device()
+    enhance_prompt = _should_enhance_prompt(config.prompt, pipeline_config)
+
+    result_cache, result_key = _result_cache_lookup(
+        config, pipeline_config, enhance_prompt, device
+    )
+    if result_cache is not None:
+        cached = result_cache.get(result_key)
+        if cached is not None:
+            logger.warning(f"Returning cached result {cached}")
+            return cached
+
+    profiler = _make_profiler(config, device, profiler)
+    with profile_stage(profiler, "load_pipeline"):
+        pipeline = _get_pipeline(
+            config, pipeline_config, device, enhance_prompt, pipeline_registry
+        )
+    output_filenames = _run_batch(
+        pipeline,
+        pipeline_config,
+        [config],
+        device,
+        enhance_prompt,
+        profiler=profiler,
+        preview_callback=preview_callback,
+        cancellation_token=cancellation_token,
+    )[0]
+    if result_cache is not None:
+        result_cache.put(result_key, output_filenames)
+    _save_trace(config, profiler)
+    return output_filenames
+
+
+def _make_profiler(
+    config: InferenceConfig, device: str, profiler: Optional[StageProfiler]
+) -> Optional[StageProfiler]:
+    if profiler is None and config.trace_path:
+        profiler = StageProfiler(device)
+    return profiler
+
+
+def _save_trace(config: InferenceConfig, profiler: Optional[StageProfiler]):
+    if profiler is None or not config.trace_path:
+        return
+    profiler.save(config.trace_path)
+    logger.warning(f"Stage trace saved to {config.trace_path}")
+
+
+def _result_cache_lookup(
+    config: InferenceConfig, pipeline_config: dict, enhance_prompt: bool, device: str
+):
+    """Returns the result store configured for the job and the job's key in it."""
+    # The enhanced prompt is sampled from an LLM, so an enhanced generation is not
+    # reproducible and cannot be served from the store
+    if not config.result_cache_dir or enhance_prompt:
+        return None, None
+    result_cache = ResultCache(
+        config.result_cache_dir, max_bytes=int(config.result_cache_max_gb * 1024**3)
+    )
+    return result_cache, result_cache.make_key(config, pipeline_config, device)
+
+
+def get_cached_result(config: InferenceConfig) -> Optional[List[Path]]:
+    """Returns the stored outputs for `config` if its result store has them, without loading a pipeline."""
+    pipeline_config = load_pipeline_config(config.pipeline_config)
+    enhance_prompt = _should_enhance_prompt(config.prompt, pipeline_config)
+    result_cache, result_key = _result_cache_lookup(
+        config, pipeline_config, enhance_prompt, config.device or get_device()
+    )
+    return result_cache.get(result_key) if result_cache is not None else None
+
+
+def read_manifest(
+    manifest_path: str, base_config: InferenceConfig
+) -> List[InferenceConfig]:
+    """Reads a JSONL manifest into one `InferenceConfig` per job.
+
+    Every line is a JSON object whose keys are `InferenceConfig` fields (for
+    example `prompt`, `seed`, `height`, `width`, `num_frames`,
+    `conditioning_media_paths`, `conditioning_start_frames`). Fields a job
+    leaves out are taken from `base_config`.
+    """
+    allowed = {f.name for f in fields(InferenceConfig)} - {
+        "manifest_path",
+        "max_batch_size",
+    }
+    configs = []
+    with open(manifest_path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            unknown = set(job) - allowed
+            if unknown:
+                raise ValueError(
+                    f"{manifest_path}:{line_number}: unknown job fields {sorted(unknown)}"
+                )
+            config = replace(base_config, manifest_path=None, **job)
+            if not config.prompt:
+                raise ValueError(f"{manifest_path}:{line_number}: missing `prompt`")
+            _validate_conditioning(config)
+            configs.append(config)
+    return configs
+
+
+def _batch_key(config: InferenceConfig, enhance_prompt: bool):
+    """Jobs with equal keys have the same latent shape and guidance schedule and can share a batch."""
+    # Media are stacked along the batch dimension, so their frame counts must match too
+    input_media = None
+    if config.input_media_path:
+        input_media = min(
+            get_media_num_frames(config.input_media_path),
+            _padded_dimensions(config)[2],
+        )
+    conditioning = None
+    if config.conditioning_media_paths:
+        _, strengths, start_frames = _validate_conditioning(config)
+        # Conditioning videos are trimmed to fit `num_frames`
+        conditioning = (config.num_frames,) + tuple(
+            (start_frame, strength, get_media_num_frames(path))
+            for path, strength, start_frame in zip(
+                config.conditioning_media_paths, strengths, start_frames
+            )
+        )
+    return (
+        config.pipeline_config,
+        config.device,
+        enhance_prompt,
+        _padded_dimensions(config),
+        config.frame_rate,
+        config.image_cond_noise_scale,
+        config.offload_to_cpu,
+        config.vae_decode_memory_budget_gb,
+        config.vae_decode_chunk_size,
+        input_media,
+        conditioning,
+    )
+
+
+def infer_manifest(
+    config: InferenceConfig,
+    pipeline_registry=None,
+    profiler: Optional[StageProfiler] = None,
+    preview_callback: Optional[Callable[[int, torch.Tensor], None]] = None,
+    cancellation_token: Optional[CancellationToken] = None,
+) -> List[List[Path]]:
+    """Run every job of the JSONL manifest at `config.manifest_path`.
+
+    Each pipeline is loaded once for the whole manifest. Jobs with the same
+    latent shape, conditioning layout and pipeline settings are rendered
+    together, up to `config.max_batch_size` per pipeline call, and their
+    outputs are written as soon as their batch finishes. Jobs found in the
+    result store are not rendered again. Previews and cancellation work as in
+    `infer`; a cancelled manifest keeps the outputs of its finished batches.
+
+    Returns:
+        The output paths of each job, in manifest order.
+    """
+    configs = read_manifest(config.manifest_path, config)
+    pipeline_configs = {}
+    groups = {}
+    outputs: List[List[Path]] = [[] for _ in configs]
+    result_keys = {}
+    for index, job in enumerate(configs):
+        if job.pipeline_config not in pipeline_configs:
+            pipeline_configs[job.pipeline_config] = load_pipeline_config(
+                job.pipeline_config
+            )
+        enhance_prompt = _should_enhance_prompt(
+            job.prompt, pipeline_configs[job.pipeline_config]
+        )
+        result_cache, result_key = _result_cache_lookup(
+            job,
+            pipeline_configs[job.pipeline_config],
+            enhance_prompt,
+            job.device or get_device(),
+        )
+        cached = result_cache.get(result_key) if result_cache is not None else None
+        if cached is not None:
+            logger.warning(f"Manifest job {index}: returning cached result {cached}")
+            outputs[index] = cached
+            continue
+        result_keys[index] = (result_cache, result_key)
+        groups.setdefault(_batch_key(job, enhance_prompt), []).append(index)
+
+    profiler = _make_profiler(config, config.device or get_device(), profiler)
+    pipelines = {}
+    for key, indices in groups.items():
+        job = configs[indices[0]]
+        pipeline_config = pipeline_configs[job.pipeline_config]
+        device = job.device or get_device()
+        enhance_prompt = key[2]
+        pipeline_key = (job.pipeline_config, device, enhance_prompt)
+        if pipeline_key not in pipelines:
+            with profile_stage(profiler, "load_pipeline"):
+                pipelines[pipeline_key] = _get_pipeline(
+                    job, pipeline_config, device, enhance_prompt, pipeline_registry
+                )
+        for start in range(0, len(indices), max(1, config.max_batch_size)):
+            batch = indices[start : start + max(1, config.max_batch_size)]
+            logger.warning(f"Rendering manifest jobs {batch}")
+            batch_outputs = _run_batch(
+                pipelines[pipeline_key],
+                pipeline_config,
+                [configs[i] for i in batch],
+                device,
+                enhance_prompt,
+                output_indices=batch,
+                profiler=profiler,
+                preview_callback=preview_callback,
+                cancellation_token=cancellation_token,
+            )
+            for i, paths in zip(batch, batch_outputs):
+                outputs[i] = paths
+                result_cache, result_key = result_keys[i]
+                if result_cache is not None:
+                    result_cache.put(result_key, paths)
+    _save_trace(config, profiler)
+    return outputs
 
 
 def prepare_conditioning(
@@ -688,14 +1401,9 @@ def prepare_conditioning(
 
 
 def get_media_num_frames(media_path: str) -> int:
-    is_video = any(
-        media_path.lower().endswith(ext) for ext in [".mp4", ".avi", ".mov", ".mkv"]
-    )
     num_frames = 1
-    if is_video:
-        reader = imageio.get_reader(media_path)
-        num_frames = reader.count_frames()
-        reader.close()
+    if is_video_file(media_path):
+        num_frames = count_video_frames(media_path)
     return num_frames
 
 
@@ -707,26 +1415,20 @@ def load_media_file(
     padding: tuple[int, int, int, int],
     just_crop: bool = False,
 ) -> torch.Tensor:
-    is_video = any(
-        media_path.lower().endswith(ext) for ext in [".mp4", ".avi", ".mov", ".mkv"]
-    )
-    if is_video:
-        reader = imageio.get_reader(media_path)
-        num_input_frames = min(reader.count_frames(), max_frames)
-
-        # Read and preprocess the relevant frames from the video file.
-        frames = []
-        for i in range(num_input_frames):
-            frame = Image.fromarray(reader.get_data(i))
-            frame_tensor = load_image_to_tensor_with_resize_and_crop(
-                frame, height, width, just_crop=just_crop
+    if is_video_file(media_path):
+        # Decode only the frames that are used and preprocess them batch by batch.
+        chunks = [
+            torch.nn.functional.pad(
+                load_frames_to_tensor_with_resize_and_crop(
+                    frames, height, width, just_crop=just_crop
+                ),
+                padding,
             )
-            frame_tensor = torch.nn.functional.pad(frame_tensor, padding)
-            frames.append(frame_tensor)
-        reader.close()
+            for frames in iter_video_frames(media_path, max_frames=max_frames)
+        ]
 
         # Stack frames along the temporal dimension
-        media_tensor = torch.cat(frames, dim=2)
+        media_tensor = torch.cat(chunks, dim=2)
     else:  # Input image
         media_tensor = load_image_to_tensor_with_resize_and_crop(
             media_path, height, width, just_crop=just_crop
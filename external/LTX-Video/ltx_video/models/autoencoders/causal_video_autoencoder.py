@@ -20,6 +20,7 @@ from ltx_video.models.autoencoders.pixel_norm import PixelNorm
 from ltx_video.models.autoencoders.pixel_shuffle import PixelShuffleND
 from ltx_video.models.autoencoders.vae import AutoencoderKLWrapper
 from ltx_video.models.transformers.attention import Attention
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
 from ltx_video.utils.diffusers_config_mapping import (
     diffusers_and_ours_config_mapping,
     make_hashable_key,
@@ -103,15 +104,10 @@ class CausalVideoAutoencoder(AutoencoderKLWrapper):
         elif pretrained_model_name_or_path.is_file() and str(
             pretrained_model_name_or_path
         ).endswith(".safetensors"):
-            state_dict = {}
-            with safe_open(
-                pretrained_model_name_or_path, framework="pt", device="cpu"
-            ) as f:
-                metadata = f.metadata()
-                for k in f.keys():
-                    state_dict[k] = f.get_tensor(k)
-            configs = json.loads(metadata["config"])
-            config = configs["vae"]
+            return cls.from_checkpoint(
+                SafetensorsCheckpoint(pretrained_model_name_or_path),
+                dtype=kwargs.get("torch_dtype"),
+            )
 
         video_vae = cls.from_config(config)
         if "torch_dtype" in kwargs:
@@ -119,6 +115,26 @@ class CausalVideoAutoencoder(AutoencoderKLWrapper):
         video_vae.load_state_dict(state_dict)
         return video_vae
 
+    @classmethod
+    def from_checkpoint(
+        cls,
+        checkpoint: SafetensorsCheckpoint,
+        device: Optional[Union[str, torch.device]] = None,
+        dtype: Optional[torch.dtype] = None,
+    ):
+        """Builds the VAE of a single-file checkpoint on the meta device and loads its
+        weights directly on `device`, with floating point weights cast to `dtype`.
+        """
+        prefix = "vae."
+        if not any(key.startswith(prefix) for key in checkpoint.keys()):
+            prefix = ""
+        with torch.device("meta"):
+            video_vae = cls.from_config(checkpoint.configs["vae"])
+        video_vae.load_state_dict(
+            checkpoint.state_dict(prefix, device=device, dtype=dtype), assign=True
+        )
+        return video_vae
+
     @staticmethod
     def from_config(config):
         assert (
@@ -245,7 +261,9 @@ class CausalVideoAutoencoder(AutoencoderKLWrapper):
 
         return json.dumps(self.config.__dict__)
 
-    def load_state_dict(self, state_dict: Mapping[str, Any], strict: bool = True):
+    def load_state_dict(
+        self, state_dict: Mapping[str, Any], strict: bool = True, assign: bool = False
+    ):
         if any([key.startswith("vae.") for key in state_dict.keys()]):
             state_dict = {
                 key.replace("vae.", ""): value
@@ -279,7 +297,7 @@ class CausalVideoAutoencoder(AutoencoderKLWrapper):
 
             converted_state_dict[key] = value
 
-        super().load_state_dict(converted_state_dict, strict=strict)
+        super().load_state_dict(converted_state_dict, strict=strict, assign=assign)
 
         data_dict = {
             key.removeprefix(PER_CHANNEL_STATISTICS_PREFIX): value
@@ -1,15 +1,14 @@
 from typing import Optional, Union
 from pathlib import Path
 import os
-import json
 
 import torch
 import torch.nn as nn
 from einops import rearrange
 from diffusers import ConfigMixin, ModelMixin
-from safetensors.torch import safe_open
 
 from ltx_video.models.autoencoders.pixel_shuffle import PixelShuffleND
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
 
 
 class ResBlock(nn.Module):
@@ -181,15 +180,12 @@ class LatentUpsampler(ModelMixin, ConfigMixin):
         if pretrained_model_path.is_file() and str(pretrained_model_path).endswith(
             ".safetensors"
         ):
-            state_dict = {}
-            with safe_open(pretrained_model_path, framework="pt", device="cpu") as f:
-                metadata = f.metadata()
-                for k in f.keys():
-                    state_dict[k] = f.get_tensor(k)
-            config = json.loads(metadata["config"])
+            checkpoint = SafetensorsCheckpoint(pretrained_model_path)
             with torch.device("meta"):
-                latent_upsampler = LatentUpsampler.from_config(config)
-            latent_upsampler.load_state_dict(state_dict, assign=True)
+                latent_upsampler = LatentUpsampler.from_config(checkpoint.configs)
+            latent_upsampler.load_state_dict(
+                checkpoint.state_dict(device=kwargs.get("device")), assign=True
+            )
         return latent_upsampler
 
 
@@ -0,0 +1,287 @@
+from typing import Optional
+
+import numpy as np
+import torch
+from torch import nn
+
+from ltx_video.models.autoencoders.causal_conv3d import CausalConv3d
+from ltx_video.models.autoencoders.causal_video_autoencoder import (
+    CausalVideoAutoencoder,
+    DepthToSpaceUpsample,
+    LayerNorm,
+    ResnetBlock3D,
+    UNetMidBlock3D,
+    unpatchify,
+)
+from ltx_video.models.autoencoders.pixel_norm import PixelNorm
+
+
+def _num_frames(x: Optional[torch.Tensor]) -> int:
+    return 0 if x is None else x.shape[2]
+
+
+def _cat_frames(a: Optional[torch.Tensor], b: Optional[torch.Tensor]):
+    if a is None or _num_frames(a) == 0:
+        return b
+    if b is None or _num_frames(b) == 0:
+        return a
+    return torch.cat([a, b], dim=2)
+
+
+def _check_frame_local_norm(norm: nn.Module):
+    if not isinstance(norm, (PixelNorm, LayerNorm, nn.Identity)):
+        raise ValueError(
+            f"Streaming decode needs per-frame normalization, got {type(norm).__name__}"
+        )
+
+
+class _FrameQueue:
+    """FIFO of frames used to line up a residual branch with a delayed main branch."""
+
+    def __init__(self, drop_first: int = 0):
+        self.frames = None
+        self.drop_first = drop_first
+
+    def push(self, x: torch.Tensor):
+        if self.drop_first:
+            dropped = min(self.drop_first, _num_frames(x))
+            x = x[:, :, dropped:]
+            self.drop_first -= dropped
+        self.frames = _cat_frames(self.frames, x)
+
+    def pop(self, n: int) -> torch.Tensor:
+        out, self.frames = self.frames[:, :, :n], self.frames[:, :, n:]
+        return out
+
+
+class _CausalConvStream:
+    """
+    Streaming counterpart of `CausalConv3d.forward`.
+
+    Keeps the last `time_kernel_size - 1` input frames between chunks. The first chunk is padded with
+    repeats of the first frame exactly like the full-sequence forward. For non-causal convolutions the
+    output lags the input by half the kernel, and the matching repeats of the last frame are added when
+    the final chunk arrives.
+    """
+
+    def __init__(self, conv: CausalConv3d, causal: bool):
+        if not isinstance(conv, CausalConv3d):
+            raise ValueError(f"Streaming decode expects CausalConv3d, got {type(conv)}")
+        self.conv = conv
+        self.causal = causal
+        self.context = (conv.time_kernel_size - 1) * conv.conv.dilation[0]
+        self.cache = None
+        self.started = False
+
+    def __call__(self, x: torch.Tensor, is_last: bool) -> torch.Tensor:
+        front_pad = self.context if self.causal else self.context // 2
+        if not self.started and _num_frames(x) > 0:
+            x = torch.cat([x[:, :, :1].repeat(1, 1, front_pad, 1, 1), x], dim=2)
+            self.started = True
+        x = _cat_frames(self.cache, x)
+        if is_last and not self.causal and _num_frames(x) > 0:
+            x = torch.cat([x, x[:, :, -1:].repeat(1, 1, self.context // 2, 1, 1)], 2)
+
+        num_out = _num_frames(x) - self.context
+        if num_out <= 0:
+            self.cache = x
+            batch_size, _, _, height, width = x.shape
+            return x.new_zeros(batch_size, self.conv.out_channels, 0, height, width)
+        self.cache = x[:, :, num_out:]
+        return self.conv.conv(x)
+
+
+class _ResnetStream:
+    def __init__(self, block: ResnetBlock3D, causal: bool):
+        _check_frame_local_norm(block.norm1)
+        _check_frame_local_norm(block.norm2)
+        self.block = block
+        self.conv1 = _CausalConvStream(block.conv1, causal)
+        self.conv2 = _CausalConvStream(block.conv2, causal)
+        self.shortcut = _FrameQueue()
+        # The full decode draws one spatial noise map per call and broadcasts it over time
+        self.noise = {}
+
+    def _noise(self, name: str, x: torch.Tensor, per_channel_scale):
+        if name not in self.noise:
+            self.noise[name] = torch.randn(
+                x.shape[-2:], device=x.device, dtype=x.dtype
+            )[None]
+        return x + (self.noise[name] * per_channel_scale)[None, :, None, ...]
+
+    def __call__(self, x: torch.Tensor, is_last: bool, timestep=None):
+        block = self.block
+        batch_size = x.shape[0]
+        self.shortcut.push(block.conv_shortcut(block.norm3(x)))
+
+        hidden_states = block.norm1(x)
+        if block.timestep_conditioning:
+            ada_values = block.scale_shift_table[
+                None, ..., None, None, None
+            ] + timestep.reshape(
+                batch_size,
+                4,
+                -1,
+                timestep.shape[-3],
+                timestep.shape[-2],
+                timestep.shape[-1],
+            )
+            shift1, scale1, shift2, scale2 = ada_values.unbind(dim=1)
+            hidden_states = hidden_states * (1 + scale1) + shift1
+        hidden_states = block.non_linearity(hidden_states)
+        hidden_states = self.conv1(hidden_states, is_last)
+        if block.inject_noise:
+            hidden_states = self._noise(
+                "noise1", hidden_states, block.per_channel_scale1
+            )
+        hidden_states = block.norm2(hidden_states)
+        if block.timestep_conditioning:
+            hidden_states = hidden_states * (1 + scale2) + shift2
+        hidden_states = block.non_linearity(hidden_states)
+        hidden_states = block.dropout(hidden_states)
+        hidden_states = self.conv2(hidden_states, is_last)
+        if block.inject_noise:
+            hidden_states = self._noise(
+                "noise2", hidden_states, block.per_channel_scale2
+            )
+
+        return self.shortcut.pop(_num_frames(hidden_states)) + hidden_states
+
+
+class _MidBlockStream:
+    def __init__(self, block: UNetMidBlock3D, causal: bool):
+        if block.attention_blocks:
+            raise ValueError("Streaming decode does not support attention blocks")
+        self.block = block
+        self.res_blocks = [_ResnetStream(resnet, causal) for resnet in block.res_blocks]
+
+    def __call__(self, x: torch.Tensor, is_last: bool, timestep=None):
+        timestep_embed = None
+        if self.block.timestep_conditioning:
+            batch_size = x.shape[0]
+            timestep_embed = self.block.time_embedder(
+                timestep=timestep.flatten(),
+                resolution=None,
+                aspect_ratio=None,
+                batch_size=batch_size,
+                hidden_dtype=x.dtype,
+            )
+            timestep_embed = timestep_embed.view(
+                batch_size, timestep_embed.shape[-1], 1, 1, 1
+            )
+        for resnet in self.res_blocks:
+            x = resnet(x, is_last, timestep=timestep_embed)
+        return x
+
+
+class _UpsampleStream:
+    def __init__(self, block: DepthToSpaceUpsample, causal: bool):
+        self.block = block
+        self.conv = _CausalConvStream(block.conv, causal)
+        # Upsampling in time drops the first output frame of the whole sequence
+        drop_first = 1 if block.stride[0] == 2 else 0
+        self.main = _FrameQueue(drop_first)
+        self.residual = _FrameQueue(drop_first) if block.residual else None
+
+    def __call__(self, x: torch.Tensor, is_last: bool):
+        block = self.block
+        if self.residual is not None:
+            num_repeat = np.prod(block.stride) // block.out_channels_reduction_factor
+            self.residual.push(block.pixel_shuffle(x).repeat(1, num_repeat, 1, 1, 1))
+        self.main.push(block.pixel_shuffle(self.conv(x, is_last)))
+        out = self.main.pop(_num_frames(self.main.frames))
+        if self.residual is not None:
+            out = out + self.residual.pop(_num_frames(out))
+        return out
+
+
+class StreamingDecoder:
+    """
+    Stateful, chunk-by-chunk version of `CausalVideoAutoencoder.decode`.
+
+    Latent frames are fed in chunks through `decode_chunk`; every causal convolution keeps the few input
+    frames it needs from the previous chunk, so the decoded frames are the same as those of a full decode
+    while the activations only ever cover one chunk. Frames are returned as soon as they are final, which
+    for non-causal decoders lags the latents fed so far by the decoder's temporal receptive field; the remaining frames are returned
+    by the call with `is_last=True`.
+
+    Only per-frame normalization layers are supported (not group norm), and mid-blocks must not use
+    attention, since both mix information across the whole time axis.
+
+    Args:
+        vae: The autoencoder whose decoder to run.
+        timestep: Decoder timestep conditioning, required if the decoder uses it.
+    """
+
+    def __init__(self, vae: CausalVideoAutoencoder, timestep=None):
+        decoder = vae.decoder
+        _check_frame_local_norm(decoder.conv_norm_out)
+        if decoder.timestep_conditioning and timestep is None:
+            raise ValueError("should pass timestep with timestep_conditioning=True")
+
+        self.vae = vae
+        self.decoder = decoder
+        self.timestep = timestep
+        causal = decoder.causal
+        self.conv_in = _CausalConvStream(decoder.conv_in, causal)
+        self.up_blocks = []
+        for block in decoder.up_blocks:
+            if isinstance(block, UNetMidBlock3D):
+                self.up_blocks.append(_MidBlockStream(block, causal))
+            elif isinstance(block, ResnetBlock3D):
+                self.up_blocks.append(_ResnetStream(block, causal))
+            elif isinstance(block, DepthToSpaceUpsample):
+                self.up_blocks.append(_UpsampleStream(block, causal))
+            else:
+                raise ValueError(f"Streaming decode does not support {type(block)}")
+        self.conv_out = _CausalConvStream(decoder.conv_out, causal)
+
+    @torch.no_grad()
+    def decode_chunk(self, z: torch.Tensor, is_last: bool = False) -> torch.Tensor:
+        """Decodes the next chunk of latent frames, returning the pixel frames that became final."""
+        decoder = self.decoder
+        z = self.vae._unnormalize_latent_channels(z)
+        z = self.vae.post_quant_conv(z)
+
+        sample = self.conv_in(z, is_last)
+        sample = sample.to(next(iter(decoder.up_blocks.parameters())).dtype)
+
+        scaled_timestep = None
+        if decoder.timestep_conditioning:
+            scaled_timestep = self.timestep * decoder.timestep_scale_multiplier
+
+        for block in self.up_blocks:
+            if isinstance(block, _MidBlockStream):
+                sample = block(sample, is_last, timestep=scaled_timestep)
+            else:
+                sample = block(sample, is_last)
+
+        sample = decoder.conv_norm_out(sample)
+        if decoder.timestep_conditioning:
+            batch_size = sample.shape[0]
+            embedded_timestep = decoder.last_time_embedder(
+                timestep=scaled_timestep.flatten(),
+                resolution=None,
+                aspect_ratio=None,
+                batch_size=batch_size,
+                hidden_dtype=sample.dtype,
+            )
+            embedded_timestep = embedded_timestep.view(
+                batch_size, embedded_timestep.shape[-1], 1, 1, 1
+            )
+            ada_values = decoder.last_scale_shift_table[
+                None, ..., None, None, None
+            ] + embedded_timestep.reshape(
+                batch_size,
+                2,
+                -1,
+                embedded_timestep.shape[-3],
+                embedded_timestep.shape[-2],
+                embedded_timestep.shape[-1],
+            )
+            shift, scale = ada_values.unbind(dim=1)
+            sample = sample * (1 + scale) + shift
+
+        sample = decoder.conv_act(sample)
+        sample = self.conv_out(sample, is_last)
+        return unpatchify(sample, patch_size_hw=decoder.patch_size, patch_size_t=1)
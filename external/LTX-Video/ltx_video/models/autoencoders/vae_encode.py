@@ -1,13 +1,16 @@
-from typing import Tuple
+import math
+from typing import Iterator, Optional, Tuple
+import numpy as np
 import torch
 from diffusers import AutoencoderKL
 from einops import rearrange
-from torch import Tensor
+from torch import Tensor, nn
 
 
 from ltx_video.models.autoencoders.causal_video_autoencoder import (
     CausalVideoAutoencoder,
 )
+from ltx_video.models.autoencoders.streaming_decoder import StreamingDecoder
 from ltx_video.models.autoencoders.video_autoencoder import (
     Downsample3D,
     VideoAutoencoder,
@@ -98,10 +101,51 @@ def vae_decode(
     split_size: int = 1,
     vae_per_channel_normalize=False,
     timestep=None,
+    tile_size: Optional[int] = None,
+    tile_overlap: int = 8,
+    memory_budget_bytes: Optional[int] = None,
 ) -> Tensor:
+    """
+    Decodes latents into media items using the VAE.
+
+    Spatial tiling is opt-in: when `tile_size` (in latent pixels) is given, or is derived from
+    `memory_budget_bytes`, the latents are decoded as overlapping spatial tiles whose seams are
+    linearly blended, bounding the decoder activation memory by the tile size instead of the
+    full frame. Only supported for `CausalVideoAutoencoder`.
+
+    Args:
+        latents (Tensor): The latents to decode.
+        vae (AutoencoderKL): The VAE model.
+        is_video (bool): Whether the latents represent a video.
+        split_size (int, optional): The number of sub-batches to split the batch into for decoding.
+        vae_per_channel_normalize (bool): Whether the latents were normalized per channel.
+        timestep: Decoder timestep conditioning, if the decoder supports it.
+        tile_size (int, optional): Height and width of the latent tiles. Defaults to no tiling.
+        tile_overlap (int): Overlap between neighbouring tiles, in latent pixels.
+        memory_budget_bytes (int, optional): Chooses `tile_size` so that the estimated decoder
+            activations of a tile fit in this many bytes. Latents whose whole frame fits in one
+            such tile are decoded untiled. Ignored if `tile_size` is given.
+    """
     is_video_shaped = latents.dim() == 5
     batch_size = latents.shape[0]
 
+    if tile_size is not None or memory_budget_bytes is not None:
+        if not isinstance(vae, CausalVideoAutoencoder) or not is_video_shaped:
+            raise ValueError(
+                "Tiled decoding is only supported for video latents of a CausalVideoAutoencoder"
+            )
+    if tile_size is None and memory_budget_bytes is not None:
+        tile_size = choose_decode_tile_size(
+            vae, latents.shape, memory_budget_bytes, tile_overlap
+        )
+        if tile_size >= max(latents.shape[-2:]):
+            # The whole latent frame fits in the budget, so there is nothing to tile
+            tile_size = None
+    elif tile_size is not None and tile_size <= tile_overlap:
+        raise ValueError(
+            f"tile_size ({tile_size}) must be larger than tile_overlap ({tile_overlap})"
+        )
+
     if is_video_shaped and not isinstance(
         vae, (VideoAutoencoder, CausalVideoAutoencoder)
     ):
@@ -113,15 +157,27 @@ def vae_decode(
             )
         encode_bs = len(latents) // split_size
         image_batch = [
-            _run_decoder(
-                latent_batch, vae, is_video, vae_per_channel_normalize, timestep
+            _run_tiled_decoder(
+                latent_batch,
+                vae,
+                is_video,
+                vae_per_channel_normalize,
+                timestep,
+                tile_size,
+                tile_overlap,
             )
             for latent_batch in latents.split(encode_bs)
         ]
         images = torch.cat(image_batch, dim=0)
     else:
-        images = _run_decoder(
-            latents, vae, is_video, vae_per_channel_normalize, timestep
+        images = _run_tiled_decoder(
+            latents,
+            vae,
+            is_video,
+            vae_per_channel_normalize,
+            timestep,
+            tile_size,
+            tile_overlap,
         )
 
     if is_video_shaped and not isinstance(
@@ -165,6 +221,151 @@ def _run_decoder(
     return image
 
 
+def vae_decode_streaming(
+    latents: Tensor,
+    vae: CausalVideoAutoencoder,
+    chunk_size: int = 2,
+    vae_per_channel_normalize=False,
+    timestep=None,
+) -> Iterator[Tensor]:
+    """
+    Decodes video latents `chunk_size` latent frames at a time, yielding the decoded pixel frames
+    as soon as they are final. Concatenating the yielded chunks along the frame axis gives the same
+    video as `vae_decode`, while the decoder activations only ever cover a single chunk.
+
+    Args:
+        latents (Tensor): Video latents of shape (batch_size, channels, frames, height, width).
+        vae (CausalVideoAutoencoder): The VAE model.
+        chunk_size (int): Number of latent frames decoded per step.
+        vae_per_channel_normalize (bool): Whether the latents were normalized per channel.
+        timestep: Decoder timestep conditioning, if the decoder supports it.
+    """
+    if not isinstance(vae, CausalVideoAutoencoder):
+        raise ValueError(
+            "Streaming decoding is only supported for CausalVideoAutoencoder"
+        )
+
+    latents = un_normalize_latents(
+        latents.to(vae.dtype), vae, vae_per_channel_normalize
+    )
+    decoder = StreamingDecoder(vae, timestep=timestep)
+    chunks = latents.split(chunk_size, dim=2)
+    for i, chunk in enumerate(chunks):
+        frames = decoder.decode_chunk(chunk, is_last=i == len(chunks) - 1)
+        if frames.shape[2] > 0:
+            yield frames
+
+
+def _tile_starts(length: int, tile_size: int, stride: int) -> list:
+    starts = list(range(0, max(length - tile_size, 0) + 1, stride))
+    if starts[-1] + tile_size < length:
+        starts.append(length - tile_size)
+    return starts
+
+
+def _blend_ramp(
+    length: int, overlap: int, ramp_start: bool, ramp_end: bool, device
+) -> Tensor:
+    """
+    Blending weights along one tile axis. Next to a neighbouring tile, the outer quarter of the
+    overlap (the part most affected by the tile's own padding) gets zero weight and the middle half
+    is cross-faded, so the weights of two overlapping tiles sum to one.
+    """
+    weights = torch.ones(length, device=device)
+    ramp = max(overlap // 2, 1)
+    margin = (overlap - ramp) / 2
+    position = torch.arange(length, device=device) + 0.5
+    if ramp_start:
+        weights = weights * ((position - margin) / ramp).clamp(0, 1)
+    if ramp_end:
+        weights = weights * ((length - position - margin) / ramp).clamp(0, 1)
+    return weights
+
+
+def _run_tiled_decoder(
+    latents: Tensor,
+    vae: AutoencoderKL,
+    is_video: bool,
+    vae_per_channel_normalize=False,
+    timestep=None,
+    tile_size: Optional[int] = None,
+    tile_overlap: int = 8,
+) -> Tensor:
+    *_, hl, wl = latents.shape
+    if tile_size is None or (tile_size >= hl and tile_size >= wl):
+        return _run_decoder(latents, vae, is_video, vae_per_channel_normalize, timestep)
+
+    _, spatial_scale, _ = get_vae_size_scale_factor(vae)
+    stride = tile_size - tile_overlap
+    overlap = tile_overlap * spatial_scale
+    h_starts = _tile_starts(hl, tile_size, stride)
+    w_starts = _tile_starts(wl, tile_size, stride)
+
+    output = weights = None
+    for i in h_starts:
+        for j in w_starts:
+            tile = latents[..., i : i + tile_size, j : j + tile_size]
+            decoded = _run_decoder(
+                tile, vae, is_video, vae_per_channel_normalize, timestep
+            )
+            if output is None:
+                output = torch.zeros(
+                    *decoded.shape[:3],
+                    hl * spatial_scale,
+                    wl * spatial_scale,
+                    dtype=torch.float32,
+                    device=decoded.device,
+                )
+                weights = torch.zeros(
+                    hl * spatial_scale, wl * spatial_scale, device=decoded.device
+                )
+            th, tw = decoded.shape[-2:]
+            # Fade tiles in and out over the overlap with their neighbours
+            mask = _blend_ramp(
+                th, overlap, i > 0, i + tile.shape[-2] < hl, decoded.device
+            )[:, None] * _blend_ramp(
+                tw, overlap, j > 0, j + tile.shape[-1] < wl, decoded.device
+            )
+            y, x = i * spatial_scale, j * spatial_scale
+            output[..., y : y + th, x : x + tw] += decoded.float() * mask
+            weights[y : y + th, x : x + tw] += mask
+
+    return (output / weights).to(decoded.dtype)
+
+
+def _decoder_peak_bytes_per_latent_voxel(vae: CausalVideoAutoencoder) -> float:
+    """Rough estimate of the peak decoder activation bytes per input latent voxel."""
+    decoder = vae.decoder
+    conv_in = next(m for m in decoder.conv_in.modules() if isinstance(m, nn.Conv3d))
+    channels, voxels, peak = conv_in.out_channels, 1, conv_in.out_channels
+    for block in decoder.up_blocks:
+        if hasattr(block, "pixel_shuffle"):
+            peak = max(peak, block.out_channels * voxels)
+            voxels *= int(np.prod(block.stride))
+            channels = block.out_channels // int(np.prod(block.stride))
+        peak = max(peak, channels * voxels)
+    element_size = torch.finfo(vae.dtype).bits // 8
+    # A resnet block keeps its input, residual and conv output alive at the same time
+    return 3 * peak * element_size
+
+
+def choose_decode_tile_size(
+    vae: AutoencoderKL,
+    latent_shape: Tuple[int, ...],
+    memory_budget_bytes: int,
+    tile_overlap: int = 8,
+) -> int:
+    """
+    Returns the largest square latent tile size whose estimated decoder activations fit in
+    `memory_budget_bytes`, capped at the latent frame size.
+    """
+    batch_size, _, num_frames, height, width = latent_shape
+    bytes_per_voxel = _decoder_peak_bytes_per_latent_voxel(vae)
+    max_area = memory_budget_bytes / (bytes_per_voxel * batch_size * num_frames)
+    tile_size = int(math.sqrt(max_area))
+    return min(max(tile_size, 2 * tile_overlap), max(height, width))
+
+
 def get_vae_size_scale_factor(vae: AutoencoderKL) -> float:
     if isinstance(vae, CausalVideoAutoencoder):
         spatial = vae.spatial_downscale_factor
@@ -20,6 +20,7 @@ from diffusers.utils.torch_utils import maybe_allow_in_graph
 from einops import rearrange
 from torch import nn
 
+from ltx_video.models.transformers.token_merging import TokenMerge
 from ltx_video.utils.skip_layer_strategy import SkipLayerStrategy
 
 try:
@@ -207,6 +208,7 @@ class BasicTransformerBlock(nn.Module):
         class_labels: Optional[torch.LongTensor] = None,
         skip_layer_mask: Optional[torch.Tensor] = None,
         skip_layer_strategy: Optional[SkipLayerStrategy] = None,
+        token_merge: Optional[TokenMerge] = None,
     ) -> torch.FloatTensor:
         if cross_attention_kwargs is not None:
             if cross_attention_kwargs.get("scale", None) is not None:
@@ -251,6 +253,11 @@ class BasicTransformerBlock(nn.Module):
             cross_attention_kwargs.copy() if cross_attention_kwargs is not None else {}
         )
 
+        # Attention and feed-forward run on the merged tokens, the residual stream keeps them all
+        if token_merge is not None:
+            norm_hidden_states = token_merge.merge(norm_hidden_states)
+            freqs_cis = token_merge.merge_freqs_cis(freqs_cis)
+
         attn_output = self.attn1(
             norm_hidden_states,
             freqs_cis=freqs_cis,
@@ -262,6 +269,8 @@ class BasicTransformerBlock(nn.Module):
             skip_layer_strategy=skip_layer_strategy,
             **cross_attention_kwargs,
         )
+        if token_merge is not None:
+            attn_output = token_merge.unmerge(attn_output.squeeze(1))
         if gate_msa is not None:
             attn_output = gate_msa * attn_output
 
@@ -275,6 +284,8 @@ class BasicTransformerBlock(nn.Module):
                 attn_input = self.attn2_norm(hidden_states)
             else:
                 attn_input = hidden_states
+            if token_merge is not None:
+                attn_input = token_merge.merge(attn_input)
             attn_output = self.attn2(
                 attn_input,
                 freqs_cis=freqs_cis,
@@ -282,6 +293,8 @@ class BasicTransformerBlock(nn.Module):
                 attention_mask=encoder_attention_mask,
                 **cross_attention_kwargs,
             )
+            if token_merge is not None:
+                attn_output = token_merge.unmerge(attn_output)
             hidden_states = attn_output + hidden_states
 
         # 4. Feed-forward
@@ -295,6 +308,8 @@ class BasicTransformerBlock(nn.Module):
         else:
             raise ValueError(f"Unknown adaptive norm type: {self.adaptive_norm}")
 
+        if token_merge is not None:
+            norm_hidden_states = token_merge.merge(norm_hidden_states)
         if self._chunk_size is not None:
             # "feed_forward_chunk_size" can be used to save memory
             ff_output = _chunked_feed_forward(
@@ -302,6 +317,8 @@ class BasicTransformerBlock(nn.Module):
             )
         else:
             ff_output = self.ff(norm_hidden_states)
+        if token_merge is not None:
+            ff_output = token_merge.unmerge(ff_output)
         if gate_mlp is not None:
             ff_output = gate_mlp * ff_output
 
@@ -0,0 +1,148 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Union
+
+import torch
+from torch import nn
+
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+
+
+def _is_resident(name: str) -> bool:
+    # The adaptive norm inputs of the blocks are tiny, and the residual cache reads
+    # the first block's before the blocks run
+    return name == "scale_shift_table" or name.startswith("norm1.")
+
+
+def _placeholder(tensor: torch.Tensor) -> torch.Tensor:
+    return torch.empty(0, dtype=tensor.dtype, device=tensor.device)
+
+
+def _assign_tensors(block: nn.Module, tensors: Dict[str, torch.Tensor]):
+    for name, tensor in tensors.items():
+        module_name, _, tensor_name = name.rpartition(".")
+        owner = block.get_submodule(module_name)
+        if tensor_name in owner._parameters:
+            tensor = nn.Parameter(tensor, requires_grad=False)
+        setattr(owner, tensor_name, tensor)
+
+
+class BlockStreamer:
+    """Loads the weights of the transformer blocks from a memory-mapped checkpoint one block at a time.
+
+    The streamed weights of a block are zero-size placeholders, which keep the
+    device and dtype the weights are loaded to, so moving or casting the model
+    with `.to()` applies to the streamed blocks as well. While the transformer
+    runs a block, the next one is read and loaded on a background thread. Once a
+    block has run, its weights are replaced by placeholders again and their pages
+    are dropped from the mapping, so resident memory holds about two blocks
+    instead of the whole stack.
+
+    Args:
+        checkpoint: The checkpoint the weights are read from.
+        prefix: Name prefix of the blocks in the checkpoint, e.g.
+            "model.diffusion_model.transformer_blocks.".
+        blocks: The transformer blocks, with placeholders for their streamed weights.
+        prefetch: Whether to load the next block in the background while a block runs.
+    """
+
+    def __init__(
+        self,
+        checkpoint: SafetensorsCheckpoint,
+        prefix: str,
+        blocks: nn.ModuleList,
+        prefetch: bool = True,
+    ):
+        self.checkpoint = checkpoint
+        self.prefix = prefix
+        self.blocks = blocks
+        self.prefetch = prefetch
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._names: List[List[str]] = [[] for _ in blocks]
+        for name in checkpoint.keys():
+            if not name.startswith(prefix):
+                continue
+            if self.is_streamed(name):
+                index = name[len(prefix) :].partition(".")[0]
+                self._names[int(index)].append(name)
+
+    def is_streamed(self, name: str) -> bool:
+        """Whether a checkpoint tensor is loaded by the streamer rather than with the model."""
+        if not name.startswith(self.prefix):
+            return False
+        return not _is_resident(name[len(self.prefix) :].partition(".")[2])
+
+    def init_placeholders(
+        self,
+        device: Optional[Union[str, torch.device]] = None,
+        dtype: Optional[torch.dtype] = None,
+    ):
+        """Sets the placeholders of the streamed weights to load them on `device` in `dtype`."""
+        for index, block in enumerate(self.blocks):
+            block_prefix = f"{self.prefix}{index}."
+            _assign_tensors(
+                block,
+                {
+                    name[len(block_prefix) :]: torch.empty(
+                        0,
+                        dtype=self.checkpoint.tensor_dtype(name, dtype),
+                        device=device,
+                    )
+                    for name in self._names[index]
+                },
+            )
+
+    def _load(self, index: int) -> Dict[str, torch.Tensor]:
+        block = self.blocks[index]
+        block_prefix = f"{self.prefix}{index}."
+        self.checkpoint.prefetch(self._names[index])
+        tensors = {}
+        for name in self._names[index]:
+            local_name = name[len(block_prefix) :]
+            placeholder = block.get_parameter(local_name)
+            tensors[local_name] = self.checkpoint.get_tensor(
+                name, device=placeholder.device, dtype=placeholder.dtype
+            )
+        return tensors
+
+    def _prefetch(self, index: int) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ltx-block-prefetch"
+            )
+        return self._executor.submit(self._load, index)
+
+    def release(self, index: int):
+        """Replaces the streamed weights of a block by placeholders."""
+        block = self.blocks[index]
+        block_prefix = f"{self.prefix}{index}."
+        _assign_tensors(
+            block,
+            {
+                name[len(block_prefix) :]: _placeholder(
+                    block.get_parameter(name[len(block_prefix) :])
+                )
+                for name in self._names[index]
+            },
+        )
+        self.checkpoint.release(self._names[index])
+
+    def __iter__(self) -> Iterator[nn.Module]:
+        """Yields the blocks in order, each with its weights loaded while it is in use."""
+        pending: Optional[Future] = None
+        try:
+            for index, block in enumerate(self.blocks):
+                tensors = self._load(index) if pending is None else pending.result()
+                pending = None
+                if self.prefetch and index + 1 < len(self.blocks):
+                    pending = self._prefetch(index + 1)
+                _assign_tensors(block, tensors)
+                del tensors
+                try:
+                    yield block
+                finally:
+                    self.release(index)
+        finally:
+            if pending is not None:
+                # Stopped early: wait for the background load, then drop it
+                pending.result()
+                self.checkpoint.release(self._names[index + 1])
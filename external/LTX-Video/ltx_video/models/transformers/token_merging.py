@@ -0,0 +1,164 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import torch
+
+
+class TokenMerge:
+    """Merges the tokens of one transformer block and maps the results back to every token.
+
+    Args:
+        kept_index: `(batch, kept)` positions of the tokens that remain, in order.
+        merged_index: `(batch, tokens)` position, among the remaining tokens, of the token
+            each token was merged into (its own position for the remaining tokens).
+    """
+
+    def __init__(self, kept_index: torch.Tensor, merged_index: torch.Tensor):
+        self.kept_index = kept_index
+        self.merged_index = merged_index
+        self.num_kept = kept_index.shape[1]
+        counts = torch.zeros(kept_index.shape, device=kept_index.device)
+        counts.scatter_add_(
+            1, merged_index, torch.ones_like(merged_index, dtype=counts.dtype)
+        )
+        self._counts = counts.unsqueeze(-1)
+
+    def merge(self, x: torch.Tensor) -> torch.Tensor:
+        """Averages the tokens of `x` merged together, `(batch, tokens, dim)` -> `(batch, kept, dim)`."""
+        merged = torch.zeros(
+            x.shape[0], self.num_kept, x.shape[-1], dtype=x.dtype, device=x.device
+        )
+        index = self.merged_index.unsqueeze(-1).expand(-1, -1, x.shape[-1])
+        merged.scatter_add_(1, index, x)
+        return merged / self._counts.to(x.dtype)
+
+    def unmerge(self, x: torch.Tensor) -> torch.Tensor:
+        """Copies each merged token back to the tokens it stands for."""
+        index = self.merged_index.unsqueeze(-1).expand(-1, -1, x.shape[-1])
+        return x.gather(1, index)
+
+    def merge_freqs_cis(
+        self, freqs_cis: Tuple[torch.Tensor, torch.Tensor]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Keeps the rotary embedding of the remaining tokens, so each merged token keeps its position."""
+        index = self.kept_index.unsqueeze(-1)
+        return tuple(
+            freqs.expand(self.kept_index.shape[0], -1, -1).gather(
+                1, index.expand(-1, -1, freqs.shape[-1])
+            )
+            for freqs in freqs_cis
+        )
+
+
+class TokenMerging:
+    """Merges similar tokens within local spatiotemporal windows before attention and feed-forward.
+
+    The latent tokens are split into windows of `window_size` (frames, height,
+    width) latent positions. The first token of each window is its destination and
+    the others are sources, matched to the destination of their window by cosine
+    similarity of the block input. In each block, the sources most similar to their
+    destination are averaged into it and attention, cross-attention and the
+    feed-forward run on the remaining tokens; their outputs are copied back to
+    every merged token, so the residual stream keeps its full length. A merged
+    token keeps the rotary position of its destination. Tokens are only merged
+    with tokens of the same timestep, so conditioning tokens, which have their own
+    timestep, are never mixed with the generated ones.
+
+    Args:
+        ratio: Fraction of the tokens removed in each block.
+        window_size: Size, in latent positions along frames, height and width, of the
+            windows tokens are merged within. Caps the ratio at `1 - 1 / prod(window_size)`.
+        block_ratios: Ratio of specific blocks, by block index, overriding `ratio`.
+        min_timestep: Tokens are merged only on steps whose timestep (between 0 and 1)
+            is at least this. The late, low noise steps refine details merging would blur.
+        max_timestep: Tokens are merged only on steps whose timestep is at most this.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.5,
+        window_size: Sequence[int] = (2, 2, 2),
+        block_ratios: Optional[Dict[int, float]] = None,
+        min_timestep: float = 0.0,
+        max_timestep: float = 1.0,
+    ):
+        if not 0.0 <= ratio < 1.0:
+            raise ValueError(f"Token merging ratio must be in [0, 1), got {ratio}")
+        self.ratio = ratio
+        self.window_size = tuple(window_size)
+        self.block_ratios = {int(k): v for k, v in (block_ratios or {}).items()}
+        self.min_timestep = min_timestep
+        self.max_timestep = max_timestep
+
+    def ratio_for(self, block_index: int, timestep: float) -> float:
+        """The fraction of tokens merged in a block at a timestep."""
+        if not self.min_timestep <= timestep <= self.max_timestep:
+            return 0.0
+        return self.block_ratios.get(block_index, self.ratio)
+
+    def destinations(
+        self, indices_grid: torch.Tensor, timestep: torch.Tensor
+    ) -> torch.Tensor:
+        """Returns, for each token, the position of the destination it may be merged into.
+
+        Args:
+            indices_grid: `(batch or 1, 3, tokens)` coordinates of the tokens, in any unit.
+            timestep: `(batch, 1 or tokens)` timesteps of the tokens.
+        """
+        batch_size = timestep.shape[0]
+        num_tokens = indices_grid.shape[-1]
+        device = indices_grid.device
+        # Windows in latent positions: the rank of each coordinate along its axis
+        key = torch.zeros(
+            indices_grid.shape[0], num_tokens, dtype=torch.long, device=device
+        )
+        for axis, size in enumerate(self.window_size):
+            _, position = torch.unique(indices_grid[:, axis], return_inverse=True)
+            window = position // size
+            key = key * (int(window.max()) + 1) + window
+        key = key.expand(batch_size, -1)
+        # Tokens of different timesteps go to different destinations
+        _, timestep_rank = torch.unique(timestep, return_inverse=True)
+        key = key * (int(timestep_rank.max()) + 1) + timestep_rank.expand_as(key)
+        # Keep the batch items apart, then take the first token of each group
+        key = key + torch.arange(batch_size, device=device)[:, None] * (
+            int(key.max()) + 1
+        )
+        _, group = torch.unique(key, return_inverse=True)
+        positions = torch.arange(num_tokens, device=device).expand(batch_size, -1)
+        first = torch.full(
+            (int(group.max()) + 1,), num_tokens, dtype=torch.long, device=device
+        )
+        first.scatter_reduce_(0, group.flatten(), positions.flatten(), reduce="amin")
+        return first[group]
+
+    @staticmethod
+    def plan(
+        hidden_states: torch.Tensor, destinations: torch.Tensor, ratio: float
+    ) -> Optional[TokenMerge]:
+        """Picks the sources most similar to their destination and merges them.
+
+        Returns None when no token is merged.
+        """
+        num_tokens = hidden_states.shape[1]
+        positions = torch.arange(num_tokens, device=hidden_states.device)
+        is_source = destinations != positions
+        num_merged = min(int(ratio * num_tokens), int(is_source.sum(dim=1).min()))
+        if num_merged <= 0:
+            return None
+
+        normalized = torch.nn.functional.normalize(hidden_states.float(), dim=-1)
+        destination_states = normalized.gather(
+            1, destinations.unsqueeze(-1).expand(-1, -1, normalized.shape[-1])
+        )
+        similarity = (normalized * destination_states).sum(dim=-1)
+        similarity = similarity.masked_fill(~is_source, -float("inf"))
+        merged = torch.zeros_like(is_source)
+        merged.scatter_(1, similarity.topk(num_merged, dim=1).indices, True)
+
+        kept = ~merged
+        kept_index = torch.sort(torch.where(kept, positions, num_tokens), dim=1).values[
+            :, : num_tokens - num_merged
+        ]
+        rank = kept.long().cumsum(dim=1) - 1
+        merged_index = torch.where(kept, rank, rank.gather(1, destinations))
+        return TokenMerge(kept_index, merged_index)
@@ -1,7 +1,7 @@
 # Adapted from: https://github.com/huggingface/diffusers/blob/v0.26.3/src/diffusers/models/transformers/transformer_2d.py
 import math
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 import os
 import json
 import glob
@@ -19,6 +19,9 @@ from safetensors import safe_open
 
 
 from ltx_video.models.transformers.attention import BasicTransformerBlock
+from ltx_video.models.transformers.block_streaming import BlockStreamer
+from ltx_video.models.transformers.token_merging import TokenMerging
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
 from ltx_video.utils.skip_layer_strategy import SkipLayerStrategy
 
 from ltx_video.utils.diffusers_config_mapping import (
@@ -45,6 +48,58 @@ class Transformer3DModelOutput(BaseOutput):
     sample: torch.FloatTensor
 
 
+class BlockResidualCache:
+    """Reuses the output of the transformer blocks across denoising steps.
+
+    Consecutive denoising steps feed the blocks very similar inputs, so the
+    residual they add to the hidden states changes little from one step to the
+    next. The cache tracks the relative L1 change of the timestep-modulated input
+    of the first block, accumulated since the blocks were last evaluated. While it
+    stays below `threshold`, the blocks are skipped and the last residual is added
+    instead. Higher thresholds skip more steps at the cost of fidelity.
+
+    One cache follows one stream of inputs (same batch layout and skip layer
+    mask), and holds the last modulated input and residual of that stream.
+
+    Args:
+        threshold: Accumulated relative change below which the residual is reused.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._accumulated_change = 0.0
+        self._previous_input: Optional[torch.Tensor] = None
+        self._residual: Optional[torch.Tensor] = None
+
+    def should_reuse(self, modulated_input: torch.Tensor) -> bool:
+        """Records the step's modulated input and returns whether to reuse the residual."""
+        previous = self._previous_input
+        reuse = False
+        if (
+            previous is not None
+            and self._residual is not None
+            and previous.shape == modulated_input.shape
+        ):
+            change = (modulated_input - previous).abs().mean() / previous.abs().mean()
+            self._accumulated_change += change.item()
+            reuse = self._accumulated_change < self.threshold
+        self._previous_input = modulated_input
+        if reuse:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._accumulated_change = 0.0
+        return reuse
+
+    def apply(self, hidden_states: torch.Tensor) -> torch.Tensor:
+        return hidden_states + self._residual
+
+    def store(self, block_input: torch.Tensor, block_output: torch.Tensor):
+        self._residual = block_output - block_input
+
+
 class Transformer3DModel(ModelMixin, ConfigMixin):
     _supports_gradient_checkpointing = True
 
@@ -158,6 +213,7 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
             )
 
         self.gradient_checkpointing = False
+        self.block_streamer: Optional[BlockStreamer] = None
 
     def set_use_tpu_flash_attention(self):
         r"""
@@ -315,16 +371,49 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
         elif pretrained_model_path.is_file() and str(pretrained_model_path).endswith(
             ".safetensors"
         ):
-            comfy_single_file_state_dict = {}
-            with safe_open(pretrained_model_path, framework="pt", device="cpu") as f:
-                metadata = f.metadata()
-                for k in f.keys():
-                    comfy_single_file_state_dict[k] = f.get_tensor(k)
-            configs = json.loads(metadata["config"])
-            transformer_config = configs["transformer"]
-            with torch.device("meta"):
-                transformer = Transformer3DModel.from_config(transformer_config)
-            transformer.load_state_dict(comfy_single_file_state_dict, assign=True)
+            transformer = cls.from_checkpoint(
+                SafetensorsCheckpoint(pretrained_model_path)
+            )
+        return transformer
+
+    @classmethod
+    def from_checkpoint(
+        cls,
+        checkpoint: SafetensorsCheckpoint,
+        device: Optional[Union[str, torch.device]] = None,
+        dtype: Optional[torch.dtype] = None,
+        stream_blocks: bool = False,
+    ):
+        """Builds the transformer of a single-file checkpoint on the meta device and loads its
+        weights directly on `device`, with floating point weights cast to `dtype`.
+
+        With `stream_blocks`, the weights of the transformer blocks are not loaded here:
+        each block is loaded from the memory-mapped checkpoint when the forward pass
+        reaches it, and released once it ran (see [`BlockStreamer`]). The transformer
+        then holds about two blocks in memory instead of all of them.
+        """
+        prefix = "model.diffusion_model."
+        if not any(key.startswith(prefix) for key in checkpoint.keys()):
+            prefix = ""
+        with torch.device("meta"):
+            transformer = cls.from_config(checkpoint.configs["transformer"])
+        streamer = None
+        if stream_blocks:
+            streamer = BlockStreamer(
+                checkpoint,
+                f"{prefix}transformer_blocks.",
+                transformer.transformer_blocks,
+            )
+        state_dict = {
+            name[len(prefix) :]: checkpoint.get_tensor(name, device=device, dtype=dtype)
+            for name in checkpoint.keys()
+            if name.startswith(prefix)
+            and not (streamer is not None and streamer.is_streamed(name))
+        }
+        transformer.load_state_dict(state_dict, assign=True, strict=streamer is None)
+        if streamer is not None:
+            streamer.init_placeholders(device=device, dtype=dtype)
+            transformer.block_streamer = streamer
         return transformer
 
     def forward(
@@ -339,6 +428,9 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
         encoder_attention_mask: Optional[torch.Tensor] = None,
         skip_layer_mask: Optional[torch.Tensor] = None,
         skip_layer_strategy: Optional[SkipLayerStrategy] = None,
+        freqs_cis: Optional[Tuple[torch.Tensor, torch.Tensor]] = None,
+        residual_cache: Optional[BlockResidualCache] = None,
+        token_merging: Optional[TokenMerging] = None,
         return_dict: bool = True,
     ):
         """
@@ -377,6 +469,16 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
                 `layer, batch_idx` indicates that the layer should be skipped for the corresponding batch index.
             skip_layer_strategy ( `SkipLayerStrategy`, *optional*, defaults to `None`):
                 Controls which layers are skipped when calculating a perturbed latent for spatiotemporal guidance.
+            freqs_cis (`Tuple[torch.Tensor, torch.Tensor]`, *optional*):
+                The rotary embedding `(cos, sin)` returned by `precompute_freqs_cis(indices_grid)`. The grid is
+                the same for every denoising step, so callers can compute it once and pass it in. If not given, it
+                is computed from `indices_grid`.
+            residual_cache (`BlockResidualCache`, *optional*):
+                If given, the transformer blocks are skipped and their cached residual is reused when the
+                modulated input changed little since they were last evaluated. See [`BlockResidualCache`].
+            token_merging (`TokenMerging`, *optional*):
+                If given, similar tokens are merged within local windows for the attention and feed-forward
+                layers of the blocks. See [`TokenMerging`].
             return_dict (`bool`, *optional*, defaults to `True`):
                 Whether or not to return a [`~models.unets.unet_2d_condition.UNet2DConditionOutput`] instead of a plain
                 tuple.
@@ -415,10 +517,15 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
         # 1. Input
         hidden_states = self.patchify_proj(hidden_states)
 
+        if token_merging is not None:
+            merge_timestep = float(timestep.max())
+            merge_destinations = token_merging.destinations(indices_grid, timestep)
+
         if self.timestep_scale_multiplier:
             timestep = self.timestep_scale_multiplier * timestep
 
-        freqs_cis = self.precompute_freqs_cis(indices_grid)
+        if freqs_cis is None:
+            freqs_cis = self.precompute_freqs_cis(indices_grid)
 
         batch_size = hidden_states.shape[0]
         timestep, embedded_timestep = self.adaln_single(
@@ -434,6 +541,15 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
         )
 
         # 2. Blocks
+        if residual_cache is not None:
+            if residual_cache.should_reuse(
+                self._first_block_modulated_input(hidden_states, timestep)
+            ):
+                return self._output(
+                    residual_cache.apply(hidden_states), embedded_timestep, return_dict
+                )
+            block_input = hidden_states
+
         if self.caption_projection is not None:
             batch_size = hidden_states.shape[0]
             encoder_hidden_states = self.caption_projection(encoder_hidden_states)
@@ -441,7 +557,17 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
                 batch_size, -1, hidden_states.shape[-1]
             )
 
-        for block_idx, block in enumerate(self.transformer_blocks):
+        blocks = self.transformer_blocks
+        if self.block_streamer is not None:
+            blocks = self.block_streamer
+        for block_idx, block in enumerate(blocks):
+            token_merge = None
+            if token_merging is not None:
+                token_merge = TokenMerging.plan(
+                    hidden_states,
+                    merge_destinations,
+                    token_merging.ratio_for(block_idx, merge_timestep),
+                )
             if self.training and self.gradient_checkpointing:
 
                 def create_custom_forward(module, return_dict=None):
@@ -472,6 +598,7 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
                         else None
                     ),
                     skip_layer_strategy,
+                    token_merge,
                     **ckpt_kwargs,
                 )
             else:
@@ -490,8 +617,36 @@ class Transformer3DModel(ModelMixin, ConfigMixin):
                         else None
                     ),
                     skip_layer_strategy=skip_layer_strategy,
+                    token_merge=token_merge,
                 )
 
+        if residual_cache is not None:
+            residual_cache.store(block_input, hidden_states)
+
+        return self._output(hidden_states, embedded_timestep, return_dict)
+
+    def _first_block_modulated_input(
+        self, hidden_states: torch.Tensor, timestep: torch.Tensor
+    ) -> torch.Tensor:
+        """The normalized and timestep-modulated input of the first attention layer."""
+        block = self.transformer_blocks[0]
+        modulated = block.norm1(hidden_states)
+        if block.adaptive_norm == "none":
+            return modulated
+        num_ada_params = block.scale_shift_table.shape[0]
+        ada_values = block.scale_shift_table[None, None] + timestep.reshape(
+            hidden_states.shape[0], timestep.shape[1], num_ada_params, -1
+        )
+        if block.adaptive_norm == "single_scale_shift":
+            return modulated * (1 + ada_values[:, :, 1]) + ada_values[:, :, 0]
+        return modulated * (1 + ada_values[:, :, 0])
+
+    def _output(
+        self,
+        hidden_states: torch.Tensor,
+        embedded_timestep: torch.Tensor,
+        return_dict: bool,
+    ):
         # 3. Output
         scale_shift_values = (
             self.scale_shift_table[None, None] + embedded_timestep[:, :, None]
@@ -0,0 +1,352 @@
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import torch
+from diffusers.utils import logging
+
+from ltx_video.inference import InferenceConfig, infer, load_pipeline_config
+from ltx_video.pipelines.pipeline_registry import PipelineRegistry
+from ltx_video.pipelines.prompt_embedding_cache import PromptEmbeddingCache
+from ltx_video.utils.cancellation import CancellationToken
+
+logger = logging.get_logger("LTX-Video")
+
+
+def default_devices(include_cpu: bool = False) -> List[str]:
+    """Every visible CUDA device, plus the CPU when asked for or when there is no GPU."""
+    devices = [f"cuda:{i}" for i in range(torch.cuda.device_count())]
+    if include_cpu or not devices:
+        devices.append("cpu")
+    return devices
+
+
+def _num_inference_steps(settings: dict) -> int:
+    if settings.get("timesteps"):
+        return len(settings["timesteps"])
+    return settings.get("num_inference_steps") or 1
+
+
+def estimate_job_cost(config: InferenceConfig) -> float:
+    """Relative cost of a generation: frames x pixels x denoising steps."""
+    pipeline_config = load_pipeline_config(config.pipeline_config)
+    if pipeline_config.get("pipeline_type") == "multi-scale":
+        steps = _num_inference_steps(
+            pipeline_config.get("first_pass", {})
+        ) + _num_inference_steps(pipeline_config.get("second_pass", {}))
+    else:
+        steps = _num_inference_steps(pipeline_config)
+    if pipeline_config.get("solver") == "heun":
+        # The Heun solver evaluates the transformer twice per step
+        steps *= 2
+    return float(config.num_frames * config.height * config.width * steps)
+
+
+@dataclass
+class _Job:
+    config: InferenceConfig
+    cost: float
+    config_key: Hashable
+    future: Future
+    seq: int
+    submitted_at: float = field(default_factory=time.monotonic)
+    # Extra keyword arguments of `run_job`, e.g. a preview callback
+    run_kwargs: Dict[str, Any] = field(default_factory=dict)
+    cancellation_token: Optional[CancellationToken] = None
+    # Only the worker of this device may run the job
+    device: Optional[str] = None
+
+
+class DeviceWorker:
+    """A thread pinned to one device that runs the jobs the scheduler assigns to it.
+
+    By default jobs run through `infer` with a `PipelineRegistry` owned by the
+    worker, so pipelines stay resident on its device between jobs.
+
+    Args:
+        device: Device the worker runs on, e.g. "cuda:1" or "cpu".
+        run_job: Runs one `InferenceConfig` and returns its result. Defaults to
+            `infer` with the worker's device and registry. Receives the job's
+            `preview_callback` and `cancellation_token` as keyword arguments
+            when the job was submitted with them.
+        speed: Relative throughput, used to prefer faster idle workers.
+        pipeline_registry: Registry used by the default `run_job`.
+    """
+
+    def __init__(
+        self,
+        device: str,
+        run_job: Optional[Callable[[InferenceConfig], object]] = None,
+        speed: Optional[float] = None,
+        pipeline_registry: Optional[PipelineRegistry] = None,
+    ):
+        self.device = device
+        if speed is None:
+            speed = 0.05 if device == "cpu" else 1.0
+        self.speed = speed
+        if run_job is None:
+            self.pipeline_registry = pipeline_registry or PipelineRegistry()
+            run_job = self._infer
+        self.run_job = run_job
+        # Configs this worker has run, used as a hint that their pipeline is resident
+        self.loaded_configs = set()
+        self.current_job: Optional[_Job] = None
+        self.jobs_done = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.monotonic()
+        self._busy_since: Optional[float] = None
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._on_done: Optional[Callable[["DeviceWorker"], None]] = None
+
+    def _infer(self, config: InferenceConfig, **kwargs):
+        return infer(
+            replace(config, device=self.device),
+            pipeline_registry=self.pipeline_registry,
+            **kwargs,
+        )
+
+    @property
+    def is_idle(self) -> bool:
+        return self.current_job is None
+
+    def utilization(self) -> float:
+        busy = self.busy_seconds
+        if self._busy_since is not None:
+            busy += time.monotonic() - self._busy_since
+        return busy / max(time.monotonic() - self.started_at, 1e-6)
+
+    def start(self, on_done: Callable[["DeviceWorker"], None]):
+        self._on_done = on_done
+        self._thread = threading.Thread(
+            target=self._run, name=f"ltx-worker-{self.device}", daemon=True
+        )
+        self._thread.start()
+
+    def assign(self, job: _Job):
+        """Called by the scheduler, with its lock held, on an idle worker."""
+        self.current_job = job
+        self._busy_since = time.monotonic()
+        self._wakeup.set()
+
+    def stop(self):
+        self._wakeup.set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            job = self.current_job
+            if job is None:
+                # Woken up without a job: the scheduler is shutting down
+                return
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    if job.cancellation_token is not None:
+                        # Cancelled while queued: do not start it
+                        job.cancellation_token.raise_if_cancelled()
+                    job.future.set_result(self.run_job(job.config, **job.run_kwargs))
+                    self.loaded_configs.add(job.config_key)
+                except BaseException as e:
+                    job.future.set_exception(e)
+            self.busy_seconds += time.monotonic() - self._busy_since
+            self._busy_since = None
+            self.jobs_done += 1
+            self._on_done(self)
+
+
+class DevicePoolScheduler:
+    """Dispatches generation jobs to a pool of workers, one per device.
+
+    Queued jobs are handed out whenever a worker is idle. A worker first takes
+    the cheapest job whose pipeline config it already ran, so it does not have
+    to load another pipeline. Otherwise it takes the cheapest queued job, with
+    cost estimated as frames x resolution x steps. Jobs that waited longer than
+    `max_wait_seconds` go first, in submission order, so large jobs are not
+    starved by a steady stream of small ones. Jobs submitted with a `device`
+    wait for the worker of that device.
+
+    Args:
+        workers: The workers to dispatch to. Defaults to one `DeviceWorker` per
+            device of `default_devices()`, sharing one prompt embedding cache.
+        cost_estimator: Estimates the cost of a job that was submitted without one.
+        max_wait_seconds: Queue time after which a job is served before cheaper ones.
+        prompt_embedding_cache: Cache shared by the default workers. Defaults to an
+            in-memory cache.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[List[DeviceWorker]] = None,
+        cost_estimator: Callable[[InferenceConfig], float] = estimate_job_cost,
+        max_wait_seconds: float = 300.0,
+        prompt_embedding_cache: Optional[PromptEmbeddingCache] = None,
+    ):
+        if workers is None:
+            prompt_embedding_cache = prompt_embedding_cache or PromptEmbeddingCache()
+            workers = [
+                DeviceWorker(
+                    device,
+                    pipeline_registry=PipelineRegistry(
+                        memory_budget_bytes=(
+                            torch.cuda.get_device_properties(device).total_memory
+                            if device.startswith("cuda")
+                            else None
+                        ),
+                        prompt_embedding_cache=prompt_embedding_cache,
+                    ),
+                )
+                for device in default_devices()
+            ]
+        self.workers = workers
+        self.cost_estimator = cost_estimator
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: List[_Job] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        for worker in self.workers:
+            worker.start(self._on_worker_done)
+
+    def submit(
+        self,
+        config: InferenceConfig,
+        cost: Optional[float] = None,
+        config_key: Optional[Hashable] = None,
+        preview_callback: Optional[Callable[[int, torch.Tensor], None]] = None,
+        cancellation_token: Optional[CancellationToken] = None,
+        device: Optional[str] = None,
+    ) -> Future:
+        """Queues a generation and returns a future for the result of `infer`.
+
+        `preview_callback` and `cancellation_token` are passed on to `infer`. A
+        job cancelled through its token fails with `GenerationCancelled`, and
+        frees its worker as soon as the running step ends. With `device`, e.g.
+        "cuda:1", the job runs on that device's worker only, even if others are idle.
+        """
+        if device is not None and device not in {w.device for w in self.workers}:
+            raise ValueError(f"No worker runs on device {device}")
+        if cost is None:
+            cost = self.cost_estimator(config)
+        run_kwargs = {}
+        if preview_callback is not None:
+            run_kwargs["preview_callback"] = preview_callback
+        if cancellation_token is not None:
+            run_kwargs["cancellation_token"] = cancellation_token
+        job = _Job(
+            config=config,
+            cost=cost,
+            config_key=config.pipeline_config if config_key is None else config_key,
+            future=Future(),
+            seq=next(self._seq),
+            run_kwargs=run_kwargs,
+            cancellation_token=cancellation_token,
+            device=device,
+        )
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot submit jobs after shutdown")
+            self._queue.append(job)
+            self._dispatch()
+        return job.future
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def stats(self) -> Dict[str, object]:
+        """Queue depth and per-worker state, for monitoring."""
+        with self._lock:
+            return {
+                "queue_depth": len(self._queue),
+                "queued_cost": sum(job.cost for job in self._queue),
+                "workers": [
+                    {
+                        "device": worker.device,
+                        "busy": not worker.is_idle,
+                        "jobs_done": worker.jobs_done,
+                        "utilization": worker.utilization(),
+                        "loaded_configs": sorted(map(str, worker.loaded_configs)),
+                    }
+                    for worker in self.workers
+                ],
+            }
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        with self._lock:
+            self._closed = True
+            if cancel_pending:
+                for job in self._queue:
+                    job.future.cancel()
+                self._queue.clear()
+            self._stop_idle_workers()
+        if wait:
+            for worker in self.workers:
+                worker.join()
+
+    def _on_worker_done(self, worker: DeviceWorker):
+        with self._lock:
+            worker.current_job = None
+            self._dispatch()
+            if self._closed:
+                self._stop_idle_workers()
+
+    def _stop_idle_workers(self):
+        if not self._queue:
+            for worker in self.workers:
+                if worker.is_idle:
+                    worker.stop()
+
+    def _pick_job(self, worker: DeviceWorker) -> Optional[_Job]:
+        jobs = [job for job in self._queue if job.device in (None, worker.device)]
+        if not jobs:
+            return None
+        now = time.monotonic()
+        starved = [
+            job for job in jobs if now - job.submitted_at > self.max_wait_seconds
+        ]
+        if starved:
+            return min(starved, key=lambda job: job.seq)
+        return min(
+            jobs,
+            key=lambda job: (
+                job.config_key not in worker.loaded_configs,
+                job.cost,
+                job.seq,
+            ),
+        )
+
+    def _dispatch(self):
+        while self._queue:
+            idle = [worker for worker in self.workers if worker.is_idle]
+            if not idle:
+                return
+            # Each idle worker would take its own best job; serve first a worker that has
+            # that job's config loaded, then the fastest one
+            candidates = [(worker, self._pick_job(worker)) for worker in idle]
+            candidates = [
+                (worker, job) for worker, job in candidates if job is not None
+            ]
+            if not candidates:
+                # The queued jobs all wait for busy devices
+                return
+            worker, job = max(
+                candidates,
+                key=lambda pair: (
+                    pair[1].config_key in pair[0].loaded_configs,
+                    pair[0].speed,
+                ),
+            )
+            self._queue.remove(job)
+            logger.info(
+                f"Dispatching job {job.seq} (cost {job.cost:.3g}) to {worker.device}"
+            )
+            worker.assign(job)
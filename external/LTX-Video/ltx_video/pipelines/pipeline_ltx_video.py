@@ -5,7 +5,7 @@ import math
 import re
 from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import torch
 import torch.nn.functional as F
@@ -31,11 +31,18 @@ from ltx_video.models.autoencoders.vae_encode import (
     get_vae_size_scale_factor,
     latent_to_pixel_coords,
     vae_decode,
+    vae_decode_streaming,
     vae_encode,
 )
 from ltx_video.models.transformers.symmetric_patchifier import Patchifier
+from ltx_video.models.transformers.token_merging import TokenMerging
 from ltx_video.models.transformers.transformer3d import Transformer3DModel
-from ltx_video.schedulers.rf import TimestepShifter
+from ltx_video.pipelines.prompt_embedding_cache import PromptEmbeddingCache
+from ltx_video.pipelines.step_plan import DenoisingStepPlan
+from ltx_video.schedulers.rf import RectifiedFlowScheduler, TimestepShifter
+from ltx_video.utils.cancellation import CancellationToken, GenerationCancelled
+from ltx_video.utils.latent_preview import LatentPreviewer
+from ltx_video.utils.profiling import StageProfiler, profile_stage
 from ltx_video.utils.skip_layer_strategy import SkipLayerStrategy
 from ltx_video.utils.prompt_enhance_utils import generate_cinematic_prompt
 from ltx_video.models.autoencoders.latent_upsampler import LatentUpsampler
@@ -166,10 +173,10 @@ def retrieve_timesteps(
             )
         scheduler.set_timesteps(timesteps=timesteps, device=device, **kwargs)
         timesteps = scheduler.timesteps
-        num_inference_steps = len(timesteps)
+        num_inference_steps = len(_solver_steps(scheduler))
     else:
         scheduler.set_timesteps(num_inference_steps, device=device, **kwargs)
-        timesteps = scheduler.timesteps
+        timesteps = _solver_steps(scheduler)
 
         if (
             skip_initial_inference_steps < 0
@@ -186,10 +193,23 @@ def retrieve_timesteps(
         ]
         scheduler.set_timesteps(timesteps=timesteps, device=device, **kwargs)
         num_inference_steps = len(timesteps)
+        timesteps = scheduler.timesteps
 
     return timesteps, num_inference_steps
 
 
+def _solver_steps(scheduler) -> torch.Tensor:
+    """The noise levels the scheduler steps through, each listed once.
+
+    `RectifiedFlowScheduler.timesteps` repeats the intermediate noise levels for
+    solvers that evaluate the model twice per step, so steps are counted and
+    skipped on its `sigmas` instead.
+    """
+    if isinstance(scheduler, RectifiedFlowScheduler):
+        return scheduler.sigmas
+    return scheduler.timesteps
+
+
 @dataclass
 class ConditioningItem:
     """
@@ -231,6 +251,9 @@ class LTXVideoPipeline(DiffusionPipeline):
             A text conditioned `Transformer2DModel` to denoise the encoded image latents.
         scheduler ([`SchedulerMixin`]):
             A scheduler to be used in combination with `transformer` to denoise the encoded image latents.
+        prompt_embedding_cache ([`PromptEmbeddingCache`], *optional*):
+            Cache of text encoder outputs. Prompts found in it are not re-encoded, and the text encoder is not moved
+            to the execution device when every prompt of a call hits the cache.
     """
 
     bad_punct_regex = re.compile(
@@ -272,6 +295,7 @@ class LTXVideoPipeline(DiffusionPipeline):
         prompt_enhancer_llm_model: AutoModelForCausalLM,
         prompt_enhancer_llm_tokenizer: AutoTokenizer,
         allowed_inference_steps: Optional[List[float]] = None,
+        prompt_embedding_cache: Optional[PromptEmbeddingCache] = None,
     ):
         super().__init__()
 
@@ -294,6 +318,18 @@ class LTXVideoPipeline(DiffusionPipeline):
         self.image_processor = VaeImageProcessor(vae_scale_factor=self.vae_scale_factor)
 
         self.allowed_inference_steps = allowed_inference_steps
+        self.prompt_embedding_cache = prompt_embedding_cache
+        self.residual_cache_stats: Optional[Dict[str, int]] = None
+        # Fitted on first use, per `vae_per_channel_normalize` setting
+        self._latent_previewers: Dict[bool, LatentPreviewer] = {}
+
+    def latent_previewer(self, vae_per_channel_normalize: bool) -> LatentPreviewer:
+        """The latent to RGB map of the pipeline's VAE, fitted on first use."""
+        if vae_per_channel_normalize not in self._latent_previewers:
+            self._latent_previewers[vae_per_channel_normalize] = LatentPreviewer.fit(
+                self.vae, vae_per_channel_normalize=vae_per_channel_normalize
+            )
+        return self._latent_previewers[vae_per_channel_normalize]
 
     def mask_text_embeddings(self, emb, mask):
         if emb.shape[0] == 1:
@@ -355,57 +391,25 @@ class LTXVideoPipeline(DiffusionPipeline):
         else:
             batch_size = prompt_embeds.shape[0]
 
+        if self.text_encoder is not None:
+            dtype = self.text_encoder.dtype
+        elif self.transformer is not None:
+            dtype = self.transformer.dtype
+        else:
+            dtype = None
+
         # See Section 3.1. of the paper.
         max_length = (
             text_encoder_max_tokens  # TPU supports only lengths multiple of 128
         )
         if prompt_embeds is None:
-            assert (
-                self.text_encoder is not None
-            ), "You should provide either prompt_embeds or self.text_encoder should not be None,"
-            text_enc_device = next(self.text_encoder.parameters()).device
             prompt = self._text_preprocessing(prompt)
-            text_inputs = self.tokenizer(
-                prompt,
-                padding="max_length",
-                max_length=max_length,
-                truncation=True,
-                add_special_tokens=True,
-                return_tensors="pt",
+            prompt_embeds, prompt_attention_mask = self._encode_texts(
+                prompt, max_length, dtype
             )
-            text_input_ids = text_inputs.input_ids
-            untruncated_ids = self.tokenizer(
-                prompt, padding="longest", return_tensors="pt"
-            ).input_ids
-
-            if untruncated_ids.shape[-1] >= text_input_ids.shape[
-                -1
-            ] and not torch.equal(text_input_ids, untruncated_ids):
-                removed_text = self.tokenizer.batch_decode(
-                    untruncated_ids[:, max_length - 1 : -1]
-                )
-                logger.warning(
-                    "The following part of your input was truncated because CLIP can only handle sequences up to"
-                    f" {max_length} tokens: {removed_text}"
-                )
-
-            prompt_attention_mask = text_inputs.attention_mask
-            prompt_attention_mask = prompt_attention_mask.to(text_enc_device)
-            prompt_attention_mask = prompt_attention_mask.to(device)
-
-            prompt_embeds = self.text_encoder(
-                text_input_ids.to(text_enc_device), attention_mask=prompt_attention_mask
-            )
-            prompt_embeds = prompt_embeds[0]
-
-        if self.text_encoder is not None:
-            dtype = self.text_encoder.dtype
-        elif self.transformer is not None:
-            dtype = self.transformer.dtype
-        else:
-            dtype = None
 
         prompt_embeds = prompt_embeds.to(dtype=dtype, device=device)
+        prompt_attention_mask = prompt_attention_mask.to(device)
 
         bs_embed, seq_len, _ = prompt_embeds.shape
         # duplicate text embeddings and attention mask for each generation per prompt, using mps friendly method
@@ -423,25 +427,9 @@ class LTXVideoPipeline(DiffusionPipeline):
             uncond_tokens = self._text_preprocessing(negative_prompt)
             uncond_tokens = uncond_tokens * batch_size
             max_length = prompt_embeds.shape[1]
-            uncond_input = self.tokenizer(
-                uncond_tokens,
-                padding="max_length",
-                max_length=max_length,
-                truncation=True,
-                return_attention_mask=True,
-                add_special_tokens=True,
-                return_tensors="pt",
-            )
-            negative_prompt_attention_mask = uncond_input.attention_mask
-            negative_prompt_attention_mask = negative_prompt_attention_mask.to(
-                text_enc_device
-            )
-
-            negative_prompt_embeds = self.text_encoder(
-                uncond_input.input_ids.to(text_enc_device),
-                attention_mask=negative_prompt_attention_mask,
+            negative_prompt_embeds, negative_prompt_attention_mask = self._encode_texts(
+                uncond_tokens, max_length, dtype
             )
-            negative_prompt_embeds = negative_prompt_embeds[0]
 
         if do_classifier_free_guidance:
             # duplicate unconditional embeddings for each generation per prompt, using mps friendly method
@@ -458,6 +446,7 @@ class LTXVideoPipeline(DiffusionPipeline):
                 batch_size * num_images_per_prompt, seq_len, -1
             )
 
+            negative_prompt_attention_mask = negative_prompt_attention_mask.to(device)
             negative_prompt_attention_mask = negative_prompt_attention_mask.repeat(
                 1, num_images_per_prompt
             )
@@ -475,6 +464,78 @@ class LTXVideoPipeline(DiffusionPipeline):
             negative_prompt_attention_mask,
         )
 
+    def _encode_texts(
+        self, texts: List[str], max_length: int, dtype: Optional[torch.dtype]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Runs the text encoder on a list of (preprocessed) texts, returning the embeddings and attention masks.
+        When a prompt embedding cache is set, cached texts are served from it and the text encoder is only moved
+        to the execution device and run for the texts that are missing.
+        """
+        cache = self.prompt_embedding_cache
+        results = [None] * len(texts)
+        if cache is not None:
+            keys = {
+                text: cache.make_key(text, self.tokenizer, max_length, dtype)
+                for text in texts
+            }
+            results = [cache.get(keys[text]) for text in texts]
+
+        # Each distinct missing text is encoded once, e.g. a negative prompt repeated over the batch
+        missing = list(
+            dict.fromkeys(text for text, res in zip(texts, results) if res is None)
+        )
+        if missing:
+            assert (
+                self.text_encoder is not None
+            ), "You should provide either prompt_embeds or self.text_encoder should not be None,"
+            self.text_encoder = self.text_encoder.to(self._execution_device)
+            text_enc_device = next(self.text_encoder.parameters()).device
+            text_inputs = self.tokenizer(
+                missing,
+                padding="max_length",
+                max_length=max_length,
+                truncation=True,
+                return_attention_mask=True,
+                add_special_tokens=True,
+                return_tensors="pt",
+            )
+            text_input_ids = text_inputs.input_ids
+            untruncated_ids = self.tokenizer(
+                missing, padding="longest", return_tensors="pt"
+            ).input_ids
+
+            if untruncated_ids.shape[-1] >= text_input_ids.shape[
+                -1
+            ] and not torch.equal(text_input_ids, untruncated_ids):
+                removed_text = self.tokenizer.batch_decode(
+                    untruncated_ids[:, max_length - 1 : -1]
+                )
+                logger.warning(
+                    "The following part of your input was truncated because CLIP can only handle sequences up to"
+                    f" {max_length} tokens: {removed_text}"
+                )
+
+            attention_mask = text_inputs.attention_mask.to(text_enc_device)
+            embeddings = self.text_encoder(
+                text_input_ids.to(text_enc_device), attention_mask=attention_mask
+            )[0]
+
+            encoded = {}
+            for j, text in enumerate(missing):
+                encoded[text] = (embeddings[j : j + 1], attention_mask[j : j + 1])
+                if cache is not None:
+                    cache.put(keys[text], *encoded[text])
+            results = [
+                res if res is not None else encoded[text]
+                for text, res in zip(texts, results)
+            ]
+
+        device = results[0][0].device
+        embeddings = torch.cat([res[0].to(device) for res in results], dim=0)
+        attention_mask = torch.cat([res[1].to(device) for res in results], dim=0)
+        return embeddings, attention_mask
+
     # Copied from diffusers.pipelines.stable_diffusion.pipeline_stable_diffusion.StableDiffusionPipeline.prepare_extra_step_kwargs
     def prepare_extra_step_kwargs(self, generator, eta):
         # prepare extra kwargs for the scheduler step, since not all schedulers have the same signature
@@ -791,6 +852,16 @@ class LTXVideoPipeline(DiffusionPipeline):
         stochastic_sampling: bool = False,
         media_items: Optional[torch.Tensor] = None,
         tone_map_compression_ratio: float = 0.0,
+        vae_decode_tile_size: Optional[int] = None,
+        vae_decode_memory_budget_gb: Optional[float] = None,
+        vae_decode_chunk_size: Optional[int] = None,
+        static_guidance_shapes: bool = False,
+        residual_cache_threshold: float = 0.0,
+        token_merging: Optional[Union[TokenMerging, Dict[str, Any]]] = None,
+        profiler: Optional[StageProfiler] = None,
+        preview_callback: Optional[Callable[[int, torch.Tensor], None]] = None,
+        preview_every_n_steps: int = 1,
+        cancellation_token: Optional[CancellationToken] = None,
         **kwargs,
     ) -> Union[ImagePipelineOutput, Tuple]:
         """
@@ -858,8 +929,8 @@ class LTXVideoPipeline(DiffusionPipeline):
             callback_on_step_end (`Callable`, *optional*):
                 A function that calls at the end of each denoising steps during the inference. The function is called
                 with the following arguments: `callback_on_step_end(self: DiffusionPipeline, step: int, timestep: int,
-                callback_kwargs: Dict)`. `callback_kwargs` will include a list of all tensors as specified by
-                `callback_on_step_end_tensor_inputs`.
+                callback_kwargs: Dict)`. `callback_kwargs` holds `num_branches`, the number of guidance branches the
+                step ran, and when a `profiler` is given, the `seconds` and `peak_memory_bytes` of the step.
             use_resolution_binning (`bool` defaults to `True`):
                 If set to `True`, the requested height and width are first mapped to the closest resolutions using
                 `ASPECT_RATIO_1024_BIN`. After the produced latents are decoded into images, they are resized back to
@@ -874,6 +945,47 @@ class LTXVideoPipeline(DiffusionPipeline):
                 The input media item used for image-to-image / video-to-video.
             tone_map_compression_ratio: compression ratio for tone mapping, defaults to 0.0.
                         If set to 0.0, no tone mapping is applied. If set to 1.0 - full compression is applied.
+            vae_decode_tile_size (`int`, *optional*):
+                If set, the latents are decoded in overlapping spatial tiles of this size (in latent pixels) to reduce
+                the peak memory of the VAE decoder.
+            vae_decode_memory_budget_gb (`float`, *optional*):
+                If set (and `vae_decode_tile_size` is not), the decode tile size is chosen so that the estimated
+                decoder activations fit in this budget.
+            vae_decode_chunk_size (`int`, *optional*):
+                If set, the video is decoded this many latent frames at a time and `images` is an iterator over the
+                decoded frame chunks of shape (batch_size, channels, frames, height, width). Each chunk is only
+                decoded when it is requested, so the caller can hand a chunk to the video encoder while the next one
+                decodes, and the whole decoded video is never held in memory. Cannot be combined with tiled
+                decoding.
+            static_guidance_shapes (`bool`, *optional*, defaults to `False`):
+                If set to `True`, every denoising step runs all the guidance branches (unconditional, text and
+                perturbed) used by any step of the schedule, so the transformer input shapes do not change when CFG
+                or STG are switched off for some timesteps. Useful with a compiled transformer, at the cost of the
+                extra branches on those timesteps.
+            residual_cache_threshold (`float`, *optional*, defaults to `0.0`):
+                If above 0, the transformer blocks are skipped on the steps where their timestep-modulated input
+                changed, relative to the last step they were evaluated, by less than this accumulated amount, and
+                their cached residual is reused instead. Values around 0.05 to 0.15 skip a large fraction of the late
+                steps of long schedules; higher values trade more fidelity for speed. The cache hits and misses of
+                the run are logged and kept in `self.residual_cache_stats`.
+            token_merging (`TokenMerging` or `dict`, *optional*):
+                If given, the transformer blocks merge similar neighbouring tokens before their attention and
+                feed-forward layers and copy the results back to every token, which cuts the attention cost of long
+                clips. A dict holds the arguments of [`TokenMerging`], e.g. `{"ratio": 0.5, "min_timestep": 0.3}`.
+            profiler (`StageProfiler`, *optional*):
+                If given, the wall time and memory of prompt enhancement, text encoding, conditioning encoding, each
+                denoising step (named by its number of guidance branches) and VAE decoding are recorded in it.
+            preview_callback (`Callable`, *optional*):
+                If given, called every `preview_every_n_steps` denoising steps as `preview_callback(step, frames)`
+                with a preview of the clean video predicted at that step: uint8 CPU frames of shape
+                `(batch, latent frames, latent height, latent width, 3)`. The frames are projected from the latents
+                by [`LatentPreviewer`], without decoding them, so previews cost next to nothing. The projection is
+                fitted to the VAE on the first previewed call, see `latent_previewer()`.
+            preview_every_n_steps (`int`, *optional*, defaults to 1):
+                Number of denoising steps between two previews.
+            cancellation_token (`CancellationToken`, *optional*):
+                Checked before every denoising step. Once cancelled, the run drops its latents, offloads the
+                transformer when `offload_to_cpu` is set, empties the CUDA cache and raises `GenerationCancelled`.
         Examples:
 
         Returns:
@@ -896,6 +1008,19 @@ class LTXVideoPipeline(DiffusionPipeline):
             prompt_attention_mask,
             negative_prompt_attention_mask,
         )
+        if vae_decode_chunk_size is not None and output_type != "latent":
+            if vae_decode_tile_size is not None or vae_decode_memory_budget_gb:
+                raise ValueError(
+                    "`vae_decode_chunk_size` cannot be combined with tiled decoding"
+                )
+            if not is_video or not isinstance(self.vae, CausalVideoAutoencoder):
+                raise ValueError(
+                    "Streaming decoding is only supported for videos of a CausalVideoAutoencoder"
+                )
+        if isinstance(token_merging, dict):
+            token_merging = TokenMerging(**token_merging)
+        if cancellation_token is not None:
+            cancellation_token.raise_if_cancelled()
 
         # 2. Default height and width to transformer
         if prompt is not None and isinstance(prompt, str):
@@ -1000,45 +1125,44 @@ class LTXVideoPipeline(DiffusionPipeline):
                 skip_block_list = new_skip_block_list
 
         if enhance_prompt:
-            self.prompt_enhancer_image_caption_model = (
-                self.prompt_enhancer_image_caption_model.to(self._execution_device)
-            )
-            self.prompt_enhancer_llm_model = self.prompt_enhancer_llm_model.to(
-                self._execution_device
-            )
+            with profile_stage(profiler, "prompt_enhancement"):
+                self.prompt_enhancer_image_caption_model = (
+                    self.prompt_enhancer_image_caption_model.to(self._execution_device)
+                )
+                self.prompt_enhancer_llm_model = self.prompt_enhancer_llm_model.to(
+                    self._execution_device
+                )
+
+                prompt = generate_cinematic_prompt(
+                    self.prompt_enhancer_image_caption_model,
+                    self.prompt_enhancer_image_caption_processor,
+                    self.prompt_enhancer_llm_model,
+                    self.prompt_enhancer_llm_tokenizer,
+                    prompt,
+                    conditioning_items,
+                    max_new_tokens=text_encoder_max_tokens,
+                )
 
-            prompt = generate_cinematic_prompt(
-                self.prompt_enhancer_image_caption_model,
-                self.prompt_enhancer_image_caption_processor,
-                self.prompt_enhancer_llm_model,
-                self.prompt_enhancer_llm_tokenizer,
+        # 3. Encode input prompt (the text encoder is moved to the device only on cache misses)
+        with profile_stage(profiler, "text_encoding"):
+            (
+                prompt_embeds,
+                prompt_attention_mask,
+                negative_prompt_embeds,
+                negative_prompt_attention_mask,
+            ) = self.encode_prompt(
                 prompt,
-                conditioning_items,
-                max_new_tokens=text_encoder_max_tokens,
+                True,
+                negative_prompt=negative_prompt,
+                num_images_per_prompt=num_images_per_prompt,
+                device=device,
+                prompt_embeds=prompt_embeds,
+                negative_prompt_embeds=negative_prompt_embeds,
+                prompt_attention_mask=prompt_attention_mask,
+                negative_prompt_attention_mask=negative_prompt_attention_mask,
+                text_encoder_max_tokens=text_encoder_max_tokens,
             )
 
-        # 3. Encode input prompt
-        if self.text_encoder is not None:
-            self.text_encoder = self.text_encoder.to(self._execution_device)
-
-        (
-            prompt_embeds,
-            prompt_attention_mask,
-            negative_prompt_embeds,
-            negative_prompt_attention_mask,
-        ) = self.encode_prompt(
-            prompt,
-            True,
-            negative_prompt=negative_prompt,
-            num_images_per_prompt=num_images_per_prompt,
-            device=device,
-            prompt_embeds=prompt_embeds,
-            negative_prompt_embeds=negative_prompt_embeds,
-            prompt_attention_mask=prompt_attention_mask,
-            negative_prompt_attention_mask=negative_prompt_attention_mask,
-            text_encoder_max_tokens=text_encoder_max_tokens,
-        )
-
         if offload_to_cpu and self.text_encoder is not None:
             self.text_encoder = self.text_encoder.cpu()
 
@@ -1070,30 +1194,31 @@ class LTXVideoPipeline(DiffusionPipeline):
         )
         # 4. Prepare the initial latents using the provided media and conditioning items
 
-        # Prepare the initial latents tensor, shape = (b, c, f, h, w)
-        latents = self.prepare_latents(
-            latents=latents,
-            media_items=media_items,
-            timestep=timesteps[0],
-            latent_shape=latent_shape,
-            dtype=prompt_embeds.dtype,
-            device=device,
-            generator=generator,
-            vae_per_channel_normalize=vae_per_channel_normalize,
-        )
-
-        # Update the latents with the conditioning items and patchify them into (b, n, c)
-        latents, pixel_coords, conditioning_mask, num_cond_latents = (
-            self.prepare_conditioning(
-                conditioning_items=conditioning_items,
-                init_latents=latents,
-                num_frames=num_frames,
-                height=height,
-                width=width,
-                vae_per_channel_normalize=vae_per_channel_normalize,
+        with profile_stage(profiler, "conditioning_encode"):
+            # Prepare the initial latents tensor, shape = (b, c, f, h, w)
+            latents = self.prepare_latents(
+                latents=latents,
+                media_items=media_items,
+                timestep=timesteps[0],
+                latent_shape=latent_shape,
+                dtype=prompt_embeds.dtype,
+                device=device,
                 generator=generator,
+                vae_per_channel_normalize=vae_per_channel_normalize,
+            )
+
+            # Update the latents with the conditioning items and patchify them into (b, n, c)
+            latents, pixel_coords, conditioning_mask, num_cond_latents = (
+                self.prepare_conditioning(
+                    conditioning_items=conditioning_items,
+                    init_latents=latents,
+                    num_frames=num_frames,
+                    height=height,
+                    width=width,
+                    vae_per_channel_normalize=vae_per_channel_normalize,
+                    generator=generator,
+                )
             )
-        )
         init_latents = latents.clone()  # Used for image_cond_noise_update
 
         # 6. Prepare extra step kwargs. TODO: Logic should ideally just be moved out of the pipeline
@@ -1106,188 +1231,249 @@ class LTXVideoPipeline(DiffusionPipeline):
 
         orig_conditioning_mask = conditioning_mask
 
-        # Befor compiling this code please be aware:
-        # This code might generate different input shapes if some timesteps have no STG or CFG.
-        # This means that the codes might need to be compiled mutliple times.
-        # To avoid that, use the same STG and CFG values for all timesteps.
+        # The latent grid and the frame rate are fixed for the whole generation
+        fractional_coords = pixel_coords.to(torch.float32, copy=True)
+        fractional_coords[:, 0] = fractional_coords[:, 0] * (1.0 / frame_rate)
+
+        # The transformer inputs of each guidance configuration (prompt embeddings, positional
+        # inputs, skip layer masks, latent buffers) are built once, not at every step.
+        # Without `static_guidance_shapes`, steps with different CFG/STG settings run
+        # different batch sizes, so a compiled transformer is compiled once per configuration.
+        if orig_conditioning_mask is not None and is_video:
+            assert num_images_per_prompt == 1
+        step_plan = DenoisingStepPlan(
+            guidance_scale,
+            stg_scale,
+            skip_block_list,
+            static_shapes=static_guidance_shapes,
+        )
+        step_plan.prepare(
+            self.transformer,
+            batch_size,
+            latents,
+            prompt_embeds_batch,
+            prompt_attention_mask_batch,
+            fractional_coords,
+            conditioning_mask=orig_conditioning_mask,
+            batch_conditioning_mask=is_video,
+            residual_cache_threshold=residual_cache_threshold,
+        )
+
+        # Choose the appropriate context manager based on `mixed_precision`
+        if mixed_precision:
+            context_manager = torch.autocast(device.type, dtype=torch.bfloat16)
+        else:
+            context_manager = nullcontext()  # Dummy context manager
 
         with self.progress_bar(total=num_inference_steps) as progress_bar:
             for i, t in enumerate(timesteps):
-                do_classifier_free_guidance = guidance_scale[i] > 1.0
-                do_spatio_temporal_guidance = stg_scale[i] > 0
-                do_rescaling = rescaling_scale[i] != 1.0
-
-                num_conds = 1
-                if do_classifier_free_guidance:
-                    num_conds += 1
-                if do_spatio_temporal_guidance:
-                    num_conds += 1
-
-                if do_classifier_free_guidance and do_spatio_temporal_guidance:
-                    indices = slice(batch_size * 0, batch_size * 3)
-                elif do_classifier_free_guidance:
-                    indices = slice(batch_size * 0, batch_size * 2)
-                elif do_spatio_temporal_guidance:
-                    indices = slice(batch_size * 1, batch_size * 3)
-                else:
-                    indices = slice(batch_size * 1, batch_size * 2)
-
-                # Prepare skip layer masks
-                skip_layer_mask: Optional[torch.Tensor] = None
-                if do_spatio_temporal_guidance:
-                    if skip_block_list is not None:
-                        skip_layer_mask = self.transformer.create_skip_layer_mask(
-                            batch_size, num_conds, num_conds - 1, skip_block_list[i]
-                        )
-
-                batch_pixel_coords = torch.cat([pixel_coords] * num_conds)
-                conditioning_mask = orig_conditioning_mask
-                if conditioning_mask is not None and is_video:
-                    assert num_images_per_prompt == 1
-                    conditioning_mask = torch.cat([conditioning_mask] * num_conds)
-                fractional_coords = batch_pixel_coords.to(torch.float32)
-                fractional_coords[:, 0] = fractional_coords[:, 0] * (1.0 / frame_rate)
-
-                if conditioning_mask is not None and image_cond_noise_scale > 0.0:
-                    latents = self.add_noise_to_image_conditioning_latents(
-                        t,
-                        init_latents,
-                        latents,
-                        image_cond_noise_scale,
-                        orig_conditioning_mask,
-                        generator,
+                if cancellation_token is not None and cancellation_token.cancelled:
+                    break
+                group = step_plan.step_groups[i]
+                # Steps are named by their number of guidance branches, which sets their cost
+                step_stage = (
+                    profiler.begin(
+                        f"denoising_step[{group.num_conds} branches]",
+                        step=i,
+                        timestep=float(t),
                     )
-
-                latent_model_input = (
-                    torch.cat([latents] * num_conds) if num_conds > 1 else latents
-                )
-                latent_model_input = self.scheduler.scale_model_input(
-                    latent_model_input, t
+                    if profiler is not None
+                    else None
                 )
+                # Close the stage even if the step raises, so a reused profiler's
+                # stack does not keep a stale stage
+                try:
+                    do_classifier_free_guidance = group.do_classifier_free_guidance
+                    do_spatio_temporal_guidance = group.do_spatio_temporal_guidance
+                    do_rescaling = rescaling_scale[i] != 1.0
+                    conditioning_mask = group.conditioning_mask
+
+                    if conditioning_mask is not None and image_cond_noise_scale > 0.0:
+                        latents = self.add_noise_to_image_conditioning_latents(
+                            t,
+                            init_latents,
+                            latents,
+                            image_cond_noise_scale,
+                            orig_conditioning_mask,
+                            generator,
+                        )
 
-                current_timestep = t
-                if not torch.is_tensor(current_timestep):
-                    # TODO: this requires sync between CPU and GPU. So try to pass timesteps as tensors if you can
-                    # This would be a good case for the `match` statement (Python 3.10+)
-                    is_mps = latent_model_input.device.type == "mps"
-                    if isinstance(current_timestep, float):
-                        dtype = torch.float32 if is_mps else torch.float64
-                    else:
-                        dtype = torch.int32 if is_mps else torch.int64
-                    current_timestep = torch.tensor(
-                        [current_timestep],
-                        dtype=dtype,
-                        device=latent_model_input.device,
-                    )
-                elif len(current_timestep.shape) == 0:
-                    current_timestep = current_timestep[None].to(
-                        latent_model_input.device
-                    )
-                # broadcast to batch dimension in a way that's compatible with ONNX/Core ML
-                current_timestep = current_timestep.expand(
-                    latent_model_input.shape[0]
-                ).unsqueeze(-1)
-
-                if conditioning_mask is not None:
-                    # Conditioning latents have an initial timestep and noising level of (1.0 - conditioning_mask)
-                    # and will start to be denoised when the current timestep is lower than their conditioning timestep.
-                    current_timestep = torch.min(
-                        current_timestep, 1.0 - conditioning_mask
+                    latent_model_input = step_plan.fill_latent_model_input(
+                        group, self.scheduler.scale_model_input(latents, t)
                     )
 
-                # Choose the appropriate context manager based on `mixed_precision`
-                if mixed_precision:
-                    context_manager = torch.autocast(device.type, dtype=torch.bfloat16)
-                else:
-                    context_manager = nullcontext()  # Dummy context manager
-
-                # predict noise model_output
-                with context_manager:
-                    noise_pred = self.transformer(
-                        latent_model_input.to(self.transformer.dtype),
-                        indices_grid=fractional_coords,
-                        encoder_hidden_states=prompt_embeds_batch[indices].to(
-                            self.transformer.dtype
-                        ),
-                        encoder_attention_mask=prompt_attention_mask_batch[indices],
-                        timestep=current_timestep,
-                        skip_layer_mask=skip_layer_mask,
-                        skip_layer_strategy=skip_layer_strategy,
-                        return_dict=False,
-                    )[0]
-
-                # perform guidance
-                if do_spatio_temporal_guidance:
-                    noise_pred_text, noise_pred_text_perturb = noise_pred.chunk(
-                        num_conds
-                    )[-2:]
-                if do_classifier_free_guidance:
-                    noise_pred_uncond, noise_pred_text = noise_pred.chunk(num_conds)[:2]
-
-                    if cfg_star_rescale:
-                        # Rescales the unconditional noise prediction using the projection of the conditional prediction onto it:
-                        # α = (⟨ε_text, ε_uncond⟩ / ||ε_uncond||²), then ε_uncond ← α * ε_uncond
-                        # where ε_text is the conditional noise prediction and ε_uncond is the unconditional one.
-                        positive_flat = noise_pred_text.view(batch_size, -1)
-                        negative_flat = noise_pred_uncond.view(batch_size, -1)
-                        dot_product = torch.sum(
-                            positive_flat * negative_flat, dim=1, keepdim=True
+                    current_timestep = t
+                    if not torch.is_tensor(current_timestep):
+                        # TODO: this requires sync between CPU and GPU. So try to pass timesteps as tensors if you can
+                        # This would be a good case for the `match` statement (Python 3.10+)
+                        is_mps = latent_model_input.device.type == "mps"
+                        if isinstance(current_timestep, float):
+                            dtype = torch.float32 if is_mps else torch.float64
+                        else:
+                            dtype = torch.int32 if is_mps else torch.int64
+                        current_timestep = torch.tensor(
+                            [current_timestep],
+                            dtype=dtype,
+                            device=latent_model_input.device,
                         )
-                        squared_norm = (
-                            torch.sum(negative_flat**2, dim=1, keepdim=True) + 1e-8
+                    elif len(current_timestep.shape) == 0:
+                        current_timestep = current_timestep[None].to(
+                            latent_model_input.device
+                        )
+                    # broadcast to batch dimension in a way that's compatible with ONNX/Core ML
+                    current_timestep = current_timestep.expand(
+                        latent_model_input.shape[0]
+                    ).unsqueeze(-1)
+
+                    if conditioning_mask is not None:
+                        # Conditioning latents have an initial timestep and noising level of (1.0 - conditioning_mask)
+                        # and will start to be denoised when the current timestep is lower than their conditioning timestep.
+                        current_timestep = torch.min(
+                            current_timestep, 1.0 - conditioning_mask
                         )
-                        alpha = dot_product / squared_norm
-                        noise_pred_uncond = alpha * noise_pred_uncond
 
-                    noise_pred = noise_pred_uncond + guidance_scale[i] * (
-                        noise_pred_text - noise_pred_uncond
-                    )
-                elif do_spatio_temporal_guidance:
-                    noise_pred = noise_pred_text
-                if do_spatio_temporal_guidance:
-                    noise_pred = noise_pred + stg_scale[i] * (
-                        noise_pred_text - noise_pred_text_perturb
-                    )
-                    if do_rescaling and stg_scale[i] > 0.0:
-                        noise_pred_text_std = noise_pred_text.view(batch_size, -1).std(
-                            dim=1, keepdim=True
+                    # predict noise model_output
+                    with context_manager:
+                        noise_pred = self.transformer(
+                            latent_model_input,
+                            indices_grid=group.indices_grid,
+                            encoder_hidden_states=group.encoder_hidden_states,
+                            encoder_attention_mask=group.encoder_attention_mask,
+                            timestep=current_timestep,
+                            skip_layer_mask=group.skip_layer_mask,
+                            skip_layer_strategy=skip_layer_strategy,
+                            freqs_cis=group.freqs_cis,
+                            residual_cache=group.residual_cache,
+                            token_merging=token_merging,
+                            return_dict=False,
+                        )[0]
+
+                    # perform guidance
+                    noise_pred_chunks = noise_pred.chunk(group.num_conds)
+                    noise_pred_text = noise_pred_chunks[group.text_index]
+                    if do_spatio_temporal_guidance:
+                        noise_pred_text_perturb = noise_pred_chunks[group.perturb_index]
+                    if do_classifier_free_guidance:
+                        noise_pred_uncond = noise_pred_chunks[group.uncond_index]
+
+                        if cfg_star_rescale:
+                            # Rescales the unconditional noise prediction using the projection of the conditional prediction onto it:
+                            # α = (⟨ε_text, ε_uncond⟩ / ||ε_uncond||²), then ε_uncond ← α * ε_uncond
+                            # where ε_text is the conditional noise prediction and ε_uncond is the unconditional one.
+                            positive_flat = noise_pred_text.view(batch_size, -1)
+                            negative_flat = noise_pred_uncond.view(batch_size, -1)
+                            dot_product = torch.sum(
+                                positive_flat * negative_flat, dim=1, keepdim=True
+                            )
+                            squared_norm = (
+                                torch.sum(negative_flat**2, dim=1, keepdim=True) + 1e-8
+                            )
+                            alpha = dot_product / squared_norm
+                            noise_pred_uncond = alpha * noise_pred_uncond
+
+                        noise_pred = noise_pred_uncond + guidance_scale[i] * (
+                            noise_pred_text - noise_pred_uncond
                         )
-                        noise_pred_std = noise_pred.view(batch_size, -1).std(
-                            dim=1, keepdim=True
+                    else:
+                        noise_pred = noise_pred_text
+                    if do_spatio_temporal_guidance:
+                        noise_pred = noise_pred + stg_scale[i] * (
+                            noise_pred_text - noise_pred_text_perturb
+                        )
+                        if do_rescaling and stg_scale[i] > 0.0:
+                            noise_pred_text_std = noise_pred_text.view(
+                                batch_size, -1
+                            ).std(dim=1, keepdim=True)
+                            noise_pred_std = noise_pred.view(batch_size, -1).std(
+                                dim=1, keepdim=True
+                            )
+
+                            factor = noise_pred_text_std / noise_pred_std
+                            factor = rescaling_scale[i] * factor + (
+                                1 - rescaling_scale[i]
+                            )
+
+                            noise_pred = noise_pred * factor.view(batch_size, 1, 1)
+
+                    current_timestep = current_timestep[:1]
+                    # learned sigma
+                    if (
+                        self.transformer.config.out_channels // 2
+                        == self.transformer.config.in_channels
+                    ):
+                        noise_pred = noise_pred.chunk(2, dim=1)[0]
+
+                    if (
+                        preview_callback is not None
+                        and (i + 1) % preview_every_n_steps == 0
+                    ):
+                        # Rectified flow predicts the velocity noise - x0, so x0 = x_t - t * velocity
+                        sigma = current_timestep.reshape(1, -1, 1).to(latents.dtype)
+                        predicted_latents = (latents - sigma * noise_pred)[
+                            :, num_cond_latents:
+                        ]
+                        preview_latents = self.patchifier.unpatchify(
+                            latents=predicted_latents,
+                            output_height=latent_height,
+                            output_width=latent_width,
+                            out_channels=predicted_latents.shape[-1]
+                            // math.prod(self.patchifier.patch_size),
+                        )
+                        preview_callback(
+                            i,
+                            self.latent_previewer(vae_per_channel_normalize)(
+                                preview_latents
+                            ),
                         )
 
-                        factor = noise_pred_text_std / noise_pred_std
-                        factor = rescaling_scale[i] * factor + (1 - rescaling_scale[i])
-
-                        noise_pred = noise_pred * factor.view(batch_size, 1, 1)
-
-                current_timestep = current_timestep[:1]
-                # learned sigma
-                if (
-                    self.transformer.config.out_channels // 2
-                    == self.transformer.config.in_channels
-                ):
-                    noise_pred = noise_pred.chunk(2, dim=1)[0]
-
-                # compute previous image: x_t -> x_t-1
-                latents = self.denoising_step(
-                    latents,
-                    noise_pred,
-                    current_timestep,
-                    orig_conditioning_mask,
-                    t,
-                    extra_step_kwargs,
-                    stochastic_sampling=stochastic_sampling,
-                )
+                    # compute previous image: x_t -> x_t-1
+                    latents = self.denoising_step(
+                        latents,
+                        noise_pred,
+                        current_timestep,
+                        orig_conditioning_mask,
+                        t,
+                        extra_step_kwargs,
+                        stochastic_sampling=stochastic_sampling,
+                    )
 
-                # call the callback, if provided
-                if i == len(timesteps) - 1 or (
-                    (i + 1) > num_warmup_steps and (i + 1) % self.scheduler.order == 0
-                ):
-                    progress_bar.update()
+                    # call the callback, if provided
+                    if i == len(timesteps) - 1 or (
+                        (i + 1) > num_warmup_steps
+                        and (i + 1) % self.scheduler.order == 0
+                    ):
+                        progress_bar.update()
+                finally:
+                    step_record = (
+                        profiler.end(step_stage) if step_stage is not None else None
+                    )
 
+                step_stats = {"num_branches": group.num_conds}
+                if step_record is not None:
+                    step_stats.update(
+                        seconds=step_record.seconds,
+                        peak_memory_bytes=step_record.peak_memory_bytes,
+                    )
                 if callback_on_step_end is not None:
-                    callback_on_step_end(self, i, t, {})
+                    callback_on_step_end(self, i, t, step_stats)
+
+        if cancellation_token is not None and cancellation_token.cancelled:
+            # Release the device memory of the run before handing control back
+            latents = init_latents = noise_pred = latent_model_input = None
+            step_plan = None
+            if offload_to_cpu:
+                self.transformer = self.transformer.cpu()
+            if device.type == "cuda":
+                torch.cuda.empty_cache()
+            self.maybe_free_model_hooks()
+            raise GenerationCancelled(f"The generation was cancelled at step {i}")
+
+        self.residual_cache_stats = step_plan.residual_cache_stats()
+        if self.residual_cache_stats is not None:
+            logger.info(
+                f"Residual cache: {self.residual_cache_stats['hits']} hits, "
+                f"{self.residual_cache_stats['misses']} misses"
+            )
 
         if offload_to_cpu:
             self.transformer = self.transformer.cpu()
@@ -1324,15 +1510,32 @@ class LTXVideoPipeline(DiffusionPipeline):
             else:
                 decode_timestep = None
             latents = self.tone_map_latents(latents, tone_map_compression_ratio)
-            image = vae_decode(
-                latents,
-                self.vae,
-                is_video,
-                vae_per_channel_normalize=kwargs["vae_per_channel_normalize"],
-                timestep=decode_timestep,
-            )
+            if vae_decode_chunk_size is not None:
+                image = self._stream_decode(
+                    latents,
+                    vae_decode_chunk_size,
+                    output_type,
+                    profiler,
+                    vae_per_channel_normalize=kwargs["vae_per_channel_normalize"],
+                    timestep=decode_timestep,
+                )
+            else:
+                with profile_stage(profiler, "vae_decode"):
+                    image = vae_decode(
+                        latents,
+                        self.vae,
+                        is_video,
+                        vae_per_channel_normalize=kwargs["vae_per_channel_normalize"],
+                        timestep=decode_timestep,
+                        tile_size=vae_decode_tile_size,
+                        memory_budget_bytes=(
+                            int(vae_decode_memory_budget_gb * 1024**3)
+                            if vae_decode_memory_budget_gb
+                            else None
+                        ),
+                    )
 
-            image = self.image_processor.postprocess(image, output_type=output_type)
+                image = self.image_processor.postprocess(image, output_type=output_type)
 
         else:
             image = latents
@@ -1345,6 +1548,24 @@ class LTXVideoPipeline(DiffusionPipeline):
 
         return ImagePipelineOutput(images=image)
 
+    @torch.no_grad()
+    def _stream_decode(
+        self,
+        latents: torch.Tensor,
+        chunk_size: int,
+        output_type: str,
+        profiler: Optional[StageProfiler],
+        **decode_kwargs,
+    ) -> Iterator[torch.Tensor]:
+        """Yields the postprocessed video chunk by chunk, decoding each chunk when it is requested."""
+        chunks = vae_decode_streaming(latents, self.vae, chunk_size, **decode_kwargs)
+        while True:
+            with profile_stage(profiler, "vae_decode"):
+                frames = next(chunks, None)
+            if frames is None:
+                return
+            yield self.image_processor.postprocess(frames, output_type=output_type)
+
     def denoising_step(
         self,
         latents: torch.Tensor,
@@ -1862,13 +2083,16 @@ class LTXMultiScalePipeline:
         kwargs["width"] = downscaled_width
         kwargs["height"] = downscaled_height
         kwargs.update(**first_pass)
-        result = self.video_pipeline(*args, **kwargs)
+        profiler = kwargs.get("profiler")
+        with profile_stage(profiler, "first_pass"):
+            result = self.video_pipeline(*args, **kwargs)
         latents = result.images
 
-        upsampled_latents = self._upsample_latents(self.latent_upsampler, latents)
-        upsampled_latents = adain_filter_latent(
-            latents=upsampled_latents, reference_latents=latents
-        )
+        with profile_stage(profiler, "latent_upsample"):
+            upsampled_latents = self._upsample_latents(self.latent_upsampler, latents)
+            upsampled_latents = adain_filter_latent(
+                latents=upsampled_latents, reference_latents=latents
+            )
 
         kwargs = original_kwargs
 
@@ -1878,18 +2102,21 @@ class LTXMultiScalePipeline:
         kwargs["height"] = downscaled_height * 2
         kwargs.update(**second_pass)
 
-        result = self.video_pipeline(*args, **kwargs)
+        with profile_stage(profiler, "second_pass"):
+            result = self.video_pipeline(*args, **kwargs)
         if original_output_type != "latent":
-            num_frames = result.images.shape[2]
-            videos = rearrange(result.images, "b c f h w -> (b f) c h w")
-
-            videos = F.interpolate(
-                videos,
-                size=(original_height, original_width),
-                mode="bilinear",
-                align_corners=False,
-            )
-            videos = rearrange(videos, "(b f) c h w -> b c f h w", f=num_frames)
-            result.images = videos
+            size = (original_height, original_width)
+            if isinstance(result.images, torch.Tensor):
+                result.images = _resize_frames(result.images, size)
+            else:
+                # Streamed chunks are resized as they are decoded
+                result.images = (_resize_frames(chunk, size) for chunk in result.images)
 
         return result
+
+
+def _resize_frames(videos: torch.Tensor, size: Tuple[int, int]) -> torch.Tensor:
+    num_frames = videos.shape[2]
+    videos = rearrange(videos, "b c f h w -> (b f) c h w")
+    videos = F.interpolate(videos, size=size, mode="bilinear", align_corners=False)
+    return rearrange(videos, "(b f) c h w -> b c f h w", f=num_frames)
@@ -0,0 +1,249 @@
+import gc
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+import torch
+from diffusers.utils import logging
+from torch import nn
+
+from ltx_video.inference import (
+    create_pipeline_from_config,
+    create_text_encoder,
+    create_tokenizer,
+    get_device,
+)
+from ltx_video.pipelines.prompt_embedding_cache import PromptEmbeddingCache
+from ltx_video.utils.quantization import INT8_DYNAMIC
+
+logger = logging.get_logger("LTX-Video")
+
+
+def _iter_modules(obj: Any) -> Iterator[nn.Module]:
+    """Yields the torch modules held by a pipeline, descending into wrapped pipelines."""
+    components = getattr(obj, "components", None)
+    if components is None:
+        components = vars(obj)
+    for value in components.values():
+        if isinstance(value, nn.Module):
+            yield value
+        elif hasattr(value, "components") or hasattr(value, "video_pipeline"):
+            yield from _iter_modules(value)
+
+
+def module_nbytes(module: nn.Module) -> int:
+    """Returns the number of bytes taken by a module's parameters and buffers."""
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+@dataclass
+class _RegistryEntry:
+    pipeline: Any
+    nbytes: int
+    shared_keys: Tuple[Hashable, ...] = field(default_factory=tuple)
+
+
+class PipelineRegistry:
+    """Keeps loaded pipelines resident across generations.
+
+    Pipelines are keyed by their pipeline config, device and whether prompt
+    enhancement is enabled, and evicted least recently used first once the
+    resident models exceed `memory_budget_bytes`. The T5 text encoder and
+    tokenizer are loaded once per device and shared by every pipeline that uses
+    the same `text_encoder_model_name_or_path`, so switching between configs does
+    not reload them. A single `PromptEmbeddingCache` is shared by all pipelines.
+
+    Args:
+        memory_budget_bytes: Upper bound on the bytes of weights kept resident. Defaults
+            to the total memory of the first GPU, or unbounded when running without CUDA.
+        prompt_embedding_cache: Cache of text encoder outputs handed to every pipeline.
+            Defaults to an in-memory cache.
+        pipeline_factory: Builds a pipeline from `(pipeline_config, device, enhance_prompt,
+            text_encoder, tokenizer, prompt_embedding_cache)`. Defaults to
+            `create_pipeline_from_config`.
+        text_encoder_factory: Loads a text encoder from `(name_or_path, device)`, plus
+            `precision` and `quantization_cache_dir` keywords for int8 pipelines.
+        tokenizer_factory: Loads a tokenizer from `name_or_path`.
+    """
+
+    def __init__(
+        self,
+        memory_budget_bytes: Optional[int] = None,
+        prompt_embedding_cache: Optional[PromptEmbeddingCache] = None,
+        pipeline_factory: Callable[..., Any] = create_pipeline_from_config,
+        text_encoder_factory: Callable[..., nn.Module] = create_text_encoder,
+        tokenizer_factory: Callable[..., Any] = create_tokenizer,
+    ):
+        if memory_budget_bytes is None and torch.cuda.is_available():
+            memory_budget_bytes = torch.cuda.get_device_properties(0).total_memory
+        self.memory_budget_bytes = memory_budget_bytes
+        self.prompt_embedding_cache = (
+            prompt_embedding_cache
+            if prompt_embedding_cache is not None
+            else PromptEmbeddingCache()
+        )
+        self.pipeline_factory = pipeline_factory
+        self.text_encoder_factory = text_encoder_factory
+        self.tokenizer_factory = tokenizer_factory
+
+        self._entries: "OrderedDict[Hashable, _RegistryEntry]" = OrderedDict()
+        # key -> [component, reference count, bytes]
+        self._shared: Dict[Hashable, list] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(
+        pipeline_config: dict, device: Optional[str], enhance_prompt: bool
+    ) -> Hashable:
+        return (
+            json.dumps(pipeline_config, sort_keys=True, default=str),
+            str(device),
+            bool(enhance_prompt),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def resident_bytes(self) -> int:
+        """Bytes of weights currently held, counting shared components once."""
+        with self._lock:
+            return sum(e.nbytes for e in self._entries.values()) + sum(
+                s[2] for s in self._shared.values()
+            )
+
+    def get(
+        self,
+        pipeline_config: dict,
+        device: Optional[str] = None,
+        enhance_prompt: bool = False,
+    ):
+        """Returns a loaded pipeline for the config, loading it on a miss."""
+        device = device or get_device()
+        key = self.make_key(pipeline_config, device, enhance_prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry.pipeline
+
+            self._evict_until(self._estimate_nbytes(pipeline_config), keep=None)
+
+            text_encoder_name = pipeline_config["text_encoder_model_name_or_path"]
+            encoder_key = ("text_encoder", text_encoder_name, str(device))
+            encoder_kwargs = {}
+            if pipeline_config.get("precision") == INT8_DYNAMIC:
+                # The quantized encoder is not shared with full precision pipelines
+                encoder_key += (INT8_DYNAMIC,)
+                encoder_kwargs = dict(
+                    precision=INT8_DYNAMIC,
+                    quantization_cache_dir=pipeline_config.get(
+                        "quantization_cache_dir"
+                    ),
+                )
+            tokenizer_key = ("tokenizer", text_encoder_name)
+            text_encoder = self._acquire_shared(
+                encoder_key,
+                lambda: self.text_encoder_factory(
+                    text_encoder_name, device, **encoder_kwargs
+                ),
+            )
+            tokenizer = self._acquire_shared(
+                tokenizer_key, lambda: self.tokenizer_factory(text_encoder_name)
+            )
+            try:
+                pipeline = self.pipeline_factory(
+                    pipeline_config,
+                    device=device,
+                    enhance_prompt=enhance_prompt,
+                    text_encoder=text_encoder,
+                    tokenizer=tokenizer,
+                    prompt_embedding_cache=self.prompt_embedding_cache,
+                )
+            except BaseException:
+                self._release_shared(encoder_key)
+                self._release_shared(tokenizer_key)
+                raise
+
+            shared_ids = {id(text_encoder)}
+            nbytes = sum(
+                module_nbytes(m)
+                for m in {id(m): m for m in _iter_modules(pipeline)}.values()
+                if id(m) not in shared_ids
+            )
+            self._entries[key] = _RegistryEntry(
+                pipeline, nbytes, (encoder_key, tokenizer_key)
+            )
+            logger.info(
+                f"Loaded pipeline ({nbytes / 1024**3:.2f} GB), "
+                f"{len(self._entries)} pipeline(s) resident"
+            )
+            self._evict_until(0, keep=key)
+            return pipeline
+
+    def release(self, key: Optional[Hashable] = None):
+        """Drops one pipeline by key, or every pipeline when no key is given."""
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for k in keys:
+                self._drop(k)
+        self._free_memory()
+
+    def _estimate_nbytes(self, pipeline_config: dict) -> int:
+        nbytes = 0
+        for name in ("checkpoint_path", "spatial_upscaler_model_path"):
+            path = pipeline_config.get(name)
+            if path and os.path.isfile(path):
+                nbytes += os.path.getsize(path)
+        return nbytes
+
+    def _evict_until(self, incoming_bytes: int, keep: Optional[Hashable]):
+        if self.memory_budget_bytes is None:
+            return
+        evicted = False
+        while self.resident_bytes + incoming_bytes > self.memory_budget_bytes:
+            victim = next((k for k in self._entries if k != keep), None)
+            if victim is None:
+                break
+            self._drop(victim)
+            evicted = True
+        if evicted:
+            self._free_memory()
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for shared_key in entry.shared_keys:
+            self._release_shared(shared_key)
+        logger.info(f"Evicted pipeline ({entry.nbytes / 1024**3:.2f} GB)")
+
+    def _acquire_shared(self, key: Hashable, load: Callable[[], Any]):
+        shared = self._shared.get(key)
+        if shared is None:
+            component = load()
+            nbytes = module_nbytes(component) if isinstance(component, nn.Module) else 0
+            shared = self._shared[key] = [component, 0, nbytes]
+        shared[1] += 1
+        return shared[0]
+
+    def _release_shared(self, key: Hashable):
+        shared = self._shared.get(key)
+        if shared is None:
+            return
+        shared[1] -= 1
+        if shared[1] <= 0:
+            del self._shared[key]
+
+    @staticmethod
+    def _free_memory():
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
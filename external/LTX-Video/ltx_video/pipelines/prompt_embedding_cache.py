@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import torch
+from diffusers.utils import logging
+from safetensors.torch import load_file, save_file
+
+logger = logging.get_logger("LTX-Video")
+
+
+class PromptEmbeddingCache:
+    """Two-tier cache of text encoder outputs for single prompts.
+
+    Entries are kept on the CPU in an in-memory LRU of `max_entries` items and,
+    when `cache_dir` is given, also written to disk as safetensors files so that
+    they survive process restarts. Keys are content hashes of the prompt text,
+    the tokenizer, the maximum number of tokens and the embedding dtype.
+
+    Args:
+        max_entries: Number of prompts kept in memory.
+        cache_dir: Optional directory for the on-disk tier.
+    """
+
+    def __init__(self, max_entries: int = 64, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Tuple[torch.Tensor, torch.Tensor]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, tokenizer, max_tokens: int, dtype: torch.dtype) -> str:
+        tokenizer_id = [
+            type(tokenizer).__name__,
+            getattr(tokenizer, "name_or_path", None),
+            len(tokenizer) if hasattr(tokenizer, "__len__") else None,
+        ]
+        payload = json.dumps([text, tokenizer_id, max_tokens, str(dtype)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.safetensors")
+
+    def get(self, key: str) -> Optional[Tuple[torch.Tensor, torch.Tensor]]:
+        """Returns `(embeddings, attention_mask)` for the key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.cache_dir is not None and os.path.isfile(self._path(key)):
+            tensors = load_file(self._path(key))
+            entry = (tensors["prompt_embeds"], tensors["attention_mask"])
+            with self._lock:
+                self._insert(key, entry)
+                self.hits += 1
+            return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, embeddings: torch.Tensor, attention_mask: torch.Tensor):
+        entry = (
+            embeddings.detach().to("cpu").contiguous(),
+            attention_mask.detach().to("cpu").contiguous(),
+        )
+        with self._lock:
+            self._insert(key, entry)
+
+        if self.cache_dir is not None:
+            # Write to a temporary file of its own first, so readers never see a
+            # partial file and concurrent writers of the same key do not collide.
+            # The disk tier is best-effort: a full or read-only directory only
+            # costs the next process a re-encode.
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(
+                    dir=self.cache_dir, suffix=".tmp", delete=False
+                ) as f:
+                    tmp_path = f.name
+                save_file(
+                    {"prompt_embeds": entry[0], "attention_mask": entry[1]}, tmp_path
+                )
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                logger.warning(f"Could not write prompt embedding cache entry: {e}")
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def clear(self):
+        """Empties the in-memory tier. Files on disk are left untouched."""
+        with self._lock:
+            self._memory.clear()
+
+    def _insert(self, key: str, entry: Tuple[torch.Tensor, torch.Tensor]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import torch
+
+# Bump when a change to the pipeline makes previously cached videos stale
+_CACHE_VERSION = 2
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _weights_identity(source: Optional[str]):
+    """Local weight files by path, size and modification time, so replaced weights miss.
+
+    Other sources (hub file names) are identified by name.
+    """
+    if source and os.path.isfile(source):
+        stat = os.stat(source)
+        return [os.path.realpath(source), stat.st_size, stat.st_mtime_ns]
+    return source
+
+
+def device_identity(device: str) -> str:
+    """The hardware and torch build behind `device`, which decide the exact kernels and their rounding.
+
+    Devices of the same model share an identity, so the workers of a multi-GPU
+    pool serve each other's results.
+    """
+    device = torch.device(device)
+    name = torch.cuda.get_device_name(device) if device.type == "cuda" else device.type
+    return f"{name} / torch {torch.__version__}"
+
+
+def _dir_nbytes(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class ResultCache:
+    """Content-addressed on-disk store of generated videos.
+
+    Each entry is a directory named by the request key and holding the files a
+    generation wrote. Entries are evicted least recently used first (by
+    directory modification time, refreshed on every hit) once the store grows
+    beyond `max_bytes`. Generations are seeded, so a request with the same key
+    produces the same video and can be served from the store.
+
+    Args:
+        cache_dir: Directory of the store.
+        max_bytes: Upper bound on the total size of the stored files.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 20 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(config, pipeline_config: dict, device: str) -> str:
+        """Hashes everything that determines the output of `infer` for `config` on `device`.
+
+        Media are hashed by content, so renamed or re-uploaded files still hit.
+        Local checkpoints also enter by size and modification time, so weights
+        replaced at the same path are not served stale videos.
+        The device enters through `device_identity`, so a video generated on
+        other hardware, whose kernels round differently, is not served. The
+        prompt is hashed as given: prompt enhancement samples a new prompt on
+        every run, so `infer` does not cache enhanced generations at all.
+        """
+        media = {
+            "input_media_path": (
+                _file_digest(config.input_media_path)
+                if config.input_media_path
+                else None
+            ),
+            "conditioning_media_paths": [
+                _file_digest(path) for path in config.conditioning_media_paths or []
+            ],
+        }
+        payload = {
+            "version": _CACHE_VERSION,
+            "media": media,
+            "prompt": config.prompt,
+            "negative_prompt": config.negative_prompt,
+            "device": device_identity(device),
+            "seed": config.seed,
+            "resolution": [config.height, config.width, config.num_frames],
+            "frame_rate": config.frame_rate,
+            "image_cond_noise_scale": config.image_cond_noise_scale,
+            # Tiled and chunked decoding round differently, so they change the pixels slightly
+            "vae_decode_memory_budget_gb": config.vae_decode_memory_budget_gb,
+            "vae_decode_chunk_size": config.vae_decode_chunk_size,
+            "conditioning_strengths": config.conditioning_strengths,
+            "conditioning_start_frames": config.conditioning_start_frames,
+            "pipeline_config": pipeline_config,
+            "weights": [
+                _weights_identity(pipeline_config.get(name))
+                for name in ("checkpoint_path", "spatial_upscaler_model_path")
+            ],
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[List[Path]]:
+        """Returns the stored files for the key, or None on a miss."""
+        entry_dir = self._entry_dir(key)
+        with self._lock:
+            try:
+                paths = sorted(Path(entry_dir).iterdir())
+                os.utime(entry_dir)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return paths
+
+    def put(self, key: str, paths: List[Path]) -> List[Path]:
+        """Stores the files under the key and returns their paths in the store."""
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        for path in paths:
+            target = os.path.join(tmp_dir, os.path.basename(path))
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copyfile(path, target)
+
+        entry_dir = self._entry_dir(key)
+        with self._lock:
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                # Another writer stored the same result first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.utime(entry_dir)
+            self._evict(keep=key)
+            return sorted(Path(entry_dir).iterdir())
+
+    def _evict(self, keep: str):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir() and not entry.name.startswith(".tmp-"):
+                entries.append((entry.stat().st_mtime, entry.name, entry.path))
+        total = sum(_dir_nbytes(path) for _, _, path in entries)
+        for _, name, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= _dir_nbytes(path)
+            shutil.rmtree(path, ignore_errors=True)
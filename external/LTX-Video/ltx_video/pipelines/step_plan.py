@@ -0,0 +1,200 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from ltx_video.models.transformers.transformer3d import (
+    BlockResidualCache,
+    Transformer3DModel,
+)
+
+
+@dataclass
+class StepGroup:
+    """Denoising steps that share a guidance configuration, and the inputs they reuse.
+
+    The transformer batch is made of `num_conds` branches of `batch_size` samples,
+    in the order: unconditional (if `uncond_index` is set), text, perturbed (if
+    `perturb_index` is set). The branches a step evaluates may be a superset of the
+    ones its guidance uses, when the plan pads every step to the same shape.
+    """
+
+    do_classifier_free_guidance: bool
+    do_spatio_temporal_guidance: bool
+    skip_blocks: Optional[Tuple[int, ...]]
+    uncond_index: Optional[int]
+    text_index: int
+    perturb_index: Optional[int]
+    steps: List[int] = field(default_factory=list)
+
+    # Set by `DenoisingStepPlan.prepare`
+    encoder_hidden_states: Optional[torch.Tensor] = None
+    encoder_attention_mask: Optional[torch.Tensor] = None
+    indices_grid: Optional[torch.Tensor] = None
+    freqs_cis: Optional[Tuple[torch.Tensor, torch.Tensor]] = None
+    skip_layer_mask: Optional[torch.Tensor] = None
+    conditioning_mask: Optional[torch.Tensor] = None
+    latent_model_input: Optional[torch.Tensor] = None
+    residual_cache: Optional[BlockResidualCache] = None
+
+    @property
+    def num_conds(self) -> int:
+        return 1 + (self.uncond_index is not None) + (self.perturb_index is not None)
+
+    def prompt_indices(self, batch_size: int) -> slice:
+        """Rows of the `[negative, positive, positive]` prompt batch fed to the branches."""
+        start = 0 if self.uncond_index is not None else 1
+        return slice(batch_size * start, batch_size * (start + self.num_conds))
+
+
+class DenoisingStepPlan:
+    """Groups the denoising steps by guidance configuration and prepares their inputs once.
+
+    Every step of a group feeds the transformer tensors of the same shapes: the
+    prompt embeddings and masks are sliced and cast, the positional inputs and
+    skip layer masks are built, and a latent input buffer is allocated once per
+    group instead of at every step.
+
+    With `static_shapes`, every group evaluates all the branches that any step of
+    the schedule needs (steps that do not use a branch discard its output), so
+    the transformer sees one input shape for the whole generation and a compiled
+    transformer is not recompiled when CFG or STG are switched on and off
+    between timesteps. This costs the extra branches on the steps that skip them.
+
+    Args:
+        guidance_scale: Per-step CFG scale. CFG is applied when it is above 1.
+        stg_scale: Per-step STG scale. STG is applied when it is above 0.
+        skip_block_list: Per-step list of transformer blocks skipped by the STG branch.
+        static_shapes: Whether to evaluate the same branches at every step.
+    """
+
+    def __init__(
+        self,
+        guidance_scale: Sequence[float],
+        stg_scale: Sequence[float],
+        skip_block_list: Optional[Sequence[Sequence[int]]] = None,
+        static_shapes: bool = False,
+    ):
+        any_cfg = any(scale > 1.0 for scale in guidance_scale)
+        any_stg = any(scale > 0 for scale in stg_scale)
+        self.static_shapes = static_shapes
+        self.groups: List[StepGroup] = []
+        self.step_groups: List[StepGroup] = []
+        groups_by_key: Dict[tuple, StepGroup] = {}
+        for i, (cfg_scale, stg) in enumerate(zip(guidance_scale, stg_scale)):
+            do_cfg = cfg_scale > 1.0
+            do_stg = stg > 0
+            skip_blocks = None
+            if do_stg and skip_block_list is not None:
+                skip_blocks = tuple(skip_block_list[i])
+            key = (do_cfg, do_stg, skip_blocks)
+            if key not in groups_by_key:
+                has_uncond = any_cfg if static_shapes else do_cfg
+                has_perturb = any_stg if static_shapes else do_stg
+                text_index = 1 if has_uncond else 0
+                groups_by_key[key] = StepGroup(
+                    do_classifier_free_guidance=do_cfg,
+                    do_spatio_temporal_guidance=do_stg,
+                    skip_blocks=skip_blocks,
+                    uncond_index=0 if has_uncond else None,
+                    text_index=text_index,
+                    perturb_index=text_index + 1 if has_perturb else None,
+                )
+                self.groups.append(groups_by_key[key])
+            groups_by_key[key].steps.append(i)
+            self.step_groups.append(groups_by_key[key])
+
+    def prepare(
+        self,
+        transformer: Transformer3DModel,
+        batch_size: int,
+        latents: torch.Tensor,
+        prompt_embeds_batch: torch.Tensor,
+        prompt_attention_mask_batch: torch.Tensor,
+        fractional_coords: torch.Tensor,
+        conditioning_mask: Optional[torch.Tensor] = None,
+        batch_conditioning_mask: bool = False,
+        residual_cache_threshold: float = 0.0,
+    ):
+        """Builds the transformer inputs of every group.
+
+        Args:
+            transformer: The denoising transformer.
+            batch_size: Number of samples per branch.
+            latents: The patchified latents, of the shape used for every step.
+            prompt_embeds_batch: The `[negative, positive, positive]` prompt embeddings.
+            prompt_attention_mask_batch: The matching attention masks.
+            fractional_coords: Token coordinates of one branch, with time in seconds.
+            conditioning_mask: Per-token conditioning strengths, if any.
+            batch_conditioning_mask: Whether to repeat the conditioning mask per branch.
+            residual_cache_threshold: If above 0, every group gets a `BlockResidualCache`
+                with this threshold.
+        """
+        freqs_cis = transformer.precompute_freqs_cis(fractional_coords)
+        encoder_hidden_states = prompt_embeds_batch.to(transformer.dtype)
+        # Groups with the same number of branches share their tensors
+        shared: Dict[tuple, object] = {}
+
+        def repeat(name, tensor, num_conds):
+            if (name, num_conds) not in shared:
+                shared[(name, num_conds)] = torch.cat([tensor] * num_conds)
+            return shared[(name, num_conds)]
+
+        pad_skip_layer_mask = self.static_shapes and any(
+            group.skip_blocks for group in self.groups
+        )
+        for group in self.groups:
+            num_conds = group.num_conds
+            indices = group.prompt_indices(batch_size)
+            group.encoder_hidden_states = encoder_hidden_states[indices]
+            group.encoder_attention_mask = prompt_attention_mask_batch[indices]
+            group.indices_grid = repeat("coords", fractional_coords, num_conds)
+            group.freqs_cis = (
+                repeat("cos", freqs_cis[0], num_conds),
+                repeat("sin", freqs_cis[1], num_conds),
+            )
+            if group.perturb_index is not None and group.skip_blocks:
+                group.skip_layer_mask = transformer.create_skip_layer_mask(
+                    batch_size, num_conds, group.perturb_index, list(group.skip_blocks)
+                )
+            elif pad_skip_layer_mask:
+                # An all-ones mask skips nothing, but keeps the transformer graph the same
+                group.skip_layer_mask = torch.ones(
+                    (len(transformer.transformer_blocks), batch_size * num_conds),
+                    device=transformer.device,
+                    dtype=transformer.dtype,
+                )
+            group.conditioning_mask = conditioning_mask
+            if conditioning_mask is not None and batch_conditioning_mask:
+                group.conditioning_mask = repeat(
+                    "conditioning_mask", conditioning_mask, num_conds
+                )
+            group.latent_model_input = repeat(
+                "latents",
+                torch.empty_like(latents, dtype=transformer.dtype),
+                num_conds,
+            )
+            if residual_cache_threshold > 0:
+                group.residual_cache = BlockResidualCache(residual_cache_threshold)
+
+    def residual_cache_stats(self) -> Optional[Dict[str, int]]:
+        """Residual cache hits and misses summed over the groups, if caching is enabled."""
+        caches = [
+            group.residual_cache
+            for group in self.groups
+            if group.residual_cache is not None
+        ]
+        if not caches:
+            return None
+        return {
+            "hits": sum(cache.hits for cache in caches),
+            "misses": sum(cache.misses for cache in caches),
+        }
+
+    def fill_latent_model_input(
+        self, group: StepGroup, latents: torch.Tensor
+    ) -> torch.Tensor:
+        """Copies the latents into every branch of the group's input buffer."""
+        buffer = group.latent_model_input
+        buffer.view(group.num_conds, *latents.shape).copy_(latents)
+        return buffer
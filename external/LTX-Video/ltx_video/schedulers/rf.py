@@ -11,9 +11,9 @@ from diffusers.configuration_utils import ConfigMixin, register_to_config
 from diffusers.schedulers.scheduling_utils import SchedulerMixin
 from diffusers.utils import BaseOutput
 from torch import Tensor
-from safetensors import safe_open
 
 
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
 from ltx_video.utils.torch_utils import append_dims
 
 from ltx_video.utils.diffusers_config_mapping import (
@@ -173,7 +173,21 @@ class RectifiedFlowSchedulerOutput(BaseOutput):
     pred_original_sample: Optional[torch.FloatTensor] = None
 
 
+SOLVERS = ("euler", "heun", "dpmpp_2m")
+
+
 class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
+    """
+    Scheduler for rectified flow models, integrating the flow ODE from t = 1 (noise) to t = 0.
+
+    `sampler` selects the spacing of the timesteps, `solver` the ODE solver:
+    - "euler": first order, one model evaluation per step.
+    - "heun": second order, two model evaluations per step (one on the last step). The timesteps are interleaved
+      so that every intermediate timestep appears twice, and consecutive `step` calls alternate between the
+      Euler predictor and the trapezoidal corrector.
+    - "dpmpp_2m": second order multistep DPM-Solver++ on the data prediction, one model evaluation per step.
+    """
+
     order = 1
 
     @register_to_config
@@ -185,8 +199,14 @@ class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
         target_shift_terminal: Optional[float] = None,
         sampler: Optional[str] = "Uniform",
         shift: Optional[float] = None,
+        solver: str = "euler",
     ):
         super().__init__()
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}")
+        self.solver = solver
+        # Number of model evaluations per step (diffusers convention)
+        self.order = 2 if solver == "heun" else 1
         self.init_noise_sigma = 1.0
         self.num_inference_steps = None
         self.sampler = sampler
@@ -197,6 +217,19 @@ class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
             num_train_timesteps, shift=shift
         )
         self.shift = shift
+        # The schedule padded with a final 0 and sorted in ascending order, and the
+        # `timesteps` tensor it was built from
+        self._sorted_timesteps_padded: Optional[Tensor] = None
+        self._sorted_timesteps_source: Optional[Tensor] = None
+        self._reset_solver_state()
+
+    def _reset_solver_state(self):
+        self._step_index = 0
+        # Heun: (sample, model_output, dt) of the predictor, awaiting the corrector
+        self._heun_state: Optional[Tuple[Tensor, Tensor, Tensor]] = None
+        # DPM-Solver++: data prediction and timestep(s) of the previous step
+        self._prev_x0: Optional[Tensor] = None
+        self._prev_timestep: Optional[Tensor] = None
 
     def get_initial_timesteps(
         self, num_timesteps: int, shift: Optional[float] = None
@@ -234,6 +267,8 @@ class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
         """
         Sets the discrete timesteps used for the diffusion chain. Supporting function to be run before inference.
         If `timesteps` are provided, they will be used instead of the scheduled timesteps.
+        `sigmas` holds the noise levels the solver steps through and `timesteps` the timesteps the model is
+        evaluated at, which repeats the intermediate noise levels for the Heun solver.
 
         Args:
             num_inference_steps (`int` *optional*): The number of diffusion steps used when generating samples.
@@ -254,24 +289,46 @@ class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
             ).to(device)
             timesteps = self.shift_timesteps(samples_shape, timesteps)
         else:
-            timesteps = torch.Tensor(timesteps).to(device)
+            # Heun timesteps passed back in (e.g. after skipping steps) are not repeated twice
+            timesteps = torch.unique_consecutive(torch.Tensor(timesteps)).to(device)
             num_inference_steps = len(timesteps)
+        self.sigmas = timesteps
+        if self.solver == "heun":
+            timesteps = torch.cat([timesteps[:1], timesteps[1:].repeat_interleave(2)])
         self.timesteps = timesteps
         self.num_inference_steps = num_inference_steps
-        self.sigmas = self.timesteps
+        self._sorted_timesteps_padded = self._sort_timesteps_padded()
+        self._reset_solver_state()
+
+    def _sort_timesteps_padded(self) -> Tensor:
+        timesteps_padded = torch.cat(
+            [self.timesteps, torch.zeros(1, device=self.timesteps.device)]
+        )
+        self._sorted_timesteps_source = self.timesteps
+        return timesteps_padded.sort().values
+
+    def _lower_timesteps(self, threshold: Tensor) -> Tensor:
+        """
+        Returns, for each element of `threshold`, the largest timestep of the padded schedule that is strictly
+        lower than it, or 0 if there is none. Uses a sorted search over the schedule, which is sorted once per
+        `set_timesteps` call (or again if `timesteps` was reassigned since).
+        """
+        if self._sorted_timesteps_source is not self.timesteps:
+            self._sorted_timesteps_padded = self._sort_timesteps_padded()
+        sorted_timesteps = self._sorted_timesteps_padded.to(threshold.device)
+        # Compare in the dtype a direct comparison would promote to
+        dtype = torch.promote_types(sorted_timesteps.dtype, threshold.dtype)
+        num_lower = torch.searchsorted(
+            sorted_timesteps.to(dtype), threshold.to(dtype).contiguous()
+        )
+        lower_timestep = sorted_timesteps[(num_lower - 1).clamp(min=0)]
+        return torch.where(num_lower > 0, lower_timestep, 0.0)
 
     @staticmethod
     def from_pretrained(pretrained_model_path: Union[str, os.PathLike]):
         pretrained_model_path = Path(pretrained_model_path)
         if pretrained_model_path.is_file():
-            comfy_single_file_state_dict = {}
-            with safe_open(pretrained_model_path, framework="pt", device="cpu") as f:
-                metadata = f.metadata()
-                for k in f.keys():
-                    comfy_single_file_state_dict[k] = f.get_tensor(k)
-            configs = json.loads(metadata["config"])
-            config = configs["scheduler"]
-            del comfy_single_file_state_dict
+            config = SafetensorsCheckpoint(pretrained_model_path).configs["scheduler"]
 
         elif pretrained_model_path.is_dir():
             diffusers_noise_scheduler_config_path = (
@@ -317,6 +374,8 @@ class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
         z_{t_1} = z_t - Delta_t * v
         The method finds the next timestep that is lower than the input timestep(s) and denoises the latents
         to that level. The input timestep(s) are not required to be one of the predefined timesteps.
+        The Heun and DPM-Solver++ solvers keep state between calls, which `set_timesteps` resets: they expect one
+        call per entry of `timesteps`, in order.
 
         Args:
             model_output (`torch.FloatTensor`):
@@ -339,25 +398,33 @@ class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
             raise ValueError(
                 "Number of inference steps is 'None', you need to run 'set_timesteps' after creating the scheduler"
             )
+        if stochastic_sampling and self.solver != "euler":
+            raise ValueError(
+                "Stochastic sampling is only supported by the euler solver"
+            )
         t_eps = 1e-6  # Small epsilon to avoid numerical issues in timestep values
 
-        timesteps_padded = torch.cat(
-            [self.timesteps, torch.zeros(1, device=self.timesteps.device)]
-        )
+        if self._heun_state is not None:
+            # Heun corrector: step again from the predictor's sample, with the average of the
+            # velocities at both ends of the step
+            sample, first_model_output, dt = self._heun_state
+            self._heun_state = None
+            self._step_index += 1
+            prev_sample = sample - dt * (first_model_output + model_output) / 2
+            if not return_dict:
+                return (prev_sample,)
+            return RectifiedFlowSchedulerOutput(prev_sample=prev_sample)
 
         # Find the next lower timestep(s) and compute the dt from the current timestep(s)
         if timestep.ndim == 0:
             # Global timestep case
-            lower_mask = timesteps_padded < timestep - t_eps
-            lower_timestep = timesteps_padded[lower_mask][0]  # Closest lower timestep
+            lower_timestep = self._lower_timesteps(timestep - t_eps)
             dt = timestep - lower_timestep
 
         else:
             # Per-token case
             assert timestep.ndim == 2
-            lower_mask = timesteps_padded[:, None, None] < timestep[None] - t_eps
-            lower_timestep = lower_mask * timesteps_padded[:, None, None]
-            lower_timestep, _ = lower_timestep.max(dim=0)
+            lower_timestep = self._lower_timesteps(timestep - t_eps)
             dt = (timestep - lower_timestep)[..., None]
 
         # Compute previous sample
@@ -365,14 +432,62 @@ class RectifiedFlowScheduler(SchedulerMixin, ConfigMixin, TimestepShifter):
             x0 = sample - timestep[..., None] * model_output
             next_timestep = timestep[..., None] - dt
             prev_sample = self.add_noise(x0, torch.randn_like(sample), next_timestep)
+        elif self.solver == "dpmpp_2m":
+            prev_sample = self._dpmpp_2m_update(
+                model_output, timestep, lower_timestep, sample
+            )
         else:
             prev_sample = sample - dt * model_output
+            # The last step goes to t = 0, where there is nothing to correct with
+            if self.solver == "heun" and self._step_index < len(self.timesteps) - 1:
+                self._heun_state = (sample, model_output, dt)
+        self._step_index += 1
 
         if not return_dict:
             return (prev_sample,)
 
         return RectifiedFlowSchedulerOutput(prev_sample=prev_sample)
 
+    def _dpmpp_2m_update(
+        self,
+        model_output: Tensor,
+        timestep: Tensor,
+        lower_timestep: Tensor,
+        sample: Tensor,
+    ) -> Tensor:
+        """
+        DPM-Solver++(2M) step from `timestep` (s) to `lower_timestep` (t) for x_s = (1 - s) x_0 + s noise.
+        With the data prediction x_0 = x_s - s v, the first order update x_t = t/s x_s + (1 - t/s) x_0 is the Euler
+        step. The second order one adds a finite difference of the data predictions of this and the previous step
+        in log-SNR. It falls back to first order on the first step, when stepping to t = 0 and for tokens whose
+        timestep did not decrease since the previous step (e.g. conditioning tokens waiting to be denoised).
+        """
+
+        def per_token(u: Tensor) -> Tensor:
+            return u[..., None] if u.ndim > 0 else u
+
+        def log_snr(u: Tensor) -> Tensor:
+            return torch.log1p(-u) - torch.log(u)
+
+        x0 = sample - per_token(timestep) * model_output
+        denoised = x0
+        if self._prev_x0 is not None:
+            prev_timestep = self._prev_timestep
+            second_order = (
+                (prev_timestep > timestep)
+                & (prev_timestep < 1.0)
+                & (lower_timestep > 0.0)
+            )
+            h = log_snr(lower_timestep) - log_snr(timestep)
+            h_prev = log_snr(timestep) - log_snr(prev_timestep)
+            # D1 / 2 = (x0 - prev_x0) / (2 r0), with r0 = h_prev / h
+            scale = torch.where(second_order, h / (2 * h_prev), 0.0)
+            denoised = x0 + per_token(scale) * (x0 - self._prev_x0)
+        self._prev_x0, self._prev_timestep = x0, timestep
+
+        ratio = torch.where(timestep > 0.0, lower_timestep / timestep, 1.0)
+        return per_token(ratio) * sample + per_token(1.0 - ratio) * denoised
+
     def add_noise(
         self,
         original_samples: torch.FloatTensor,
@@ -0,0 +1,28 @@
+import threading
+
+
+class GenerationCancelled(Exception):
+    """Raised by a generation that was stopped through its `CancellationToken`."""
+
+
+class CancellationToken:
+    """A flag, settable from any thread, that asks a running generation to stop.
+
+    The pipeline checks it between denoising steps. Once it is set, the run
+    releases its latents and cached device memory and raises
+    `GenerationCancelled` instead of finishing.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise GenerationCancelled("The generation was cancelled")
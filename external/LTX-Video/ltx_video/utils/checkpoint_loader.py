@@ -0,0 +1,141 @@
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Union
+
+import torch
+
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "F8_E4M3": torch.float8_e4m3fn,
+    "F8_E5M2": torch.float8_e5m2,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+class SafetensorsCheckpoint:
+    """A `.safetensors` checkpoint whose header is parsed once and whose data is memory-mapped.
+
+    The single-file LTX-Video checkpoints hold the VAE, the transformer and the
+    configs of every model. Opening the checkpoint once and handing it to each
+    `from_checkpoint` replaces one full read of the file per model. Tensors are
+    views of the mapped file: pages are read from disk when a tensor is copied to
+    its device or cast to its dtype, so the weights go from the page cache to
+    their final place in a single copy, and not at all when they are used on the
+    CPU in the stored dtype. The mapping is private: writing to a tensor does not
+    change the file.
+
+    Mapped pages that were read stay resident until the kernel reclaims them.
+    `release` drops them right away, for callers that stream weights and know
+    they no longer use some tensors.
+
+    Args:
+        path: Path of the `.safetensors` file.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            (header_size,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_size))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.metadata: Dict[str, str] = header.pop("__metadata__", None) or {}
+        self._entries = header
+        self._data_offset = 8 + header_size
+        self._configs = None
+
+    @property
+    def configs(self) -> dict:
+        """The model configs stored in the checkpoint metadata."""
+        if self._configs is None:
+            self._configs = json.loads(self.metadata["config"])
+        return self._configs
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def tensor_dtype(
+        self, name: str, dtype: Optional[torch.dtype] = None
+    ) -> torch.dtype:
+        """The dtype `get_tensor(name, dtype=dtype)` returns."""
+        stored_dtype = _SAFETENSORS_DTYPES[self._entries[name]["dtype"]]
+        if dtype is None or not stored_dtype.is_floating_point:
+            return stored_dtype
+        return dtype
+
+    def get_tensor(
+        self,
+        name: str,
+        device: Optional[Union[str, torch.device]] = None,
+        dtype: Optional[torch.dtype] = None,
+    ) -> torch.Tensor:
+        """Returns a tensor of the checkpoint on `device`, cast to `dtype` if it is floating point."""
+        entry = self._entries[name]
+        stored_dtype = self.tensor_dtype(name)
+        start, end = entry["data_offsets"]
+        if start == end:
+            tensor = torch.empty(entry["shape"], dtype=stored_dtype)
+        else:
+            data = torch.frombuffer(
+                self._mmap,
+                dtype=torch.uint8,
+                count=end - start,
+                offset=self._data_offset + start,
+            )
+            if (self._data_offset + start) % stored_dtype.itemsize:
+                # Typed views need aligned data, which safetensors does not guarantee
+                data = data.clone()
+            tensor = data.view(stored_dtype).view(entry["shape"])
+        return tensor.to(device=device, dtype=self.tensor_dtype(name, dtype))
+
+    def state_dict(
+        self,
+        prefix: str = "",
+        device: Optional[Union[str, torch.device]] = None,
+        dtype: Optional[torch.dtype] = None,
+    ) -> Dict[str, torch.Tensor]:
+        """The tensors whose name starts with `prefix`, with the prefix removed."""
+        return {
+            name[len(prefix) :]: self.get_tensor(name, device=device, dtype=dtype)
+            for name in self._entries
+            if name.startswith(prefix)
+        }
+
+    def _page_ranges(self, names: Iterable[str], outer: bool):
+        for name in names:
+            start, end = self._entries[name]["data_offsets"]
+            start, end = self._data_offset + start, self._data_offset + end
+            if outer:
+                start = start // mmap.PAGESIZE * mmap.PAGESIZE
+                end = min(-(-end // mmap.PAGESIZE) * mmap.PAGESIZE, len(self._mmap))
+            else:
+                start = -(-start // mmap.PAGESIZE) * mmap.PAGESIZE
+                end = end // mmap.PAGESIZE * mmap.PAGESIZE
+            if end > start:
+                yield start, end - start
+
+    def prefetch(self, names: Iterable[str]):
+        """Asks the kernel to start reading the given tensors from disk."""
+        if hasattr(mmap, "MADV_WILLNEED"):
+            for start, length in self._page_ranges(names, outer=True):
+                self._mmap.madvise(mmap.MADV_WILLNEED, start, length)
+
+    def release(self, names: Iterable[str]):
+        """Drops the resident pages of the given tensors from the mapping.
+
+        The tensors must not be in use anymore: their mapped data reverts to the
+        file content, and is read again from disk on the next access. Only the
+        pages that lie entirely within a tensor are dropped.
+        """
+        if hasattr(mmap, "MADV_DONTNEED"):
+            for start, length in self._page_ranges(names, outer=False):
+                self._mmap.madvise(mmap.MADV_DONTNEED, start, length)
@@ -0,0 +1,111 @@
+from typing import Optional
+
+import torch
+import torch.nn.functional as F
+from diffusers.models import AutoencoderKL
+
+from ltx_video.models.autoencoders.vae_encode import (
+    get_vae_size_scale_factor,
+    vae_encode,
+)
+
+
+class LatentPreviewer:
+    """Projects video latents to low resolution RGB frames without decoding them.
+
+    Every latent pixel is mapped to a color by one linear layer, `rgb = weight @
+    latent + bias`, which costs a few multiply-adds per latent instead of a VAE
+    decode. The frames have the latent resolution (e.g. 38x22 for a 1216x704
+    video), which is enough to follow the composition and motion of a
+    generation while it denoises.
+
+    The map is fit to a VAE with `fit()`, so it matches the latent space of any
+    checkpoint, including the latent normalization the pipeline uses.
+
+    Args:
+        weight: The projection, of shape (3, latent channels).
+        bias: The color offset, of shape (3,). Colors are in [-1, 1].
+    """
+
+    def __init__(self, weight: torch.Tensor, bias: Optional[torch.Tensor] = None):
+        self.weight = weight.float()
+        self.bias = torch.zeros(3) if bias is None else bias.float()
+
+    @classmethod
+    @torch.no_grad()
+    def fit(
+        cls,
+        vae: AutoencoderKL,
+        vae_per_channel_normalize: bool = False,
+        num_probes: int = 4,
+        probe_latent_size: int = 8,
+        ridge: float = 1e-3,
+        seed: int = 0,
+    ) -> "LatentPreviewer":
+        """Fits the map by least squares on latents of videos of known colors.
+
+        Smooth random color fields are encoded with `vae`, and the map is fit to
+        predict the mean color of the pixels each latent covers. This takes one
+        encode of `num_probes` short clips of `probe_latent_size` latents square.
+
+        Args:
+            vae: The VAE whose latents are previewed.
+            vae_per_channel_normalize: Whether the previewed latents are normalized
+                per channel, as with the `vae_per_channel_normalize` pipeline argument.
+            num_probes: Number of probe clips encoded.
+            probe_latent_size: Height and width of the probe clips, in latents.
+            ridge: Ridge regularization of the least squares fit, relative to the
+                mean latent energy.
+            seed: Seed of the probe colors.
+        """
+        temporal_scale, spatial_scale, _ = get_vae_size_scale_factor(vae)
+        device = next(vae.parameters()).device
+        dtype = next(vae.parameters()).dtype
+        generator = torch.Generator().manual_seed(seed)
+
+        # Colors are drawn on a coarse grid and interpolated, so the probes look
+        # like images rather than noise. One first frame plus one latent frame of
+        # `temporal_scale` frames, the way causal video VAEs group frames.
+        size = probe_latent_size * spatial_scale
+        num_latent_frames = 2
+        keyframes = (
+            torch.rand(num_probes, 3, num_latent_frames, 4, 4, generator=generator) * 2
+            - 1
+        )
+        keyframes = F.interpolate(
+            keyframes, size=(num_latent_frames, size, size), mode="trilinear"
+        )
+        frame_to_latent = torch.tensor([0] + [1] * temporal_scale)
+        video = keyframes[:, :, frame_to_latent]
+
+        latents = vae_encode(
+            video.to(device=device, dtype=dtype),
+            vae,
+            vae_per_channel_normalize=vae_per_channel_normalize,
+        ).float()
+        # The color each latent covers: the mean of its pixels in its frames
+        targets = torch.stack(
+            [
+                F.avg_pool2d(
+                    video[:, :, frame_to_latent == f].mean(dim=2), spatial_scale
+                )
+                for f in range(num_latent_frames)
+            ],
+            dim=2,
+        )
+
+        x = latents.movedim(1, -1).reshape(-1, latents.shape[1]).cpu().double()
+        y = targets.movedim(1, -1).reshape(-1, 3).double()
+        x = torch.cat([x, torch.ones(x.shape[0], 1, dtype=x.dtype)], dim=1)
+        gram = x.T @ x
+        gram += ridge * gram.diagonal().mean() * torch.eye(x.shape[1], dtype=x.dtype)
+        solution = torch.linalg.solve(gram, x.T @ y)
+        return cls(weight=solution[:-1].T, bias=solution[-1])
+
+    @torch.no_grad()
+    def __call__(self, latents: torch.Tensor) -> torch.Tensor:
+        """Returns uint8 frames of shape (b, f, h, w, 3) for latents of shape (b, c, f, h, w)."""
+        weight = self.weight.to(device=latents.device)
+        bias = self.bias.to(device=latents.device)
+        rgb = torch.einsum("bcfhw,rc->bfhwr", latents.float(), weight) + bias
+        return ((rgb.clamp(-1, 1) + 1) * 127.5).round().to(torch.uint8).cpu()
@@ -0,0 +1,52 @@
+from typing import Iterator, Optional
+
+import av
+import numpy as np
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def is_video_file(media_path: str) -> bool:
+    return media_path.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def count_video_frames(video_path: str) -> int:
+    """
+    Returns the number of frames of a video.
+
+    The count comes from the container metadata when it is stored there. Otherwise the packets are
+    demuxed and counted, which reads the file but decodes nothing.
+    """
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        if stream.frames > 0:
+            return stream.frames
+        return sum(1 for packet in container.demux(stream) if packet.size > 0)
+
+
+def iter_video_frames(
+    video_path: str, max_frames: Optional[int] = None, batch_size: int = 16
+) -> Iterator[np.ndarray]:
+    """
+    Decodes a video front to back and yields its frames in `(batch_size, H, W, 3)` uint8 RGB batches.
+
+    Decoding is sequential, so no frame is decoded twice, and uses FFmpeg's frame and slice threading.
+    It stops as soon as `max_frames` frames were produced; the last batch may be smaller.
+    """
+    if max_frames is not None and max_frames <= 0:
+        return
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        batch = []
+        num_frames = 0
+        for frame in container.decode(stream):
+            batch.append(frame.to_ndarray(format="rgb24"))
+            num_frames += 1
+            if num_frames == max_frames:
+                break
+            if len(batch) == batch_size:
+                yield np.stack(batch)
+                batch = []
+        if batch:
+            yield np.stack(batch)
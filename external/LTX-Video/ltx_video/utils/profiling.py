@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+import torch
+
+StageSink = Callable[["StageRecord"], None]
+
+
+@dataclass
+class StageRecord:
+    """Wall time and memory of one run of a stage.
+
+    Attributes:
+        name: The stage, e.g. "text_encoding" or "vae_decode".
+        start: Start time, in seconds since the profiler was created.
+        seconds: Wall time of the stage. Pending CUDA work is waited for on entry and exit.
+        peak_memory_bytes: Peak memory allocated by torch on the profiled CUDA device
+            during the stage, or None when not profiling a CUDA device.
+        rss_bytes: Resident memory of the process at the end of the stage.
+        peak_rss_bytes: Peak resident memory of the process so far, which may have
+            been reached before the stage.
+        depth: Number of stages the stage is nested in.
+        args: Extra details of the stage, such as the step index.
+    """
+
+    name: str
+    start: float
+    seconds: float
+    peak_memory_bytes: Optional[int]
+    rss_bytes: Optional[int]
+    peak_rss_bytes: Optional[int]
+    depth: int
+    thread_id: int
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _OpenStage:
+    name: str
+    args: Dict[str, Any]
+    start: float
+    depth: int
+    peak_memory_bytes: int = 0
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """The resident (`VmRSS`) and peak resident (`VmHWM`) memory of the process, in bytes.
+
+    Read from /proc, so both are None on other platforms. VmHWM, unlike
+    ru_maxrss, does not carry over the parent's peak across fork and exec.
+    """
+    memory = {"VmRSS": None, "VmHWM": None}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key = line.split(":", 1)[0]
+                if key in memory:
+                    memory[key] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+class StageProfiler:
+    """Records the wall time and memory of the stages of a generation.
+
+    Stages are timed with `stage()` (or `begin()` / `end()` where a `with`
+    block does not fit) and may be nested. Every finished stage is handed to the
+    sinks as a `StageRecord` and kept in `records`, which can be summarized per
+    stage with `summary()` or written as a Chrome trace (viewable in
+    chrome://tracing or https://ui.perfetto.dev) with `save()`.
+
+    On CUDA devices the pending work is synchronized at the stage boundaries, so
+    the wall times are exact but profiling slows the run down slightly, and the
+    device memory peak of each stage is measured by resetting the allocator's
+    peak statistics.
+
+    Args:
+        device: Device whose memory is tracked. Only CUDA devices report a peak.
+        sinks: Callables receiving each `StageRecord` as its stage ends.
+    """
+
+    def __init__(
+        self,
+        device: Optional[Union[str, torch.device]] = None,
+        sinks: Optional[List[StageSink]] = None,
+    ):
+        self.device = torch.device(device) if device is not None else None
+        self.sinks: List[StageSink] = list(sinks or [])
+        self.records: List[StageRecord] = []
+        self._origin = time.perf_counter()
+        self._open: Dict[int, List[_OpenStage]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def _tracks_cuda(self) -> bool:
+        return (
+            self.device is not None
+            and self.device.type == "cuda"
+            and torch.cuda.is_available()
+        )
+
+    def add_sink(self, sink: StageSink):
+        self.sinks.append(sink)
+
+    def begin(self, name: str, **args: Any) -> _OpenStage:
+        """Starts a stage. It must be ended with `end()`, innermost stage first."""
+        stack = self._open.setdefault(threading.get_ident(), [])
+        if self._tracks_cuda:
+            torch.cuda.synchronize(self.device)
+            # The reset below hides the peak reached so far from the enclosing stages
+            peak = torch.cuda.max_memory_allocated(self.device)
+            for open_stage in stack:
+                open_stage.peak_memory_bytes = max(open_stage.peak_memory_bytes, peak)
+            torch.cuda.reset_peak_memory_stats(self.device)
+        stage = _OpenStage(name, args, time.perf_counter(), len(stack))
+        stack.append(stage)
+        return stage
+
+    def end(self, stage: _OpenStage) -> StageRecord:
+        """Ends a stage started with `begin()` and records it."""
+        stack = self._open[threading.get_ident()]
+        if stack[-1] is not stage:
+            raise RuntimeError(f"Stage {stage.name} ended before its inner stages")
+        stack.pop()
+        peak_memory = None
+        if self._tracks_cuda:
+            torch.cuda.synchronize(self.device)
+            peak_memory = max(
+                stage.peak_memory_bytes, torch.cuda.max_memory_allocated(self.device)
+            )
+            if stack:
+                stack[-1].peak_memory_bytes = max(
+                    stack[-1].peak_memory_bytes, peak_memory
+                )
+        end = time.perf_counter()
+        memory = process_memory()
+        record = StageRecord(
+            name=stage.name,
+            start=stage.start - self._origin,
+            seconds=end - stage.start,
+            peak_memory_bytes=peak_memory,
+            rss_bytes=memory["VmRSS"],
+            peak_rss_bytes=memory["VmHWM"],
+            depth=stage.depth,
+            thread_id=threading.get_ident(),
+            args=stage.args,
+        )
+        with self._lock:
+            self.records.append(record)
+        for sink in self.sinks:
+            sink(record)
+        return record
+
+    @contextmanager
+    def stage(self, name: str, **args: Any) -> Iterator[None]:
+        """Times the enclosed block as a stage."""
+        open_stage = self.begin(name, **args)
+        try:
+            yield
+        finally:
+            self.end(open_stage)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per stage name, in order of first occurrence: runs, total and mean seconds, and memory peaks."""
+        summary: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            entry = summary.setdefault(
+                record.name,
+                {
+                    "count": 0,
+                    "seconds": 0.0,
+                    "peak_memory_bytes": None,
+                    "peak_rss_bytes": None,
+                },
+            )
+            entry["count"] += 1
+            entry["seconds"] += record.seconds
+            for key in ("peak_memory_bytes", "peak_rss_bytes"):
+                value = getattr(record, key)
+                if value is not None:
+                    entry[key] = max(entry[key] or 0, value)
+        for entry in summary.values():
+            entry["mean_seconds"] = entry["seconds"] / entry["count"]
+        return summary
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The records as a Chrome trace event file, with the summary alongside."""
+        pid = os.getpid()
+        events = []
+        for record in sorted(self.records, key=lambda r: r.start):
+            args = dict(record.args)
+            for key in ("peak_memory_bytes", "rss_bytes", "peak_rss_bytes"):
+                value = getattr(record, key)
+                if value is not None:
+                    args[key.replace("_bytes", "_mib")] = round(value / 1024**2, 1)
+            events.append(
+                {
+                    "name": record.name,
+                    "ph": "X",
+                    "ts": record.start * 1e6,
+                    "dur": record.seconds * 1e6,
+                    "pid": pid,
+                    "tid": record.thread_id,
+                    "args": args,
+                }
+            )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "summary": self.summary(),
+        }
+
+    def save(self, path: Union[str, os.PathLike]):
+        """Writes the Chrome trace of the records to `path`."""
+        directory = os.path.dirname(os.fspath(path))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, indent=1)
+
+
+class JsonLinesSink:
+    """A stage sink appending each record to a JSON lines file as the stage ends."""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, record: StageRecord):
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(asdict(record), default=str) + "\n")
+
+
+def profile_stage(profiler: Optional[StageProfiler], name: str, **args: Any):
+    """`profiler.stage(name, **args)`, or a no-op context when profiling is off."""
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name, **args)
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Callable, Iterable
+
+import torch
+import torch.ao.nn.quantized.dynamic as nnqd
+from diffusers.utils import logging
+from torch import nn
+from torch.ao.quantization import per_channel_dynamic_qconfig
+
+logger = logging.get_logger("LTX-Video")
+
+INT8_DYNAMIC = "int8_dynamic"
+
+# Bump when a change to the quantization makes previously cached weights stale
+_CACHE_VERSION = 1
+
+
+def default_quantization_cache_dir() -> str:
+    return os.path.join(os.path.expanduser("~"), ".cache", "ltx_video", "int8")
+
+
+def quantize_linear_layers(module: nn.Module, with_weights: bool = True) -> nn.Module:
+    """Replaces the `nn.Linear` layers of a module, in place, by dynamically quantized int8 ones.
+
+    Weights are quantized with one scale per output channel. Activations are
+    quantized on the fly, per batch, so the layers take and return float tensors
+    and run on the CPU through the int8 GEMM kernels of the quantized backend.
+
+    Args:
+        module: The module whose linear layers to replace.
+        with_weights: If False, the int8 layers are left empty, to load quantized
+            weights into. The float layers may then be on the meta device.
+    """
+    for name, child in module.named_children():
+        if type(child) is nn.Linear:
+            if with_weights:
+                child.qconfig = per_channel_dynamic_qconfig
+                quantized = nnqd.Linear.from_float(child)
+            else:
+                quantized = nnqd.Linear(
+                    child.in_features,
+                    child.out_features,
+                    bias_=child.bias is not None,
+                    dtype=torch.qint8,
+                )
+            setattr(module, name, quantized)
+        else:
+            quantize_linear_layers(child, with_weights=with_weights)
+    return module
+
+
+def quantization_cache_path(cache_dir: str, source: str, component: str) -> str:
+    """Path of the cached quantized weights of `component`, loaded from `source`.
+
+    Local files are identified by their path, size and modification time, so an
+    updated checkpoint is quantized again. Other sources (hub model names) by name.
+    """
+    key = {"version": _CACHE_VERSION, "component": component, "source": source}
+    if os.path.isfile(source):
+        stat = os.stat(source)
+        key.update(
+            source=os.path.realpath(source), size=stat.st_size, mtime=stat.st_mtime_ns
+        )
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+    return os.path.join(cache_dir, f"{component}-{digest[:32]}.pt")
+
+
+def load_quantized_model(
+    cache_path: str,
+    load_float_model: Callable[[], nn.Module],
+    build_meta_model: Callable[[], nn.Module],
+    targets: Callable[[nn.Module], Iterable[nn.Module]] = lambda model: [model],
+) -> nn.Module:
+    """Returns an int8 dynamic quantized model, quantizing it only once per cache path.
+
+    On a cache miss, the float model is loaded, the linear layers of its `targets`
+    are quantized and the resulting state dict is stored at `cache_path`. On a hit,
+    the model is built on the meta device and the cached weights are loaded into it,
+    so the float weights are never read.
+
+    Args:
+        cache_path: Where the quantized state dict is stored.
+        load_float_model: Loads the float model, in float32, on the CPU.
+        build_meta_model: Builds the same model on the meta device.
+        targets: The submodules whose linear layers are quantized.
+    """
+    if os.path.exists(cache_path):
+        model = build_meta_model()
+        for target in targets(model):
+            quantize_linear_layers(target, with_weights=False)
+        state_dict = torch.load(cache_path, map_location="cpu", mmap=True)
+        model.load_state_dict(state_dict, assign=True)
+        return model.eval()
+
+    logger.info(f"Quantizing to int8, the weights will be cached in {cache_path}")
+    model = load_float_model()
+    for target in targets(model):
+        quantize_linear_layers(target)
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".tmp", delete=False) as f:
+        torch.save(model.state_dict(), f)
+    os.replace(f.name, cache_path)
+    return model.eval()
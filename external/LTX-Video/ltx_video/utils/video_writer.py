@@ -0,0 +1,147 @@
+import queue
+import threading
+from fractions import Fraction
+from typing import Optional
+
+import av
+import numpy as np
+import torch
+
+# Same rate control as `imageio.get_writer(...)` with its default quality of 5
+DEFAULT_CRF = 25
+
+
+def to_uint8_frames(video: torch.Tensor) -> torch.Tensor:
+    """
+    Converts a `(C, F, H, W)` video in [0, 1] to `(F, H, W, C)` uint8 frames on the video's device.
+
+    Matches `(video.permute(1, 2, 3, 0).cpu().float().numpy() * 255).astype(np.uint8)` bit for bit:
+    the values are upcast to float32 before scaling and truncated when cast to uint8.
+    """
+    return video.float().mul(255).to(torch.uint8).permute(1, 2, 3, 0)
+
+
+class BackgroundVideoWriter:
+    """
+    Encodes RGB frames to an H.264 MP4 with PyAV on a background thread.
+
+    Frames are handed over in chunks with `write`, so the caller can prepare and transfer the next chunk
+    while the previous one is encoded. At most `max_queued_chunks` chunks wait in the queue, which bounds
+    the host memory held by frames that were not encoded yet. Errors raised by the encoder are re-raised
+    by the next `write` or by `close`.
+
+    Odd frame sizes are cropped by one row / column since yuv420p needs even dimensions.
+
+    Args:
+        output_file: Path or file-like object to write the MP4 to.
+        fps: Frame rate of the video.
+        crf: libx264 constant rate factor.
+        max_queued_chunks: Number of chunks that may wait for the encoder.
+    """
+
+    def __init__(
+        self,
+        output_file,
+        fps: float,
+        crf: int = DEFAULT_CRF,
+        max_queued_chunks: int = 2,
+    ):
+        self.output_file = output_file
+        self.fps = fps
+        self.crf = crf
+        self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(
+            max_queued_chunks
+        )
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, frames):
+        """Queues `(F, H, W, 3)` uint8 frames, given as a NumPy array or a CPU tensor."""
+        if self._closed:
+            raise ValueError("write() called on a closed writer")
+        self._raise_if_failed()
+        if isinstance(frames, torch.Tensor):
+            frames = frames.numpy()
+        self._queue.put(frames)
+
+    def close(self):
+        """Flushes the encoder, closes the file and waits for the encoding thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_if_failed()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError("Video encoding failed") from self._error
+
+    def _run(self):
+        container = None
+        # Whether the end-of-stream marker was taken off the queue
+        finished = False
+        try:
+            container = av.open(self.output_file, "w", format="mp4")
+            stream = None
+            while True:
+                frames = self._queue.get()
+                if frames is None:
+                    finished = True
+                    break
+                height, width = frames.shape[1] // 2 * 2, frames.shape[2] // 2 * 2
+                if stream is None:
+                    stream = container.add_stream(
+                        "libx264",
+                        rate=Fraction(self.fps).limit_denominator(1001),
+                        options={"crf": str(self.crf)},
+                    )
+                    stream.height = height
+                    stream.width = width
+                    stream.pix_fmt = "yuv420p"
+                for frame in frames[:, :height, :width]:
+                    av_frame = av.VideoFrame.from_ndarray(
+                        np.ascontiguousarray(frame), format="rgb24"
+                    )
+                    container.mux(stream.encode(av_frame))
+            if stream is not None:
+                container.mux(stream.encode())
+        except BaseException as e:
+            self._error = e
+        finally:
+            if container is not None:
+                try:
+                    container.close()
+                except BaseException as e:
+                    if self._error is None:
+                        self._error = e
+            if not finished:
+                # Keep draining so that a producer blocked on a full queue is released
+                while self._queue.get() is not None:
+                    pass
+
+
+def write_video(
+    video: torch.Tensor,
+    output_file,
+    fps: float,
+    chunk_frames: int = 8,
+    crf: int = DEFAULT_CRF,
+):
+    """
+    Writes a `(C, F, H, W)` video in [0, 1] to an MP4, converting and transferring `chunk_frames` frames at a time.
+
+    Each chunk is turned into uint8 on the video's device and only then copied to the host, while the
+    previous chunk is being encoded by a `BackgroundVideoWriter`.
+    """
+    with BackgroundVideoWriter(output_file, fps, crf=crf) as writer:
+        for start in range(0, video.shape[1], chunk_frames):
+            chunk = to_uint8_frames(video[:, start : start + chunk_frames])
+            writer.write(chunk.cpu())
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Loads the models of a checkpoint in a fresh process and prints the load time and peak RSS.
+# "eager" mirrors the previous loader: every model reads the whole file into host memory,
+# the VAE is initialized on the CPU, then the models are moved and cast.
+LOAD_SCRIPT = """
+import json, sys, time
+import safetensors.torch
+import torch
+from ltx_video.inference import create_transformer
+from ltx_video.models.autoencoders.causal_video_autoencoder import CausalVideoAutoencoder
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+from ltx_video.utils.profiling import process_memory
+
+path, mode, device = sys.argv[1:]
+start = time.perf_counter()
+if mode == "mmap":
+    checkpoint = SafetensorsCheckpoint(path)
+    vae = CausalVideoAutoencoder.from_checkpoint(
+        checkpoint, device=device, dtype=torch.bfloat16
+    )
+    transformer = create_transformer(checkpoint, "bfloat16", device=device)
+else:
+    configs = SafetensorsCheckpoint(path).configs
+    vae = CausalVideoAutoencoder.from_config(configs["vae"])
+    vae.load_state_dict(safetensors.torch.load_file(path))
+    with torch.device("meta"):
+        transformer = Transformer3DModel.from_config(configs["transformer"])
+    transformer.load_state_dict(safetensors.torch.load_file(path), assign=True)
+    transformer = transformer.to(torch.bfloat16).to(device)
+    vae = vae.to(device).to(torch.bfloat16)
+if device.startswith("cuda"):
+    torch.cuda.synchronize()
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_rss": process_memory()["VmHWM"]}))
+"""
+
+
+def benchmark_checkpoints(synthetic_ckpt_path):
+    """Checkpoints listed in LTXV_BENCHMARK_CHECKPOINTS (e.g. the 2B and 13B ones), or a tiny one."""
+    paths = os.environ.get("LTXV_BENCHMARK_CHECKPOINTS")
+    return paths.split(os.pathsep) if paths else [synthetic_ckpt_path]
+
+
+@pytest.mark.benchmark
+def test_checkpoint_loading(synthetic_ckpt_path):
+    import torch
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    for path in benchmark_checkpoints(synthetic_ckpt_path):
+        size = os.path.getsize(path)
+        print(f"\n{os.path.basename(path)} ({size / 1024**3:.2f} GiB) on {device}:")
+        for mode in ["eager", "mmap"]:
+            output = subprocess.run(
+                [sys.executable, "-c", LOAD_SCRIPT, path, mode, device],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"  {mode}: {result['seconds']:.2f} s, "
+                f"peak RSS {result['peak_rss'] / 1024**3:.2f} GiB"
+            )
@@ -0,0 +1,167 @@
+import statistics
+import time
+
+import pytest
+import torch
+
+import ltx_video.pipelines.crf_compressor as crf_compressor
+from ltx_video.models.autoencoders.vae_encode import (
+    latent_to_pixel_coords_from_factors,
+    vae_decode,
+    vae_encode,
+)
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.schedulers.rf import RectifiedFlowScheduler
+from ltx_video.utils.profiling import process_memory
+
+# CPU regression suite on the tiny test models. Results are compared against
+# tests/benchmarks/baselines/cpu.json, see the --benchmark-* options of conftest.py.
+# Regenerate the baselines on the reference machine after an intended change:
+#   pytest tests/benchmarks/test_cpu_regression.py --benchmark --benchmark-update
+
+
+def median_seconds(fn, repeats=5, warmup=1) -> float:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def peak_memory_increase(fn) -> int:
+    """Peak resident memory `fn` adds to the process, measured by resetting VmHWM (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pytest.skip("Resetting the peak resident memory needs /proc/self/clear_refs")
+    before = process_memory()["VmRSS"]
+    fn()
+    return process_memory()["VmHWM"] - before
+
+
+@pytest.fixture
+def cpu_transformer(transformer_config):
+    torch.manual_seed(0)
+    return Transformer3DModel.from_config(transformer_config).eval()
+
+
+def transformer_inputs(grid, num_latent_channels, caption_channels):
+    latent_coords = torch.stack(
+        torch.meshgrid(*[torch.arange(n) for n in grid], indexing="ij")
+    ).reshape(1, 3, -1)
+    generator = torch.Generator().manual_seed(0)
+    return dict(
+        hidden_states=torch.randn(
+            1, latent_coords.shape[-1], num_latent_channels, generator=generator
+        ),
+        indices_grid=latent_to_pixel_coords_from_factors(
+            latent_coords, (8, 32, 32)
+        ).float(),
+        encoder_hidden_states=torch.randn(
+            1, 128, caption_channels, generator=generator
+        ),
+        encoder_attention_mask=torch.ones(1, 128),
+        timestep=torch.full((1, 1), 0.5),
+        return_dict=False,
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("grid", [(4, 8, 8), (4, 16, 16), (16, 16, 16)])
+def test_transformer_forward(
+    cpu_transformer, num_latent_channels, benchmark_baseline, grid
+):
+    inputs = transformer_inputs(
+        grid, num_latent_channels, cpu_transformer.config.caption_channels
+    )
+    num_tokens = inputs["hidden_states"].shape[1]
+    with torch.no_grad():
+        seconds = median_seconds(lambda: cpu_transformer(**inputs))
+    print(f"\n{num_tokens} tokens: {num_tokens / seconds:.0f} tokens/s")
+    benchmark_baseline.check(f"transformer_forward/tokens-{num_tokens}", seconds, "s")
+
+
+@pytest.mark.benchmark
+def test_scheduler_step(num_latent_channels, benchmark_baseline, num_steps=30):
+    scheduler = RectifiedFlowScheduler()
+    sample = torch.randn(1, 4096, num_latent_channels)
+    model_output = torch.randn_like(sample)
+
+    def run():
+        scheduler.set_timesteps(num_steps, samples_shape=sample.shape)
+        latents = sample
+        for t in scheduler.timesteps:
+            latents = scheduler.step(model_output, t, latents, return_dict=False)[0]
+
+    seconds = median_seconds(run) / num_steps
+    benchmark_baseline.check("scheduler_step", seconds, "s")
+
+
+@pytest.mark.benchmark
+def test_vae_encode_decode(video_autoencoder, benchmark_baseline):
+    vae = video_autoencoder.float()
+    video = torch.rand(1, 3, 17, 128, 128) * 2 - 1
+    with torch.no_grad():
+        latents = vae_encode(video, vae)
+        timestep = torch.tensor([0.05]) if vae.decoder.timestep_conditioning else None
+
+        def encode():
+            vae_encode(video, vae)
+
+        def decode():
+            vae_decode(latents, vae, timestep=timestep)
+
+        benchmark_baseline.check("vae_encode", median_seconds(encode), "s")
+        benchmark_baseline.check("vae_decode", median_seconds(decode), "s")
+        benchmark_baseline.check(
+            "vae_encode_peak_memory", peak_memory_increase(encode), "bytes"
+        )
+        benchmark_baseline.check(
+            "vae_decode_peak_memory", peak_memory_increase(decode), "bytes"
+        )
+
+
+@pytest.mark.benchmark
+def test_crf_preprocessing(benchmark_baseline):
+    generator = torch.Generator().manual_seed(0)
+    image = torch.rand(512, 768, 3, generator=generator)
+    frames = torch.rand(17, 256, 384, 3, generator=generator)
+    benchmark_baseline.check(
+        "crf_compress_image",
+        median_seconds(lambda: crf_compressor.compress(image)),
+        "s",
+    )
+    benchmark_baseline.check(
+        "crf_compress_frames",
+        median_seconds(lambda: crf_compressor.compress_batch(frames)),
+        "s",
+    )
+
+
+@pytest.mark.benchmark
+def test_pipeline_end_to_end(tiny_pipeline, generate_tiny, benchmark_baseline):
+    tiny_pipeline.vae = tiny_pipeline.vae.float()
+
+    def generate():
+        generate_tiny(
+            height=128,
+            width=128,
+            num_frames=17,
+            num_inference_steps=8,
+            guidance_scale=3,
+            output_type="pt",
+            is_video=True,
+            vae_per_channel_normalize=False,
+        )
+
+    with torch.no_grad():
+        benchmark_baseline.check(
+            "pipeline_end_to_end", median_seconds(generate, repeats=3), "s"
+        )
+        benchmark_baseline.check(
+            "pipeline_end_to_end_peak_memory", peak_memory_increase(generate), "bytes"
+        )
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+import torch
+
+from ltx_video.inference import create_transformer
+from ltx_video.models.autoencoders.vae_encode import latent_to_pixel_coords_from_factors
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+
+
+def median_seconds(fn, repeats=5):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+@pytest.mark.benchmark
+def test_int8_dynamic_transformer(synthetic_ckpt_path, num_latent_channels, tmp_path):
+    float_transformer = Transformer3DModel.from_checkpoint(
+        SafetensorsCheckpoint(synthetic_ckpt_path), dtype=torch.float32
+    )
+    int8_transformer = create_transformer(
+        synthetic_ckpt_path,
+        "int8_dynamic",
+        quantization_cache_dir=str(tmp_path / "cache"),
+    )
+
+    latent_coords = torch.stack(
+        torch.meshgrid(
+            torch.arange(4), torch.arange(16), torch.arange(16), indexing="ij"
+        )
+    ).reshape(1, 3, -1)
+    generator = torch.Generator().manual_seed(0)
+    inputs = dict(
+        hidden_states=torch.randn(
+            1, latent_coords.shape[-1], num_latent_channels, generator=generator
+        ),
+        indices_grid=latent_to_pixel_coords_from_factors(
+            latent_coords, (8, 32, 32)
+        ).float(),
+        encoder_hidden_states=torch.randn(1, 128, 4096, generator=generator),
+        encoder_attention_mask=torch.ones(1, 128),
+        timestep=torch.full((1, 1), 0.5),
+        return_dict=False,
+    )
+
+    with torch.no_grad():
+        expected = float_transformer(**inputs)[0]
+        actual = int8_transformer(**inputs)[0]
+        float_seconds = median_seconds(lambda: float_transformer(**inputs))
+        int8_seconds = median_seconds(lambda: int8_transformer(**inputs))
+    error = ((actual - expected).norm() / expected.norm()).item()
+
+    print(
+        f"\nTransformer forward on the CPU ({latent_coords.shape[-1]} tokens): "
+        f"float32 {float_seconds * 1000:.1f} ms, "
+        f"int8_dynamic {int8_seconds * 1000:.1f} ms "
+        f"({float_seconds / int8_seconds:.2f}x), relative error {error:.4f}"
+    )
+    assert error < 0.05
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from ltx_video.utils.skip_layer_strategy import SkipLayerStrategy
+
+# The first pass schedule of the 13B dev configs, where CFG and STG change per step
+GUIDANCE_TIMESTEPS = [1.0, 0.996, 0.9933, 0.9850, 0.9767, 0.9008, 0.6180]
+GUIDANCE_SCALE = [1, 1, 6, 8, 6, 1, 1]
+STG_SCALE = [0, 0, 4, 4, 4, 2, 1]
+SKIP_BLOCK_LIST = [[], [1], [0, 1], [1], [1], [1], [1]]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("static_guidance_shapes", [False, True])
+def test_step_overhead(
+    tiny_pipeline, generate_tiny, static_guidance_shapes, repeats=50
+):
+    """Time per denoising step spent outside the transformer forward, on the tiny models.
+
+    The tiny transformer is cheap, so this isolates the per-step work of the
+    denoising loop itself: input preparation, guidance and the scheduler step.
+    The loop is timed from the first transformer call to the last step callback.
+    """
+    transformer = tiny_pipeline.transformer
+    forward_seconds, loop_seconds, loop_start = [], [], []
+
+    def before_forward(module, args):
+        now = time.perf_counter()
+        if not loop_start:
+            loop_start.append(now)
+        forward_seconds.append(-now)
+
+    def on_step_end(pipeline, i, t, callback_kwargs):
+        if i == len(GUIDANCE_TIMESTEPS) - 1:
+            loop_seconds.append(time.perf_counter() - loop_start.pop())
+
+    transformer.register_forward_pre_hook(before_forward)
+    transformer.register_forward_hook(
+        lambda module, args, output: forward_seconds.append(time.perf_counter())
+    )
+
+    def generate():
+        generate_tiny(
+            timesteps=GUIDANCE_TIMESTEPS,
+            guidance_timesteps=GUIDANCE_TIMESTEPS,
+            guidance_scale=GUIDANCE_SCALE,
+            stg_scale=STG_SCALE,
+            skip_block_list=SKIP_BLOCK_LIST,
+            skip_layer_strategy=SkipLayerStrategy.AttentionValues,
+            static_guidance_shapes=static_guidance_shapes,
+            callback_on_step_end=on_step_end,
+        )
+
+    generate()  # warm-up
+    forward_seconds.clear()
+    loop_seconds.clear()
+    for _ in range(repeats):
+        generate()
+
+    num_steps = repeats * len(GUIDANCE_TIMESTEPS)
+    loop = sum(loop_seconds)
+    forward = sum(forward_seconds)
+    print(
+        f"\nstatic_guidance_shapes={static_guidance_shapes}: "
+        f"{1e3 * loop / num_steps:.2f} ms/step, "
+        f"{1e3 * forward / num_steps:.2f} ms/step in the transformer, "
+        f"{1e3 * (loop - forward) / num_steps:.3f} ms/step of loop overhead"
+    )
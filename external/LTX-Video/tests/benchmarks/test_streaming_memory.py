@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import safetensors.torch
+import torch
+
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+
+# Runs one transformer forward pass on the CPU in a fresh process and prints its time
+# and the peak RSS, with the blocks loaded up front or streamed from the checkpoint.
+FORWARD_SCRIPT = """
+import json, sys, time
+import torch
+from ltx_video.inference import create_transformer
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+from ltx_video.utils.profiling import process_memory
+
+path, stream_blocks = sys.argv[1], sys.argv[2] == "1"
+checkpoint = SafetensorsCheckpoint(path)
+transformer = create_transformer(checkpoint, "bfloat16", stream_blocks=stream_blocks)
+config = transformer.config
+num_tokens = 2 * 8 * 8
+coords = torch.stack(
+    torch.meshgrid(torch.arange(2), torch.arange(8), torch.arange(8), indexing="ij")
+).reshape(1, 3, -1).float()
+start = time.perf_counter()
+with torch.no_grad():
+    transformer(
+        torch.randn(1, num_tokens, config.in_channels, dtype=torch.bfloat16),
+        indices_grid=coords,
+        encoder_hidden_states=torch.randn(
+            1, 8, config.caption_channels, dtype=torch.bfloat16
+        ),
+        encoder_attention_mask=torch.ones(1, 8),
+        timestep=torch.full((1, 1), 0.5),
+    )
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_rss": process_memory()["VmHWM"]}))
+"""
+
+
+@pytest.fixture
+def transformer_ckpt_path(tmp_path, transformer_config):
+    """A transformer-only checkpoint of 16 blocks of width 1024, about 0.5 GiB in bfloat16."""
+    config = dict(
+        transformer_config,
+        num_attention_heads=16,
+        attention_head_dim=64,
+        cross_attention_dim=1024,
+        num_layers=16,
+    )
+    transformer = Transformer3DModel.from_config(config).to(torch.bfloat16)
+    path = str(tmp_path / "transformer.safetensors")
+    safetensors.torch.save_file(
+        {
+            f"model.diffusion_model.{key}": value
+            for key, value in transformer.state_dict().items()
+        },
+        path,
+        metadata={"config": json.dumps({"transformer": config})},
+    )
+    return path
+
+
+@pytest.mark.benchmark
+def test_block_streaming(transformer_ckpt_path):
+    """Set LTXV_BENCHMARK_CHECKPOINTS to measure the 2B and 13B checkpoints instead."""
+    paths = os.environ.get("LTXV_BENCHMARK_CHECKPOINTS")
+    for path in paths.split(os.pathsep) if paths else [transformer_ckpt_path]:
+        size = os.path.getsize(path)
+        print(f"\n{os.path.basename(path)} ({size / 1024**3:.2f} GiB), one forward:")
+        for stream_blocks in ["0", "1"]:
+            output = subprocess.run(
+                [sys.executable, "-c", FORWARD_SCRIPT, path, stream_blocks],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            mode = "streamed" if stream_blocks == "1" else "loaded"
+            print(
+                f"  {mode}: {result['seconds']:.2f} s, "
+                f"peak RSS {result['peak_rss'] / 1024**3:.2f} GiB"
+            )
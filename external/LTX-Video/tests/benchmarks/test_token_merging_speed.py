@@ -0,0 +1,49 @@
+import time
+
+import pytest
+import torch
+
+from ltx_video.models.autoencoders.vae_encode import latent_to_pixel_coords_from_factors
+from ltx_video.models.transformers.token_merging import TokenMerging
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+
+
+@pytest.mark.benchmark
+def test_token_merging_speed(synthetic_ckpt_path, num_latent_channels):
+    transformer = Transformer3DModel.from_checkpoint(
+        SafetensorsCheckpoint(synthetic_ckpt_path), dtype=torch.float32
+    )
+    latent_coords = torch.stack(
+        torch.meshgrid(
+            torch.arange(8), torch.arange(16), torch.arange(24), indexing="ij"
+        )
+    ).reshape(1, 3, -1)
+    generator = torch.Generator().manual_seed(0)
+    inputs = dict(
+        hidden_states=torch.randn(
+            1, latent_coords.shape[-1], num_latent_channels, generator=generator
+        ),
+        indices_grid=latent_to_pixel_coords_from_factors(
+            latent_coords, (8, 32, 32)
+        ).float(),
+        encoder_hidden_states=torch.randn(1, 128, 4096, generator=generator),
+        encoder_attention_mask=torch.ones(1, 128),
+        timestep=torch.full((1, 1), 0.5),
+        return_dict=False,
+    )
+
+    print(f"\nTransformer forward on {latent_coords.shape[-1]} tokens:")
+    with torch.no_grad():
+        expected = transformer(**inputs)[0]
+        for ratio in [0.0, 0.5, 0.75]:
+            token_merging = TokenMerging(ratio=ratio) if ratio else None
+            transformer(**inputs, token_merging=token_merging)
+            start = time.perf_counter()
+            output = transformer(**inputs, token_merging=token_merging)[0]
+            seconds = time.perf_counter() - start
+            error = ((output - expected).norm() / expected.norm()).item()
+            print(
+                f"  ratio {ratio:.2f}: {seconds * 1000:.1f} ms, "
+                f"relative error {error:.4f}"
+            )
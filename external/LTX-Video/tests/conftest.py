@@ -1,4 +1,8 @@
 import json
+import os
+import platform
+import warnings
+
 import pytest
 import safetensors.torch
 import torch
@@ -8,7 +12,120 @@ from ltx_video.models.autoencoders.causal_video_autoencoder import (
     create_video_autoencoder_demo_config,
     PER_CHANNEL_STATISTICS_PREFIX,
 )
+from ltx_video.models.autoencoders.vae_encode import latent_to_pixel_coords_from_factors
+from ltx_video.models.transformers.symmetric_patchifier import SymmetricPatchifier
 from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.pipelines.pipeline_ltx_video import LTXVideoPipeline
+from ltx_video.schedulers.rf import RectifiedFlowScheduler
+
+
+DEFAULT_BENCHMARK_BASELINE = os.path.join(
+    os.path.dirname(__file__), "benchmarks", "baselines", "cpu.json"
+)
+
+
+def benchmark_machine() -> dict:
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "torch": torch.__version__.split("+")[0],
+    }
+
+
+class BenchmarkBaseline:
+    """Compares benchmark results, where lower is better, against stored baselines.
+
+    Results more than `tolerance` above their baseline fail the benchmark. With
+    `update`, the results are stored as the new baselines instead, and written
+    to `path` at the end of the session. Results without a baseline pass.
+    """
+
+    def __init__(self, path: str, tolerance: float, update: bool):
+        self.path = path
+        self.tolerance = tolerance
+        self.update = update
+        self.data = {"machine": benchmark_machine(), "results": {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+            if not update and self.data.get("machine") != benchmark_machine():
+                warnings.warn(
+                    f"The baselines in {path} were measured on {self.data.get('machine')}, "
+                    f"not on this machine ({benchmark_machine()}). Regenerate them with "
+                    "--benchmark-update to compare like with like."
+                )
+
+    def check(
+        self, name: str, value: float, unit: str, tolerance: float = None
+    ) -> None:
+        tolerance = self.tolerance if tolerance is None else tolerance
+        baseline = self.data["results"].get(name)
+        if self.update:
+            self.data["results"][name] = {"value": value, "unit": unit}
+            print(f"{name}: {value:.6g} {unit} (new baseline)")
+            return
+        if baseline is None:
+            print(f"{name}: {value:.6g} {unit} (no baseline)")
+            return
+        change = value / baseline["value"] - 1
+        print(
+            f"{name}: {value:.6g} {unit}, baseline {baseline['value']:.6g} "
+            f"({change:+.0%})"
+        )
+        assert change <= tolerance, (
+            f"{name} regressed by {change:.0%} over its baseline "
+            f"({value:.6g} vs {baseline['value']:.6g} {unit}), "
+            f"more than the {tolerance:.0%} tolerance"
+        )
+
+    def save(self):
+        self.data["machine"] = benchmark_machine()
+        self.data["results"] = dict(sorted(self.data["results"].items()))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.data, f, indent=2)
+            f.write("\n")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="Run the benchmarks in tests/benchmarks",
+    )
+    parser.addoption(
+        "--benchmark-baseline",
+        default=DEFAULT_BENCHMARK_BASELINE,
+        help="JSON file of baseline benchmark results to compare against",
+    )
+    parser.addoption(
+        "--benchmark-update",
+        action="store_true",
+        default=False,
+        help="Write the benchmark results to the baseline file instead of comparing",
+    )
+    parser.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=0.3,
+        help="Fail a benchmark when it is slower (or uses more memory) than its baseline by more than this fraction",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: a timing benchmark, not a test")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
 
 
 def pytest_make_parametrize_id(config, val, argname):
@@ -17,6 +134,18 @@ def pytest_make_parametrize_id(config, val, argname):
     return f"{argname}-{repr(val)}"
 
 
+@pytest.fixture(scope="session")
+def benchmark_baseline(request):
+    baseline = BenchmarkBaseline(
+        request.config.getoption("--benchmark-baseline"),
+        tolerance=request.config.getoption("--benchmark-tolerance"),
+        update=request.config.getoption("--benchmark-update"),
+    )
+    yield baseline
+    if baseline.update:
+        baseline.save()
+
+
 @pytest.fixture
 def num_latent_channels():
     return 16
@@ -95,3 +224,112 @@ def synthetic_ckpt_path(
         metadata={"config": json.dumps(configs)},
     )
     return out_file_path
+
+
+@pytest.fixture
+def synthetic_transformer_inputs(num_latent_channels):
+    """Transformer inputs for the transformer of `synthetic_ckpt_path`, on a 2x3x4 latent grid."""
+    latent_coords = torch.stack(
+        torch.meshgrid(torch.arange(2), torch.arange(3), torch.arange(4), indexing="ij")
+    ).reshape(1, 3, -1)
+    coords = latent_to_pixel_coords_from_factors(latent_coords, (8, 32, 32)).float()
+    generator = torch.Generator().manual_seed(0)
+    return dict(
+        hidden_states=torch.randn(
+            1, coords.shape[-1], num_latent_channels, generator=generator
+        ),
+        indices_grid=coords,
+        encoder_hidden_states=torch.randn(1, 6, 4096, generator=generator),
+        encoder_attention_mask=torch.ones(1, 6),
+        timestep=torch.full((1, 1), 0.5),
+        return_dict=False,
+    )
+
+
+@pytest.fixture
+def small_transformer():
+    """A one block transformer with 4 latent channels and 8 caption channels."""
+    torch.manual_seed(0)
+    return Transformer3DModel(
+        num_attention_heads=2,
+        attention_head_dim=8,
+        in_channels=4,
+        out_channels=4,
+        num_layers=1,
+        cross_attention_dim=16,
+        caption_channels=8,
+        activation_fn="gelu-approximate",
+        attention_bias=True,
+        norm_elementwise_affine=False,
+        qk_norm="rms_norm",
+        standardization_norm="rms_norm",
+        positional_embedding_theta=10000.0,
+        positional_embedding_max_pos=[20, 2048, 2048],
+    ).eval()
+
+
+@pytest.fixture
+def fractional_coords():
+    """Token coordinates of a 3x4x5 latent grid at 25 fps, with time in seconds."""
+    latent_coords = torch.stack(
+        torch.meshgrid(torch.arange(3), torch.arange(4), torch.arange(5), indexing="ij")
+    ).reshape(1, 3, -1)
+    pixel_coords = latent_to_pixel_coords_from_factors(latent_coords, (8, 32, 32))
+    coords = pixel_coords.to(torch.float32)
+    coords[:, 0] = coords[:, 0] * (1.0 / 25)
+    return coords
+
+
+@pytest.fixture
+def tiny_pipeline(video_autoencoder, transformer_config):
+    """A pipeline of the tiny test models, without text encoder: pass prompt embeddings."""
+    torch.manual_seed(0)
+    transformer = Transformer3DModel.from_config(transformer_config).eval()
+    return LTXVideoPipeline(
+        tokenizer=None,
+        text_encoder=None,
+        vae=video_autoencoder,
+        transformer=transformer,
+        scheduler=RectifiedFlowScheduler(),
+        patchifier=SymmetricPatchifier(patch_size=1),
+        prompt_enhancer_image_caption_model=None,
+        prompt_enhancer_image_caption_processor=None,
+        prompt_enhancer_llm_model=None,
+        prompt_enhancer_llm_tokenizer=None,
+    )
+
+
+@pytest.fixture
+def generate_tiny(tiny_pipeline):
+    """Runs `tiny_pipeline` on fixed prompt embeddings and returns the pipeline output.
+
+    Defaults to 9 frames of 64x64 in 4 unguided steps, output as latents. Keyword
+    arguments override these defaults or add pipeline arguments.
+    """
+    tiny_pipeline.set_progress_bar_config(disable=True)
+    prompt_embeds = torch.randn(1, 8, 4096, generator=torch.Generator().manual_seed(1))
+
+    def generate(**kwargs):
+        # The VAE encoder samples conditioning latents from the global generator
+        torch.manual_seed(0)
+        return tiny_pipeline(
+            **{
+                "height": 64,
+                "width": 64,
+                "num_frames": 9,
+                "frame_rate": 25,
+                "prompt_embeds": prompt_embeds,
+                "prompt_attention_mask": torch.ones(1, 8),
+                "negative_prompt": None,
+                "negative_prompt_embeds": torch.zeros_like(prompt_embeds),
+                "negative_prompt_attention_mask": torch.ones(1, 8),
+                "num_inference_steps": 4,
+                "guidance_scale": 1,
+                "stg_scale": 0,
+                "generator": torch.Generator().manual_seed(0),
+                "output_type": "latent",
+                **kwargs,
+            }
+        )
+
+    return generate
@@ -0,0 +1,49 @@
+import pytest
+import torch
+
+from ltx_video.models.transformers.transformer3d import (
+    BlockResidualCache,
+    Transformer3DModel,
+)
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+
+
+def materialized_blocks(transformer):
+    return sum(
+        block.attn1.to_q.weight.numel() > 0 for block in transformer.transformer_blocks
+    )
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_streamed_forward_matches_loaded_transformer(
+    synthetic_ckpt_path, synthetic_transformer_inputs, prefetch
+):
+    checkpoint = SafetensorsCheckpoint(synthetic_ckpt_path)
+    expected_transformer = Transformer3DModel.from_checkpoint(
+        checkpoint, dtype=torch.float32
+    )
+    transformer = Transformer3DModel.from_checkpoint(
+        SafetensorsCheckpoint(synthetic_ckpt_path), stream_blocks=True
+    )
+    transformer.block_streamer.prefetch = prefetch
+    # Placeholders follow the model's dtype, like the loaded weights would
+    transformer = transformer.to(torch.float32)
+    assert materialized_blocks(transformer) == 0
+
+    resident = []
+    for block in transformer.transformer_blocks:
+        block.register_forward_pre_hook(
+            lambda module, args: resident.append(materialized_blocks(transformer))
+        )
+    inputs = synthetic_transformer_inputs
+    with torch.no_grad():
+        expected = expected_transformer(**inputs)[0]
+        actual = transformer(**inputs)[0]
+        cache = BlockResidualCache(threshold=0.1)
+        cached = transformer(**inputs, residual_cache=cache)[0]
+
+    assert torch.equal(actual, expected)
+    assert torch.equal(cached, expected)
+    # Only the running block is loaded in the model (the next one may be in flight)
+    assert resident == [1] * len(transformer.transformer_blocks) * 2
+    assert materialized_blocks(transformer) == 0
@@ -0,0 +1,42 @@
+import safetensors.torch
+import torch
+
+from ltx_video.models.autoencoders.causal_video_autoencoder import (
+    CausalVideoAutoencoder,
+)
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+
+
+def test_tensors_match_safetensors(synthetic_ckpt_path):
+    expected = safetensors.torch.load_file(synthetic_ckpt_path)
+    checkpoint = SafetensorsCheckpoint(synthetic_ckpt_path)
+    assert sorted(checkpoint.keys()) == sorted(expected)
+    for name, tensor in expected.items():
+        assert torch.equal(checkpoint.get_tensor(name), tensor)
+
+    # Tensors in their stored dtype on the CPU are views of the mapped file
+    name = next(iter(expected))
+    assert (
+        checkpoint.get_tensor(name).data_ptr() == checkpoint.get_tensor(name).data_ptr()
+    )
+    assert checkpoint.get_tensor(name, dtype=torch.float16).dtype == torch.float16
+
+
+def test_models_load_in_their_final_dtype(synthetic_ckpt_path):
+    checkpoint = SafetensorsCheckpoint(synthetic_ckpt_path)
+    expected = safetensors.torch.load_file(synthetic_ckpt_path)
+
+    transformer = Transformer3DModel.from_checkpoint(checkpoint, dtype=torch.float32)
+    for name, tensor in transformer.state_dict().items():
+        assert tensor.dtype == torch.float32
+        assert torch.equal(tensor, expected[f"model.diffusion_model.{name}"].float())
+
+    vae = CausalVideoAutoencoder.from_checkpoint(checkpoint, dtype=torch.bfloat16)
+    tensors = list(vae.parameters()) + list(vae.buffers())
+    assert all(tensor.dtype == torch.bfloat16 for tensor in tensors)
+    assert not any(tensor.is_meta for tensor in tensors)
+    assert torch.equal(
+        vae.std_of_means,
+        expected["vae.per_channel_statistics.std-of-means"].bfloat16(),
+    )
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from ltx_video.inference import InferenceConfig
+from ltx_video.pipelines.device_pool import DevicePoolScheduler, DeviceWorker
+from ltx_video.utils.cancellation import CancellationToken, GenerationCancelled
+
+
+class StubRunner:
+    """Records which worker ran which prompt; the first job blocks until released."""
+
+    def __init__(self, device, log, gate=None):
+        self.device = device
+        self.log = log
+        self.gate = gate
+
+    def __call__(self, config):
+        if self.gate is not None:
+            self.gate.wait()
+        self.log.append((self.device, config.prompt))
+        return config.prompt
+
+
+def make_scheduler(devices, log, gate=None, **kwargs):
+    workers = [
+        DeviceWorker(device, run_job=StubRunner(device, log, gate), speed=speed)
+        for device, speed in devices
+    ]
+    return DevicePoolScheduler(workers, cost_estimator=lambda config: 1.0, **kwargs)
+
+
+def test_cheapest_job_first():
+    log, gate = [], threading.Event()
+    scheduler = make_scheduler([("cpu", 1.0)], log, gate)
+    futures = [scheduler.submit(InferenceConfig(prompt="blocker"))]
+    for prompt, cost in [("big", 30), ("small", 10), ("medium", 20)]:
+        futures.append(scheduler.submit(InferenceConfig(prompt=prompt), cost=cost))
+    assert scheduler.queue_depth == 3
+
+    gate.set()
+    assert [f.result(timeout=10) for f in futures] == [
+        "blocker",
+        "big",
+        "small",
+        "medium",
+    ]
+    assert [prompt for _, prompt in log] == ["blocker", "small", "medium", "big"]
+    scheduler.shutdown()
+
+
+def test_prefers_worker_with_config_loaded():
+    log = []
+    scheduler = make_scheduler([("cuda:0", 1.0), ("cuda:1", 1.0)], log)
+    scheduler.workers[1].loaded_configs.add("configs/b.yaml")
+
+    scheduler.submit(
+        InferenceConfig(prompt="b", pipeline_config="configs/b.yaml")
+    ).result(timeout=10)
+    assert log == [("cuda:1", "b")]
+
+    # Unknown configs go to the fastest idle worker
+    scheduler.workers[0].speed = 2.0
+    scheduler.submit(InferenceConfig(prompt="c")).result(timeout=10)
+    assert log[-1] == ("cuda:0", "c")
+    scheduler.shutdown()
+
+
+def test_job_pinned_to_device_waits_for_it():
+    log, gate = [], threading.Event()
+    scheduler = make_scheduler([("cuda:0", 2.0), ("cuda:1", 1.0)], log, gate)
+    futures = [
+        scheduler.submit(InferenceConfig(prompt=prompt), device="cuda:1")
+        for prompt in ["blocker", "pinned"]
+    ]
+    # cuda:0 is idle, but the pinned job waits for cuda:1
+    assert scheduler.queue_depth == 1
+    gate.set()
+    for future in futures:
+        future.result(timeout=10)
+    assert log == [("cuda:1", "blocker"), ("cuda:1", "pinned")]
+
+    with pytest.raises(ValueError):
+        scheduler.submit(InferenceConfig(prompt="x"), device="cuda:7")
+    scheduler.shutdown()
+
+
+def test_starved_jobs_are_served_in_order():
+    log, gate = [], threading.Event()
+    scheduler = make_scheduler([("cpu", 1.0)], log, gate, max_wait_seconds=0)
+    futures = [
+        scheduler.submit(InferenceConfig(prompt=prompt), cost=cost)
+        for prompt, cost in [("blocker", 1), ("big", 30), ("small", 10)]
+    ]
+    gate.set()
+    for future in futures:
+        future.result(timeout=10)
+    assert [prompt for _, prompt in log] == ["blocker", "big", "small"]
+    scheduler.shutdown()
+
+
+def test_stats_and_errors():
+    def failing_job(config):
+        raise RuntimeError("out of memory")
+
+    scheduler = DevicePoolScheduler(
+        [DeviceWorker("cpu", run_job=failing_job)], cost_estimator=lambda c: 1.0
+    )
+    future = scheduler.submit(InferenceConfig(prompt="a"))
+    assert isinstance(future.exception(timeout=10), RuntimeError)
+
+    stats = scheduler.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["workers"][0]["device"] == "cpu"
+    assert stats["workers"][0]["jobs_done"] == 1
+    assert 0.0 <= stats["workers"][0]["utilization"] <= 1.0
+    scheduler.shutdown()
+
+
+def test_job_cancelled_while_queued_is_not_run():
+    log, gate = [], threading.Event()
+    scheduler = make_scheduler([("cpu", 1.0)], log, gate)
+    blocker = scheduler.submit(InferenceConfig(prompt="blocker"))
+    token = CancellationToken()
+    cancelled = scheduler.submit(
+        InferenceConfig(prompt="cancelled"), cancellation_token=token
+    )
+    token.cancel()
+    gate.set()
+
+    assert blocker.result(timeout=10) == "blocker"
+    assert isinstance(cancelled.exception(timeout=10), GenerationCancelled)
+    assert log == [("cpu", "blocker")]
+    scheduler.shutdown()
@@ -0,0 +1,67 @@
+import pytest
+import torch
+
+from ltx_video.models.autoencoders.vae_encode import vae_encode
+from ltx_video.utils.cancellation import CancellationToken, GenerationCancelled
+from ltx_video.utils.latent_preview import LatentPreviewer
+
+
+def test_previewer_projects_latents():
+    weight = torch.zeros(3, 4)
+    weight[0, 0] = weight[1, 1] = weight[2, 2] = 1.0
+    previewer = LatentPreviewer(weight, bias=torch.tensor([0.0, 0.0, -0.5]))
+    latents = torch.zeros(2, 4, 3, 5, 6)
+    latents[:, 0] = 1.0
+    latents[:, 1] = -1.0
+    latents[:, 3] = 100.0
+
+    frames = previewer(latents)
+    assert frames.shape == (2, 3, 5, 6, 3)
+    assert frames.dtype == torch.uint8
+    assert frames[0, 0, 0, 0].tolist() == [255, 0, 64]
+
+
+def test_fit_to_vae(video_autoencoder, num_latent_channels):
+    vae = video_autoencoder.float()
+    previewer = LatentPreviewer.fit(vae, num_probes=2, probe_latent_size=2)
+    assert previewer.weight.shape == (3, num_latent_channels)
+
+    video = torch.zeros(1, 3, 9, 64, 64)
+    frames = previewer(vae_encode(video, vae))
+    assert frames.shape == (1, 2, 2, 2, 3)
+
+
+def test_pipeline_previews_and_cancels(tiny_pipeline, generate_tiny):
+    vae = tiny_pipeline.vae.float()
+    previewer = LatentPreviewer.fit(vae, num_probes=2, probe_latent_size=2)
+    tiny_pipeline.latent_previewer = lambda vae_per_channel_normalize: previewer
+
+    def run_tiny_pipeline(**kwargs):
+        return generate_tiny(
+            guidance_scale=3, is_video=True, vae_per_channel_normalize=False, **kwargs
+        )
+
+    previews = []
+    run_tiny_pipeline(
+        preview_callback=lambda step, frames: previews.append((step, frames)),
+        preview_every_n_steps=2,
+    )
+    assert [step for step, _ in previews] == [1, 3]
+    assert all(frames.shape == (1, 2, 2, 2, 3) for _, frames in previews)
+
+    token = CancellationToken()
+    steps = []
+
+    def cancel_after_second_step(pipe, i, t, stats):
+        steps.append(i)
+        if i == 1:
+            token.cancel()
+
+    with pytest.raises(GenerationCancelled):
+        run_tiny_pipeline(
+            callback_on_step_end=cancel_after_second_step,
+            cancellation_token=token,
+        )
+    assert steps == [0, 1]
+    with pytest.raises(GenerationCancelled):
+        run_tiny_pipeline(cancellation_token=token)
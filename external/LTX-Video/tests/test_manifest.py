@@ -0,0 +1,194 @@
+import json
+from types import SimpleNamespace
+
+import av
+import numpy as np
+import pytest
+import torch
+import yaml
+
+from ltx_video.inference import (
+    InferenceConfig,
+    get_cached_result,
+    infer,
+    read_manifest,
+)
+
+
+class StubPipeline:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompt, generator, height, width, num_frames, **kwargs):
+        batch_size = len(prompt) if isinstance(prompt, list) else 1
+        self.calls.append(dict(kwargs, prompt=prompt, generator=generator))
+        return SimpleNamespace(
+            images=torch.rand(batch_size, 3, num_frames, height, width)
+        )
+
+
+class StreamingStubPipeline(StubPipeline):
+    """Returns the same videos for every call, as frame chunks when asked to stream them."""
+
+    def __call__(self, prompt, generator, height, width, num_frames, **kwargs):
+        batch_size = len(prompt) if isinstance(prompt, list) else 1
+        self.calls.append(dict(kwargs, prompt=prompt, generator=generator))
+        videos = torch.rand(
+            batch_size,
+            3,
+            num_frames,
+            height,
+            width,
+            generator=torch.Generator().manual_seed(0),
+        )
+        chunk_size = kwargs.get("vae_decode_chunk_size")
+        if chunk_size is None:
+            return SimpleNamespace(images=videos)
+        return SimpleNamespace(images=iter(videos.split(chunk_size, dim=2)))
+
+
+class StubRegistry:
+    def __init__(self, pipeline=None):
+        self.pipeline = pipeline or StubPipeline()
+        self.loads = 0
+
+    def get(self, pipeline_config, device=None, enhance_prompt=False):
+        self.loads += 1
+        return self.pipeline
+
+
+@pytest.fixture
+def pipeline_config_path(tmp_path):
+    path = tmp_path / "pipeline.yaml"
+    path.write_text(
+        yaml.safe_dump(
+            {
+                "prompt_enhancement_words_threshold": 0,
+                "precision": "float32",
+                "stg_mode": "attention_values",
+                "guidance_scale": 3,
+            }
+        )
+    )
+    return str(path)
+
+
+def write_manifest(path, jobs):
+    path.write_text("\n".join(json.dumps(job) for job in jobs) + "\n")
+    return str(path)
+
+
+def test_read_manifest_rejects_unknown_fields(tmp_path):
+    manifest = write_manifest(tmp_path / "jobs.jsonl", [{"prompt": "a", "fps": 3}])
+    with pytest.raises(ValueError, match="fps"):
+        read_manifest(manifest, InferenceConfig())
+
+
+def test_manifest_groups_jobs_and_loads_pipeline_once(tmp_path, pipeline_config_path):
+    jobs = [
+        {"prompt": "a cat", "seed": 1},
+        {"prompt": "a dog", "seed": 2, "height": 64},
+        {"prompt": "a bird", "seed": 3, "width": 60},
+        {"prompt": "a fish", "seed": 4, "num_frames": 17},
+    ]
+    config = InferenceConfig(
+        manifest_path=write_manifest(tmp_path / "jobs.jsonl", jobs),
+        output_path=str(tmp_path / "out"),
+        pipeline_config=pipeline_config_path,
+        height=64,
+        width=64,
+        num_frames=9,
+        device="cpu",
+        max_batch_size=4,
+    )
+    registry = StubRegistry()
+    outputs = infer(config, pipeline_registry=registry)
+
+    assert registry.loads == 1
+    # The 60 pixel wide job is padded to the same latent shape as the first two
+    calls = registry.pipeline.calls
+    assert [call["prompt"] for call in calls] == [
+        ["a cat", "a dog", "a bird"],
+        "a fish",
+    ]
+    assert len(calls[0]["generator"]) == 3
+    assert "stg_mode" not in calls[0]
+    assert len(outputs) == 4 and all(path.exists() for path in outputs)
+
+
+def test_infer_can_be_called_repeatedly(tmp_path, pipeline_config_path):
+    config = InferenceConfig(
+        prompt="a cat",
+        output_path=str(tmp_path / "out"),
+        pipeline_config=pipeline_config_path,
+        height=32,
+        width=32,
+        num_frames=9,
+        device="cpu",
+    )
+    registry = StubRegistry()
+    infer(config, pipeline_registry=registry)
+    infer(config, pipeline_registry=registry)
+
+    calls = registry.pipeline.calls
+    assert len(calls) == 2
+    assert calls[0]["prompt"] == calls[1]["prompt"] == "a cat"
+    assert calls[1]["guidance_scale"] == 3
+
+
+def test_infer_returns_cached_result(tmp_path, pipeline_config_path):
+    config = InferenceConfig(
+        prompt="a cat",
+        output_path=str(tmp_path / "out"),
+        pipeline_config=pipeline_config_path,
+        height=32,
+        width=32,
+        num_frames=9,
+        device="cpu",
+        result_cache_dir=str(tmp_path / "results"),
+    )
+    registry = StubRegistry()
+    assert get_cached_result(config) is None
+    first = infer(config, pipeline_registry=registry)
+    second = infer(config, pipeline_registry=registry)
+    assert get_cached_result(config) == second
+
+    assert len(registry.pipeline.calls) == 1
+    assert second[0].read_bytes() == first[0].read_bytes()
+
+    config.seed += 1
+    infer(config, pipeline_registry=registry)
+    assert len(registry.pipeline.calls) == 2
+
+
+def read_frames(path):
+    with av.open(str(path)) as container:
+        return np.stack(
+            [frame.to_ndarray(format="rgb24") for frame in container.decode(video=0)]
+        )
+
+
+def test_infer_writes_streamed_chunks(tmp_path, pipeline_config_path):
+    jobs = [{"prompt": "a cat", "seed": 1}, {"prompt": "a bird", "width": 60}]
+    outputs = {}
+    for chunk_size in (None, 4):
+        config = InferenceConfig(
+            manifest_path=write_manifest(tmp_path / "jobs.jsonl", jobs),
+            output_path=str(tmp_path / f"out_{chunk_size}"),
+            pipeline_config=pipeline_config_path,
+            height=64,
+            width=64,
+            num_frames=15,
+            device="cpu",
+            max_batch_size=2,
+            vae_decode_chunk_size=chunk_size,
+        )
+        registry = StubRegistry(StreamingStubPipeline())
+        outputs[chunk_size] = infer(config, pipeline_registry=registry)
+        assert registry.pipeline.calls[0].get("vae_decode_chunk_size") == chunk_size
+
+    for full, streamed, width in zip(outputs[None], outputs[4], (64, 60)):
+        frames = read_frames(streamed)
+        # The padded frames and pixels are cropped from every chunk
+        assert frames.shape[:3] == (15, 64, width)
+        np.testing.assert_array_equal(frames, read_frames(full))
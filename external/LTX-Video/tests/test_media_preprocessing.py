@@ -0,0 +1,62 @@
+import torch
+from PIL import Image
+
+from ltx_video.inference import (
+    load_frames_to_tensor_with_resize_and_crop,
+    load_image_to_tensor_with_resize_and_crop,
+    load_media_file,
+)
+from ltx_video.pipelines import crf_compressor
+from ltx_video.utils.media_reader import count_video_frames, iter_video_frames
+from ltx_video.utils.video_writer import write_video
+
+
+def make_frames(num_frames=6, height=96, width=160):
+    torch.manual_seed(0)
+    frames = torch.nn.functional.interpolate(
+        torch.rand(num_frames, 3, height // 8, width // 8),
+        size=(height, width),
+        mode="bilinear",
+    )
+    return (frames.permute(0, 2, 3, 1) * 255).byte().numpy()
+
+
+def test_compress_batch_matches_per_frame_artifacts():
+    images = torch.from_numpy(make_frames()).float() / 255.0
+    per_frame = torch.stack([crf_compressor.compress(image) for image in images])
+    batched = crf_compressor.compress_batch(images)
+
+    assert batched.shape == per_frame.shape
+    per_frame_error = (per_frame - images).abs().mean()
+    batched_error = (batched - images).abs().mean()
+    assert abs(batched_error - per_frame_error) < 0.25 * per_frame_error
+    assert torch.equal(crf_compressor.compress_batch(images, crf=0), images)
+
+
+def test_load_frames_matches_per_frame_loading():
+    frames = make_frames()
+    per_frame = torch.cat(
+        [
+            load_image_to_tensor_with_resize_and_crop(Image.fromarray(frame), 64, 96)
+            for frame in frames
+        ],
+        dim=2,
+    )
+    batched = load_frames_to_tensor_with_resize_and_crop(frames, 64, 96)
+
+    assert batched.shape == per_frame.shape == (1, 3, len(frames), 64, 96)
+    assert (batched - per_frame).abs().mean() < 0.05
+
+
+def test_video_reader_stops_at_max_frames(tmp_path):
+    video_path = str(tmp_path / "clip.mp4")
+    video = torch.from_numpy(make_frames(num_frames=20)).permute(3, 0, 1, 2) / 255.0
+    write_video(video, video_path, fps=24)
+
+    assert count_video_frames(video_path) == 20
+    batches = list(iter_video_frames(video_path, max_frames=13, batch_size=5))
+    assert [len(batch) for batch in batches] == [5, 5, 3]
+    assert batches[0].shape[1:] == (96, 160, 3)
+
+    media = load_media_file(video_path, 64, 96, max_frames=13, padding=(0, 0, 0, 0))
+    assert media.shape == (1, 3, 13, 64, 96)
@@ -0,0 +1,94 @@
+from torch import nn
+
+from ltx_video.pipelines.pipeline_registry import PipelineRegistry, module_nbytes
+
+
+class StubPipeline:
+    def __init__(self, transformer, text_encoder, tokenizer):
+        self.transformer = transformer
+        self.text_encoder = text_encoder
+        self.tokenizer = tokenizer
+
+
+def make_registry(memory_budget_bytes):
+    loads = {"pipeline": 0, "text_encoder": 0, "tokenizer": 0}
+
+    def pipeline_factory(
+        config, device, enhance_prompt, text_encoder, tokenizer, **kwargs
+    ):
+        loads["pipeline"] += 1
+        return StubPipeline(
+            nn.Linear(config["width"], config["width"]), text_encoder, tokenizer
+        )
+
+    def text_encoder_factory(name, device):
+        loads["text_encoder"] += 1
+        return nn.Linear(4, 4)
+
+    def tokenizer_factory(name):
+        loads["tokenizer"] += 1
+        return object()
+
+    registry = PipelineRegistry(
+        memory_budget_bytes=memory_budget_bytes,
+        pipeline_factory=pipeline_factory,
+        text_encoder_factory=text_encoder_factory,
+        tokenizer_factory=tokenizer_factory,
+    )
+    return registry, loads
+
+
+def make_config(width):
+    return {"text_encoder_model_name_or_path": "t5", "width": width}
+
+
+def test_registry_reuses_loaded_pipeline():
+    registry, loads = make_registry(memory_budget_bytes=None)
+    first = registry.get(make_config(8), device="cpu")
+    second = registry.get(make_config(8), device="cpu")
+    assert first is second
+    assert loads == {"pipeline": 1, "text_encoder": 1, "tokenizer": 1}
+
+
+def test_registry_shares_text_encoder_between_configs():
+    registry, loads = make_registry(memory_budget_bytes=None)
+    first = registry.get(make_config(8), device="cpu")
+    second = registry.get(make_config(16), device="cpu")
+    assert first is not second
+    assert first.text_encoder is second.text_encoder
+    assert first.tokenizer is second.tokenizer
+    assert loads == {"pipeline": 2, "text_encoder": 1, "tokenizer": 1}
+    expected = sum(
+        module_nbytes(m) for m in (first.transformer, second.transformer)
+    ) + module_nbytes(first.text_encoder)
+    assert registry.resident_bytes == expected
+
+
+def test_registry_evicts_least_recently_used():
+    per_pipeline = module_nbytes(nn.Linear(8, 8))
+    text_encoder = module_nbytes(nn.Linear(4, 4))
+    registry, loads = make_registry(memory_budget_bytes=2 * per_pipeline + text_encoder)
+    a, b, c = make_config(8), make_config(8), make_config(8)
+    b["variant"], c["variant"] = "b", "c"
+
+    registry.get(a, device="cpu")
+    registry.get(b, device="cpu")
+    registry.get(a, device="cpu")  # a is now the most recently used
+    registry.get(c, device="cpu")
+
+    assert len(registry) == 2
+    assert registry.make_key(a, "cpu", False) in registry
+    assert registry.make_key(b, "cpu", False) not in registry
+    assert registry.make_key(c, "cpu", False) in registry
+    assert registry.resident_bytes <= registry.memory_budget_bytes
+
+
+def test_registry_release_frees_shared_components():
+    registry, loads = make_registry(memory_budget_bytes=None)
+    registry.get(make_config(8), device="cpu")
+    registry.release()
+    assert len(registry) == 0
+    assert registry.resident_bytes == 0
+
+    registry.get(make_config(8), device="cpu")
+    assert loads["text_encoder"] == 2
@@ -0,0 +1,29 @@
+import torch
+
+
+def test_repeated_freqs_match_batched_computation(small_transformer, fractional_coords):
+    transformer, coords = small_transformer, fractional_coords
+    cos, sin = transformer.precompute_freqs_cis(coords)
+    batched_cos, batched_sin = transformer.precompute_freqs_cis(torch.cat([coords] * 3))
+    assert torch.equal(torch.cat([cos] * 3), batched_cos)
+    assert torch.equal(torch.cat([sin] * 3), batched_sin)
+
+
+def test_forward_with_precomputed_freqs(small_transformer, fractional_coords):
+    transformer = small_transformer
+    coords = torch.cat([fractional_coords] * 2)
+    num_tokens = coords.shape[-1]
+    kwargs = dict(
+        hidden_states=torch.randn(2, num_tokens, 4),
+        indices_grid=coords,
+        encoder_hidden_states=torch.randn(2, 6, 8),
+        encoder_attention_mask=torch.ones(2, 6),
+        timestep=torch.full((2, 1), 0.5),
+        return_dict=False,
+    )
+    with torch.no_grad():
+        expected = transformer(**kwargs)[0]
+        actual = transformer(
+            **kwargs, freqs_cis=transformer.precompute_freqs_cis(coords)
+        )[0]
+    assert torch.equal(expected, actual)
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+
+from ltx_video.utils.profiling import JsonLinesSink, StageProfiler
+
+
+def test_profiler_records_nested_stages(tmp_path):
+    sink_path = tmp_path / "stages.jsonl"
+    received = []
+    profiler = StageProfiler("cpu", sinks=[received.append, JsonLinesSink(sink_path)])
+    with profiler.stage("outer"):
+        for step in range(2):
+            stage = profiler.begin("step", step=step)
+            profiler.end(stage)
+
+    assert [r.name for r in received] == ["step", "step", "outer"]
+    assert [r.depth for r in received] == [1, 1, 0]
+    assert received[0].args == {"step": 0}
+    assert received[2].seconds >= received[0].seconds + received[1].seconds
+    assert received[2].peak_memory_bytes is None
+    lines = sink_path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["step", "step", "outer"]
+
+    summary = profiler.summary()
+    assert list(summary) == ["step", "outer"]
+    assert summary["step"]["count"] == 2
+
+    trace_path = tmp_path / "trace.json"
+    profiler.save(trace_path)
+    trace = json.loads(trace_path.read_text())
+    assert [e["name"] for e in trace["traceEvents"]] == ["outer", "step", "step"]
+    assert all(e["ph"] == "X" for e in trace["traceEvents"])
+    assert trace["summary"]["outer"]["count"] == 1
+
+
+def test_pipeline_reports_stages(generate_tiny):
+    profiler = StageProfiler("cpu")
+    step_stats = []
+    generate_tiny(
+        guidance_scale=[1, 3],
+        guidance_timesteps=[1.0, 0.5],
+        output_type="pt",
+        is_video=True,
+        vae_per_channel_normalize=False,
+        profiler=profiler,
+        callback_on_step_end=lambda pipe, i, t, stats: step_stats.append(stats),
+    )
+
+    summary = profiler.summary()
+    assert list(summary) == [
+        "text_encoding",
+        "conditioning_encode",
+        "denoising_step[1 branches]",
+        "denoising_step[2 branches]",
+        "vae_decode",
+    ]
+    assert (
+        summary["denoising_step[1 branches]"]["count"]
+        + summary["denoising_step[2 branches]"]["count"]
+        == 4
+    )
+    assert len(step_stats) == 4
+    assert all(stats["seconds"] > 0 for stats in step_stats)
+    assert {stats["num_branches"] for stats in step_stats} == {1, 2}
+
+
+def test_failed_step_closes_its_stage(tiny_pipeline, generate_tiny):
+    profiler = StageProfiler("cpu")
+
+    def fail(module, args):
+        raise RuntimeError("transformer failed")
+
+    tiny_pipeline.transformer.register_forward_pre_hook(fail)
+    with profiler.stage("generation"):
+        with pytest.raises(RuntimeError, match="transformer failed"):
+            generate_tiny(profiler=profiler)
+    # The stage of the failed step was closed, so the enclosing one ends cleanly
+    assert [r.name for r in profiler.records][-2:] == [
+        "denoising_step[1 branches]",
+        "generation",
+    ]
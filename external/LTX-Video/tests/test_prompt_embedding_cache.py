@@ -0,0 +1,143 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import torch
+from torch import nn
+
+from ltx_video.pipelines.pipeline_ltx_video import LTXVideoPipeline
+from ltx_video.pipelines.prompt_embedding_cache import PromptEmbeddingCache
+
+
+class StubTokenizer:
+    name_or_path = "stub-t5"
+
+    def __len__(self):
+        return 100
+
+    def __call__(self, texts, padding, max_length=None, return_tensors="pt", **kwargs):
+        length = max_length if padding == "max_length" else 4
+        ids = torch.stack(
+            [torch.full((length,), len(text) % 100, dtype=torch.long) for text in texts]
+        )
+        return SimpleNamespace(input_ids=ids, attention_mask=torch.ones_like(ids))
+
+
+class StubTextEncoder(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.embedding = nn.Embedding(100, 8)
+        self.calls = 0
+
+    def forward(self, input_ids, attention_mask=None):
+        self.calls += 1
+        return (self.embedding(input_ids),)
+
+
+def make_stub_pipeline(cache):
+    return SimpleNamespace(
+        tokenizer=StubTokenizer(),
+        text_encoder=StubTextEncoder(),
+        prompt_embedding_cache=cache,
+        _execution_device=torch.device("cpu"),
+    )
+
+
+def test_cache_lru_eviction():
+    cache = PromptEmbeddingCache(max_entries=2)
+    for i in range(3):
+        cache.put(str(i), torch.full((1, 4, 8), float(i)), torch.ones(1, 4))
+    assert len(cache) == 2
+    assert cache.get("0") is None
+    assert torch.equal(cache.get("2")[0], torch.full((1, 4, 8), 2.0))
+
+
+def test_cache_disk_round_trip(tmp_path):
+    embeddings = torch.randn(1, 4, 8, dtype=torch.bfloat16)
+    mask = torch.tensor([[1, 1, 0, 0]])
+    PromptEmbeddingCache(cache_dir=str(tmp_path)).put("key", embeddings, mask)
+
+    # A fresh cache (e.g. after a restart) serves the entry from disk
+    cached_embeddings, cached_mask = PromptEmbeddingCache(cache_dir=str(tmp_path)).get(
+        "key"
+    )
+    assert torch.equal(cached_embeddings, embeddings)
+    assert torch.equal(cached_mask, mask)
+
+
+def test_concurrent_writers_of_one_key(tmp_path):
+    # Pool workers share one cache and may encode the same prompt at once
+    cache = PromptEmbeddingCache(cache_dir=str(tmp_path))
+    embeddings = torch.randn(1, 4, 8)
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def put():
+        barrier.wait()
+        try:
+            cache.put("key", embeddings, torch.ones(1, 4))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert os.listdir(tmp_path) == ["key.safetensors"]
+    assert torch.equal(
+        PromptEmbeddingCache(cache_dir=str(tmp_path)).get("key")[0], embeddings
+    )
+
+
+def test_disk_write_errors_are_not_fatal(tmp_path, monkeypatch):
+    cache = PromptEmbeddingCache(cache_dir=str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr("ltx_video.pipelines.prompt_embedding_cache.save_file", fail)
+    cache.put("key", torch.randn(1, 4, 8), torch.ones(1, 4))
+    assert cache.get("key") is not None
+    assert os.listdir(tmp_path) == []
+
+
+def test_cache_key_depends_on_settings():
+    tokenizer = StubTokenizer()
+    key = PromptEmbeddingCache.make_key("a cat", tokenizer, 256, torch.bfloat16)
+    assert key == PromptEmbeddingCache.make_key("a cat", tokenizer, 256, torch.bfloat16)
+    assert key != PromptEmbeddingCache.make_key("a dog", tokenizer, 256, torch.bfloat16)
+    assert key != PromptEmbeddingCache.make_key("a cat", tokenizer, 128, torch.bfloat16)
+    assert key != PromptEmbeddingCache.make_key("a cat", tokenizer, 256, torch.float32)
+
+
+def test_encode_texts_skips_text_encoder_on_hit():
+    pipeline = make_stub_pipeline(PromptEmbeddingCache())
+    texts = ["a cat", "blurry", "blurry"]
+
+    embeddings, mask = LTXVideoPipeline._encode_texts(
+        pipeline, texts, 16, torch.float32
+    )
+    assert embeddings.shape == (3, 16, 8)
+    assert mask.shape == (3, 16)
+    assert pipeline.text_encoder.calls == 1
+
+    cached_embeddings, cached_mask = LTXVideoPipeline._encode_texts(
+        pipeline, texts, 16, torch.float32
+    )
+    assert pipeline.text_encoder.calls == 1
+    assert torch.equal(cached_embeddings, embeddings)
+    assert torch.equal(cached_mask, mask)
+
+
+def test_encode_texts_matches_uncached():
+    cached = make_stub_pipeline(PromptEmbeddingCache())
+    uncached = make_stub_pipeline(None)
+    uncached.text_encoder.load_state_dict(cached.text_encoder.state_dict())
+    texts = ["a cat", "a dog"]
+
+    expected, _ = LTXVideoPipeline._encode_texts(uncached, texts, 16, torch.float32)
+    LTXVideoPipeline._encode_texts(cached, texts[:1], 16, torch.float32)
+    embeddings, _ = LTXVideoPipeline._encode_texts(cached, texts, 16, torch.float32)
+    assert torch.allclose(embeddings, expected)
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+import torch
+import torch.ao.nn.quantized.dynamic as nnqd
+from transformers import T5Config, T5EncoderModel
+
+from ltx_video.inference import create_text_encoder, create_transformer
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+
+
+def relative_error(actual, expected):
+    return ((actual - expected).norm() / expected.norm()).item()
+
+
+def test_int8_transformer_matches_float_and_is_cached(
+    synthetic_ckpt_path, synthetic_transformer_inputs, tmp_path
+):
+    cache_dir = str(tmp_path / "cache")
+    expected_transformer = Transformer3DModel.from_checkpoint(
+        SafetensorsCheckpoint(synthetic_ckpt_path), dtype=torch.float32
+    )
+    quantized = create_transformer(
+        synthetic_ckpt_path, "int8_dynamic", quantization_cache_dir=cache_dir
+    )
+    assert len(os.listdir(cache_dir)) == 1
+    cached = create_transformer(
+        synthetic_ckpt_path, "int8_dynamic", quantization_cache_dir=cache_dir
+    )
+    assert isinstance(cached.transformer_blocks[0].attn1.to_q, nnqd.Linear)
+    assert isinstance(cached.transformer_blocks[0].ff.net[2], nnqd.Linear)
+    assert type(cached.proj_out) is torch.nn.Linear
+
+    inputs = synthetic_transformer_inputs
+    with torch.no_grad():
+        expected = expected_transformer(**inputs)[0]
+        actual = quantized(**inputs)[0]
+        from_cache = cached(**inputs)[0]
+
+    assert relative_error(actual, expected) < 0.05
+    assert torch.equal(from_cache, actual)
+
+
+def test_int8_text_encoder_matches_float_and_is_cached(tmp_path):
+    config = T5Config(
+        vocab_size=64, d_model=32, d_kv=8, d_ff=64, num_layers=2, num_heads=4
+    )
+    torch.manual_seed(0)
+    T5EncoderModel(config).save_pretrained(tmp_path / "model" / "text_encoder")
+    model_path = str(tmp_path / "model")
+    cache_dir = str(tmp_path / "cache")
+
+    expected_encoder = T5EncoderModel.from_pretrained(
+        model_path, subfolder="text_encoder"
+    )
+    quantized = create_text_encoder(
+        model_path, precision="int8_dynamic", quantization_cache_dir=cache_dir
+    )
+    cached = create_text_encoder(
+        model_path, precision="int8_dynamic", quantization_cache_dir=cache_dir
+    )
+    assert isinstance(cached.encoder.block[0].layer[1].DenseReluDense.wo, nnqd.Linear)
+
+    input_ids = torch.randint(0, 64, (2, 7), generator=torch.Generator().manual_seed(0))
+    with torch.no_grad():
+        expected = expected_encoder(input_ids).last_hidden_state
+        actual = quantized(input_ids).last_hidden_state
+        from_cache = cached(input_ids).last_hidden_state
+
+    assert relative_error(actual, expected) < 0.05
+    assert torch.equal(from_cache, actual)
+
+
+def test_int8_runs_on_cpu_only(synthetic_ckpt_path):
+    with pytest.raises(ValueError):
+        create_transformer(synthetic_ckpt_path, "int8_dynamic", device="cuda")
+    with pytest.raises(ValueError):
+        create_transformer(synthetic_ckpt_path, "int8_dynamic", stream_blocks=True)
@@ -0,0 +1,62 @@
+import torch
+
+from ltx_video.models.transformers.transformer3d import BlockResidualCache
+
+
+def make_inputs(fractional_coords, seed=0):
+    coords = torch.cat([fractional_coords] * 2)
+    generator = torch.Generator().manual_seed(seed)
+    return dict(
+        hidden_states=torch.randn(2, coords.shape[-1], 4, generator=generator),
+        indices_grid=coords,
+        encoder_hidden_states=torch.randn(2, 6, 8, generator=generator),
+        encoder_attention_mask=torch.ones(2, 6),
+        timestep=torch.full((2, 1), 0.5),
+        return_dict=False,
+    )
+
+
+def test_modulated_input_matches_first_attention_input(
+    small_transformer, fractional_coords
+):
+    transformer = small_transformer
+    inputs = make_inputs(fractional_coords)
+    attn_inputs = []
+    transformer.transformer_blocks[0].attn1.register_forward_pre_hook(
+        lambda module, args: attn_inputs.append(args[0])
+    )
+    modulated_inputs = []
+    cache = BlockResidualCache(threshold=0.1)
+    cache.should_reuse = modulated_inputs.append
+    with torch.no_grad():
+        transformer(**inputs, residual_cache=cache)
+    torch.testing.assert_close(modulated_inputs[0], attn_inputs[0])
+
+
+def test_forward_reuses_block_residual(small_transformer, fractional_coords):
+    transformer = small_transformer
+    cache = BlockResidualCache(threshold=0.05)
+    with torch.no_grad():
+        expected = transformer(**make_inputs(fractional_coords))[0]
+        first = transformer(**make_inputs(fractional_coords), residual_cache=cache)[0]
+        # The same input again: the blocks are skipped and their residual reused
+        second = transformer(**make_inputs(fractional_coords), residual_cache=cache)[0]
+        # A different input re-evaluates the blocks
+        transformer(**make_inputs(fractional_coords, seed=1), residual_cache=cache)
+    assert torch.equal(first, expected)
+    torch.testing.assert_close(second, expected)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_pipeline_reports_residual_cache_stats(tiny_pipeline, generate_tiny):
+    def generate(**kwargs):
+        return generate_tiny(num_inference_steps=30, **kwargs).images
+
+    expected = generate()
+    assert tiny_pipeline.residual_cache_stats is None
+    latents = generate(residual_cache_threshold=0.1)
+    stats = tiny_pipeline.residual_cache_stats
+    assert stats["hits"] + stats["misses"] == 30
+    assert stats["hits"] > 0
+    error = (latents - expected).norm() / expected.norm()
+    assert error < 0.1
@@ -0,0 +1,84 @@
+import os
+import time
+
+import torch
+
+from ltx_video.inference import InferenceConfig, _result_cache_lookup
+from ltx_video.pipelines.result_cache import ResultCache, device_identity
+
+
+def write_file(path, nbytes):
+    path.write_bytes(os.urandom(nbytes))
+    return path
+
+
+def test_key_depends_on_media_content(tmp_path):
+    image = write_file(tmp_path / "a.jpg", 64)
+    copy = tmp_path / "b.jpg"
+    copy.write_bytes(image.read_bytes())
+    config = InferenceConfig(
+        prompt="a cat",
+        conditioning_media_paths=[str(image)],
+        conditioning_start_frames=[0],
+    )
+
+    key = ResultCache.make_key(config, {"steps": 8}, "cpu")
+    config.conditioning_media_paths = [str(copy)]
+    assert ResultCache.make_key(config, {"steps": 8}, "cpu") == key
+    assert ResultCache.make_key(config, {"steps": 4}, "cpu") != key
+    config.seed += 1
+    assert ResultCache.make_key(config, {"steps": 8}, "cpu") != key
+
+    write_file(copy, 64)
+    config.seed -= 1
+    assert ResultCache.make_key(config, {"steps": 8}, "cpu") != key
+
+
+def test_put_get_and_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / "store"), max_bytes=250)
+    assert cache.get("a") is None
+
+    stored = cache.put("a", [write_file(tmp_path / "a.mp4", 100)])
+    assert [p.name for p in stored] == ["a.mp4"]
+    time.sleep(0.01)
+    cache.put("b", [write_file(tmp_path / "b.mp4", 100)])
+    time.sleep(0.01)
+    assert cache.get("a") == stored  # refreshes "a"
+    time.sleep(0.01)
+
+    cache.put("c", [write_file(tmp_path / "c.mp4", 100)])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_key_depends_on_device(monkeypatch):
+    config = InferenceConfig(prompt="a cat")
+    key = ResultCache.make_key(config, {"steps": 8}, "cpu")
+    monkeypatch.setattr(torch.cuda, "get_device_name", lambda device: "GPU A")
+    on_gpu = ResultCache.make_key(config, {"steps": 8}, "cuda:0")
+    assert on_gpu != key
+    # Devices of the same model share results
+    assert ResultCache.make_key(config, {"steps": 8}, "cuda:1") == on_gpu
+    monkeypatch.setattr(torch.cuda, "get_device_name", lambda device: "GPU B")
+    assert ResultCache.make_key(config, {"steps": 8}, "cuda:0") != on_gpu
+    assert device_identity("cpu").startswith("cpu / torch ")
+
+
+def test_key_depends_on_checkpoint_file(tmp_path):
+    checkpoint = write_file(tmp_path / "model.safetensors", 64)
+    config = InferenceConfig(prompt="a cat")
+    pipeline_config = {"checkpoint_path": str(checkpoint)}
+    key = ResultCache.make_key(config, pipeline_config, "cpu")
+    assert ResultCache.make_key(config, pipeline_config, "cpu") == key
+
+    # New weights at the same path
+    write_file(checkpoint, 128)
+    assert ResultCache.make_key(config, pipeline_config, "cpu") != key
+
+
+def test_enhanced_prompts_are_not_cached(tmp_path):
+    config = InferenceConfig(prompt="a cat", result_cache_dir=str(tmp_path))
+    result_cache, key = _result_cache_lookup(config, {"steps": 8}, False, "cpu")
+    assert key == ResultCache.make_key(config, {"steps": 8}, "cpu")
+    assert _result_cache_lookup(config, {"steps": 8}, True, "cpu") == (None, None)
@@ -94,3 +94,86 @@ def test_scheduler_t_not_in_list(sampler):
         dt = timesteps - next_timesteps
         expected_denoised_latents = latents - dt.unsqueeze(-1) * noise_pred
         assert torch.allclose(denoised_latents, expected_denoised_latents, atol=1e-06)
+
+
+def dense_lower_timesteps(scheduler, timestep, t_eps=1e-6):
+    """The dense comparison the scheduler used to find the next lower timesteps."""
+    timesteps_padded = torch.cat([scheduler.timesteps, torch.zeros(1)])
+    if timestep.ndim == 0:
+        return timesteps_padded[timesteps_padded < timestep - t_eps][0]
+    lower_mask = timesteps_padded[:, None, None] < timestep[None] - t_eps
+    return (lower_mask * timesteps_padded[:, None, None]).max(dim=0).values
+
+
+@pytest.mark.parametrize("sampler", ["LinearQuadratic", "Uniform"])
+def test_scheduler_matches_dense_search(sampler):
+    scheduler, latents = init_latents_and_scheduler(sampler)
+    generator = torch.Generator().manual_seed(0)
+    # On-schedule, off-schedule and zero per-token timesteps
+    on_schedule = scheduler.timesteps[
+        torch.randint(len(scheduler.timesteps), latents.shape[:2], generator=generator)
+    ]
+    off_schedule = torch.rand(latents.shape[:2], generator=generator)
+    timesteps = torch.where(off_schedule < 0.5, on_schedule, off_schedule)
+    timesteps[:, :16] = 0.0
+
+    noise_pred = torch.randn_like(latents)
+    denoised_latents = scheduler.step(noise_pred, timesteps, latents)[0]
+    dt = timesteps - dense_lower_timesteps(scheduler, timesteps)
+    assert torch.equal(denoised_latents, latents - dt[..., None] * noise_pred)
+
+    for t in scheduler.timesteps:
+        denoised_latents = scheduler.step(noise_pred, t, latents)[0]
+        dt = t - dense_lower_timesteps(scheduler, t)
+        assert torch.equal(denoised_latents, latents - dt * noise_pred)
+
+
+def gaussian_velocity(sample, timestep, mean=2.0, std=0.1):
+    """Exact velocity of the flow from N(0, 1) noise to N(mean, std^2) data."""
+    t = timestep[..., None] if timestep.ndim > 0 else timestep
+    x0 = mean + (1 - t) * std**2 / ((1 - t) ** 2 * std**2 + t**2) * (
+        sample - (1 - t) * mean
+    )
+    return (sample - x0) / t
+
+
+def solve_gaussian_flow(solver, num_steps, per_token=False):
+    noise = torch.randn(2, 64, 4, dtype=torch.float64)
+    scheduler = RectifiedFlowScheduler(solver=solver)
+    scheduler.set_timesteps(num_inference_steps=num_steps, samples_shape=noise.shape)
+    sample = noise
+    for t in scheduler.timesteps:
+        t = torch.full(noise.shape[:2], t.item()) if per_token else t
+        model_output = gaussian_velocity(sample, t)
+        sample = scheduler.step(model_output, t, sample, return_dict=False)[0]
+    # The flow maps each noise sample to mean + std * noise
+    exact = 2.0 + 0.1 * noise
+    return ((sample - exact).norm() / exact.norm()).item()
+
+
+@pytest.mark.parametrize(
+    "solver, min_convergence_rate",
+    [("euler", 1.8), ("heun", 3.0), ("dpmpp_2m", 3.0)],
+)
+def test_solver_convergence(solver, min_convergence_rate):
+    torch.manual_seed(0)
+    coarse = solve_gaussian_flow(solver, 16)
+    torch.manual_seed(0)
+    fine = solve_gaussian_flow(solver, 32)
+    torch.manual_seed(0)
+    assert solve_gaussian_flow(solver, 32, per_token=True) == pytest.approx(fine)
+    assert coarse / fine > min_convergence_rate
+
+
+def test_heun_timesteps():
+    scheduler = RectifiedFlowScheduler(solver="heun")
+    scheduler.set_timesteps(num_inference_steps=4, samples_shape=(1, 16, 8))
+    assert scheduler.order == 2
+    assert len(scheduler.sigmas) == 4
+    assert scheduler.timesteps.tolist() == [
+        scheduler.sigmas[0].item(),
+        *[t.item() for t in scheduler.sigmas[1:] for _ in range(2)],
+    ]
+    # Timesteps passed back in, as when skipping steps, are not repeated again
+    scheduler.set_timesteps(timesteps=scheduler.timesteps[2:])
+    assert len(scheduler.sigmas) == 3 and len(scheduler.timesteps) == 5
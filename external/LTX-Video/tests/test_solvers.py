@@ -0,0 +1,61 @@
+import pytest
+import torch
+
+from ltx_video.pipelines.pipeline_ltx_video import ConditioningItem
+from ltx_video.schedulers.rf import RectifiedFlowScheduler
+
+
+@pytest.fixture
+def generate(tiny_pipeline, generate_tiny):
+    """Runs the tiny pipeline without guidance, returning the latents and the number of model evaluations."""
+    evaluations = []
+    tiny_pipeline.transformer.register_forward_pre_hook(
+        lambda module, args: evaluations.append(1)
+    )
+
+    def run(solver, num_inference_steps, **kwargs):
+        tiny_pipeline.scheduler = RectifiedFlowScheduler(solver=solver)
+        evaluations.clear()
+        latents = generate_tiny(
+            num_inference_steps=num_inference_steps, **kwargs
+        ).images
+        return latents.float(), len(evaluations)
+
+    return run
+
+
+@pytest.mark.parametrize("solver, num_inference_steps", [("heun", 5), ("dpmpp_2m", 8)])
+def test_solver_tracks_reference_trajectory(generate, solver, num_inference_steps):
+    reference, _ = generate("euler", 200)
+
+    def error(latents):
+        return ((latents - reference).norm() / reference.norm()).item()
+
+    latents, evaluations = generate(solver, num_inference_steps)
+    assert evaluations <= 9
+    euler_latents, _ = generate("euler", evaluations)
+    assert error(latents) < error(euler_latents)
+
+
+@pytest.mark.parametrize("solver", ["euler", "heun", "dpmpp_2m"])
+def test_solver_with_conditioning(generate, solver):
+    media = torch.rand(1, 3, 1, 64, 64, generator=torch.Generator().manual_seed(2))
+    conditioning_items = [
+        ConditioningItem(media * 2 - 1, 0, 1.0),
+        ConditioningItem(media * 2 - 1, 8, 0.5),
+    ]
+    latents, _ = generate(
+        solver,
+        6,
+        conditioning_items=conditioning_items,
+        vae_per_channel_normalize=False,
+    )
+    euler_latents, _ = generate(
+        "euler",
+        6,
+        conditioning_items=conditioning_items,
+        vae_per_channel_normalize=False,
+    )
+    assert torch.isfinite(latents).all()
+    # Fully conditioned tokens have a per-token timestep of 0 and are never denoised
+    torch.testing.assert_close(latents[:, :, 0], euler_latents[:, :, 0])
@@ -0,0 +1,140 @@
+import pytest
+import torch
+
+import ltx_video.pipelines.pipeline_ltx_video as pipeline_ltx_video
+from ltx_video.pipelines.pipeline_ltx_video import ConditioningItem
+from ltx_video.pipelines.step_plan import DenoisingStepPlan, StepGroup
+from ltx_video.utils.skip_layer_strategy import SkipLayerStrategy
+
+# The first pass schedule of the 13B dev configs
+GUIDANCE_TIMESTEPS = [1.0, 0.996, 0.9933, 0.9850, 0.9767, 0.9008, 0.6180]
+GUIDANCE_SCALE = [1, 1, 6, 8, 6, 1, 1]
+STG_SCALE = [0, 0, 4, 4, 4, 2, 1]
+RESCALING_SCALE = [1, 1, 0.5, 0.5, 1, 1, 1]
+SKIP_BLOCK_LIST = [[], [1], [0, 1], [1], [1], [1], [1]]
+
+
+def test_groups_steps_by_guidance():
+    plan = DenoisingStepPlan(GUIDANCE_SCALE, STG_SCALE, SKIP_BLOCK_LIST)
+    assert [group.steps for group in plan.groups] == [[0, 1], [2], [3, 4], [5, 6]]
+    assert [group.num_conds for group in plan.step_groups] == [1, 1, 3, 3, 3, 2, 2]
+    assert plan.step_groups[5].prompt_indices(batch_size=2) == slice(2, 6)
+
+    static_plan = DenoisingStepPlan(
+        GUIDANCE_SCALE, STG_SCALE, SKIP_BLOCK_LIST, static_shapes=True
+    )
+    assert {group.num_conds for group in static_plan.groups} == {3}
+    assert static_plan.step_groups[5].text_index == 1
+    assert static_plan.step_groups[5].perturb_index == 2
+
+
+class PerStepInputs:
+    """Reference for `DenoisingStepPlan`: builds the inputs of every step as the loop did before the plan.
+
+    Each step gets its own group, whose branches, prompt rows, positional inputs,
+    skip layer mask and conditioning mask are concatenated for that step alone,
+    and the latent input is a fresh concatenation cast to the transformer dtype.
+    """
+
+    def __init__(self, guidance_scale, stg_scale, skip_block_list=None, **kwargs):
+        self.guidance_scale = guidance_scale
+        self.stg_scale = stg_scale
+        self.skip_block_list = skip_block_list
+
+    def prepare(
+        self,
+        transformer,
+        batch_size,
+        latents,
+        prompt_embeds_batch,
+        prompt_attention_mask_batch,
+        fractional_coords,
+        conditioning_mask=None,
+        batch_conditioning_mask=False,
+        residual_cache_threshold=0.0,
+    ):
+        self.transformer = transformer
+        freqs_cis = transformer.precompute_freqs_cis(fractional_coords)
+        self.step_groups = []
+        for i, (cfg_scale, stg) in enumerate(zip(self.guidance_scale, self.stg_scale)):
+            do_cfg, do_stg = cfg_scale > 1.0, stg > 0
+            num_conds = 1 + do_cfg + do_stg
+            if do_cfg and do_stg:
+                indices = slice(batch_size * 0, batch_size * 3)
+            elif do_cfg:
+                indices = slice(batch_size * 0, batch_size * 2)
+            elif do_stg:
+                indices = slice(batch_size * 1, batch_size * 3)
+            else:
+                indices = slice(batch_size * 1, batch_size * 2)
+            group = StepGroup(
+                do_classifier_free_guidance=do_cfg,
+                do_spatio_temporal_guidance=do_stg,
+                skip_blocks=None,
+                uncond_index=0 if do_cfg else None,
+                text_index=1 if do_cfg else 0,
+                perturb_index=num_conds - 1 if do_stg else None,
+            )
+            if do_stg and self.skip_block_list is not None:
+                group.skip_layer_mask = transformer.create_skip_layer_mask(
+                    batch_size, num_conds, num_conds - 1, self.skip_block_list[i]
+                )
+            group.indices_grid = torch.cat([fractional_coords] * num_conds)
+            group.freqs_cis = tuple(torch.cat([f] * num_conds) for f in freqs_cis)
+            group.conditioning_mask = conditioning_mask
+            if conditioning_mask is not None and batch_conditioning_mask:
+                group.conditioning_mask = torch.cat([conditioning_mask] * num_conds)
+            group.encoder_hidden_states = prompt_embeds_batch[indices].to(
+                transformer.dtype
+            )
+            group.encoder_attention_mask = prompt_attention_mask_batch[indices]
+            self.step_groups.append(group)
+
+    def fill_latent_model_input(self, group, latents):
+        return torch.cat([latents] * group.num_conds).to(self.transformer.dtype)
+
+    def residual_cache_stats(self):
+        return None
+
+
+@pytest.mark.parametrize("static_guidance_shapes", [False, True])
+def test_pipeline_with_step_plan(
+    tiny_pipeline, generate_tiny, monkeypatch, static_guidance_shapes
+):
+    batch_sizes = []
+    tiny_pipeline.transformer.register_forward_pre_hook(
+        lambda module, args, kwargs: batch_sizes.append(args[0].shape[0]),
+        with_kwargs=True,
+    )
+
+    media = torch.rand(1, 3, 1, 64, 64, generator=torch.Generator().manual_seed(2))
+
+    def generate(**kwargs):
+        return generate_tiny(
+            conditioning_items=[ConditioningItem(media * 2 - 1, 0, 1.0)],
+            is_video=True,
+            vae_per_channel_normalize=False,
+            image_cond_noise_scale=0.15,
+            timesteps=GUIDANCE_TIMESTEPS,
+            guidance_timesteps=GUIDANCE_TIMESTEPS,
+            guidance_scale=GUIDANCE_SCALE,
+            stg_scale=STG_SCALE,
+            rescaling_scale=RESCALING_SCALE,
+            skip_block_list=SKIP_BLOCK_LIST,
+            skip_layer_strategy=SkipLayerStrategy.AttentionValues,
+            cfg_star_rescale=True,
+            **kwargs,
+        ).images
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pipeline_ltx_video, "DenoisingStepPlan", PerStepInputs)
+        expected = generate()
+    batch_sizes.clear()
+    latents = generate(static_guidance_shapes=static_guidance_shapes)
+    if static_guidance_shapes:
+        assert batch_sizes == [3] * 7
+        torch.testing.assert_close(latents, expected, rtol=1e-4, atol=1e-4)
+    else:
+        assert batch_sizes == [1, 1, 3, 3, 3, 2, 2]
+        # The plan only moves work out of the loop, so the latents are bit-identical
+        assert torch.equal(latents, expected)
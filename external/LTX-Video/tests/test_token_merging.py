@@ -0,0 +1,77 @@
+import torch
+
+from ltx_video.models.transformers.token_merging import TokenMerging
+from ltx_video.models.transformers.transformer3d import Transformer3DModel
+from ltx_video.utils.checkpoint_loader import SafetensorsCheckpoint
+
+
+def make_grid(frames, height, width):
+    return torch.stack(
+        torch.meshgrid(
+            torch.arange(frames),
+            torch.arange(height),
+            torch.arange(width),
+            indexing="ij",
+        )
+    ).reshape(1, 3, -1)
+
+
+def test_destinations_stay_in_window_and_timestep():
+    grid = make_grid(3, 4, 4)
+    # The first frame is a conditioning frame, with its own timestep
+    timestep = torch.full((2, grid.shape[-1]), 0.7)
+    timestep[:, :16] = 0.0
+    destinations = TokenMerging(window_size=(2, 2, 2)).destinations(grid * 32, timestep)
+
+    source_grid = grid[0].T
+    destination_grid = source_grid[destinations[0]]
+    assert torch.equal(destinations[0], destinations[1])
+    assert torch.equal(timestep[0, destinations[0]], timestep[0])
+    assert torch.equal(source_grid // 2, destination_grid // 2)
+    # Every destination is its own destination
+    assert torch.equal(destinations[0][destinations[0]], destinations[0])
+
+
+def test_merge_averages_and_unmerge_copies_back():
+    hidden_states = torch.randn(2, 16, 8, generator=torch.Generator().manual_seed(0))
+    destinations = TokenMerging(window_size=(1, 2, 2)).destinations(
+        make_grid(1, 4, 4), torch.ones(2, 1)
+    )
+    merge = TokenMerging.plan(hidden_states, destinations, ratio=0.5)
+    assert merge.num_kept == 8
+
+    merged = merge.merge(hidden_states)
+    freqs = merge.merge_freqs_cis((hidden_states, -hidden_states))
+    for b in range(2):
+        for kept, position in enumerate(merge.kept_index[b]):
+            members = (merge.merged_index[b] == kept).nonzero().flatten()
+            assert position in members
+            torch.testing.assert_close(
+                merged[b, kept], hidden_states[b, members].mean(dim=0)
+            )
+            assert torch.equal(freqs[0][b, kept], hidden_states[b, position])
+    assert torch.equal(merge.unmerge(merged)[:, merge.kept_index[0]][0], merged[0])
+
+
+def test_token_merging_forward(synthetic_ckpt_path, synthetic_transformer_inputs):
+    transformer = Transformer3DModel.from_checkpoint(
+        SafetensorsCheckpoint(synthetic_ckpt_path), dtype=torch.float32
+    )
+    attention_tokens = []
+    transformer.transformer_blocks[0].attn1.register_forward_pre_hook(
+        lambda module, args: attention_tokens.append(args[0].shape[1])
+    )
+    inputs = synthetic_transformer_inputs
+    num_tokens = inputs["hidden_states"].shape[1]
+    with torch.no_grad():
+        expected = transformer(**inputs)[0]
+        unmerged = transformer(**inputs, token_merging=TokenMerging(ratio=0.0))[0]
+        late_steps_only = TokenMerging(ratio=0.5, min_timestep=0.6)
+        unmerged_at_timestep = transformer(**inputs, token_merging=late_steps_only)[0]
+        merged = transformer(**inputs, token_merging=TokenMerging(ratio=0.5))[0]
+
+    assert torch.equal(unmerged, expected)
+    assert torch.equal(unmerged_at_timestep, expected)
+    assert attention_tokens == [num_tokens] * 3 + [num_tokens // 2]
+    assert merged.shape == expected.shape
+    assert ((merged - expected).norm() / expected.norm()) < 0.5
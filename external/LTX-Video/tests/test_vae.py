@@ -2,6 +2,12 @@ import pytest
 import torch
 from ltx_video.models.autoencoders.causal_video_autoencoder import (
     CausalVideoAutoencoder,
+    create_video_autoencoder_demo_config,
+)
+from ltx_video.models.autoencoders.vae_encode import (
+    choose_decode_tile_size,
+    vae_decode,
+    vae_decode_streaming,
 )
 
 
@@ -83,3 +89,115 @@ def test_downscale_factors(
     model = CausalVideoAutoencoder.from_config(config)
     assert model.temporal_downscale_factor == expected_temporal_factor
     assert model.spatial_downscale_factor == expected_spatial_factor * patch_size
+
+
+def test_tiled_decode_matches_full_decode(num_latent_channels):
+    torch.manual_seed(0)
+    config = create_video_autoencoder_demo_config(latent_channels=num_latent_channels)
+    video_autoencoder = CausalVideoAutoencoder.from_config(config).eval()
+    latents = torch.randn(1, num_latent_channels, 1, 8, 20)
+    timestep = torch.tensor([0.05])
+
+    with torch.no_grad():
+        full = vae_decode(latents, video_autoencoder, timestep=timestep)
+        # A tile covering the whole frame falls back to the untiled decode
+        untiled = vae_decode(
+            latents, video_autoencoder, timestep=timestep, tile_size=20
+        )
+        tiled = vae_decode(
+            latents, video_autoencoder, timestep=timestep, tile_size=12, tile_overlap=8
+        )
+
+    assert torch.equal(untiled, full)
+    assert tiled.shape == full.shape
+    assert (tiled - full).abs().mean() < 1e-2
+    assert torch.allclose(tiled, full, atol=0.1)
+
+
+def test_decode_tile_size_follows_memory_budget(video_autoencoder):
+    latent_shape = (1, 16, 16, 22, 38)
+    small = choose_decode_tile_size(video_autoencoder, latent_shape, 2 * 1024**3)
+    large = choose_decode_tile_size(video_autoencoder, latent_shape, 8 * 1024**3)
+    assert small < large <= 38
+    assert choose_decode_tile_size(video_autoencoder, latent_shape, 1024**4) == 38
+
+
+def test_small_decode_with_memory_budget(num_latent_channels):
+    torch.manual_seed(0)
+    config = create_video_autoencoder_demo_config(latent_channels=num_latent_channels)
+    video_autoencoder = CausalVideoAutoencoder.from_config(config).eval()
+    # A latent frame no larger than two tile overlaps is decoded in one piece
+    latents = torch.randn(1, num_latent_channels, 1, 8, 8)
+    timestep = torch.tensor([0.05])
+
+    with torch.no_grad():
+        full = vae_decode(latents, video_autoencoder, timestep=timestep)
+        budgeted = vae_decode(
+            latents, video_autoencoder, timestep=timestep, memory_budget_bytes=1
+        )
+
+    assert torch.equal(budgeted, full)
+
+
+def test_memory_budget_rejects_unsupported_inputs(num_latent_channels):
+    config = create_video_autoencoder_demo_config(latent_channels=num_latent_channels)
+    video_autoencoder = CausalVideoAutoencoder.from_config(config).eval()
+    image_latents = torch.randn(1, num_latent_channels, 8, 8)
+    video_latents = torch.randn(1, num_latent_channels, 1, 8, 8)
+
+    with pytest.raises(ValueError, match="only supported"):
+        vae_decode(image_latents, video_autoencoder, memory_budget_bytes=1)
+    with pytest.raises(ValueError, match="only supported"):
+        vae_decode(video_latents, torch.nn.Identity(), memory_budget_bytes=1)
+
+
+@pytest.mark.parametrize("causal_decoder", [False, True])
+def test_streaming_decode_matches_full_decode(num_latent_channels, causal_decoder):
+    torch.manual_seed(0)
+    config = create_video_autoencoder_demo_config(latent_channels=num_latent_channels)
+    config["causal_decoder"] = causal_decoder
+    video_autoencoder = CausalVideoAutoencoder.from_config(config).eval()
+    latents = torch.randn(1, num_latent_channels, 10, 2, 3)
+    timestep = torch.tensor([0.05])
+
+    with torch.no_grad():
+        full = vae_decode(latents, video_autoencoder, timestep=timestep)
+        chunks = list(
+            vae_decode_streaming(
+                latents, video_autoencoder, chunk_size=3, timestep=timestep
+            )
+        )
+
+    # Frames are handed out before the last latents are decoded
+    assert len(chunks) > 1
+    streamed = torch.cat(chunks, dim=2)
+    assert streamed.shape == full.shape
+    assert torch.allclose(streamed, full, atol=1e-5)
+
+
+def test_pipeline_streams_decoded_chunks(tiny_pipeline, generate_tiny):
+    # In float32 the chunked decode only differs from the full one by rounding
+    tiny_pipeline.vae.float()
+    decode_kwargs = dict(
+        num_frames=129, output_type="pt", is_video=True, vae_per_channel_normalize=False
+    )
+    full = generate_tiny(**decode_kwargs).images
+    chunks = generate_tiny(**decode_kwargs, vae_decode_chunk_size=1).images
+
+    # The chunks are decoded as the iterator is consumed
+    assert not isinstance(chunks, torch.Tensor)
+    chunks = list(chunks)
+    assert len(chunks) > 1
+    streamed = torch.cat(chunks, dim=2)
+    assert streamed.shape == full.shape
+    assert torch.allclose(streamed, full, atol=1e-5)
+
+
+def test_pipeline_rejects_streaming_with_tiling(generate_tiny):
+    with pytest.raises(ValueError, match="tiled decoding"):
+        generate_tiny(
+            output_type="pt",
+            is_video=True,
+            vae_decode_chunk_size=1,
+            vae_decode_tile_size=4,
+        )
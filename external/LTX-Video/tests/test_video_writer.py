@@ -0,0 +1,82 @@
+import threading
+
+import av
+import numpy as np
+import pytest
+import torch
+
+import ltx_video.utils.video_writer as video_writer
+from ltx_video.utils.video_writer import (
+    BackgroundVideoWriter,
+    to_uint8_frames,
+    write_video,
+)
+
+
+def test_to_uint8_frames_matches_numpy_conversion():
+    video = torch.rand(3, 5, 6, 7, dtype=torch.bfloat16)
+    expected = (video.permute(1, 2, 3, 0).cpu().float().numpy() * 255).astype(np.uint8)
+    assert np.array_equal(to_uint8_frames(video).numpy(), expected)
+
+
+def test_write_video_round_trip(tmp_path):
+    torch.manual_seed(0)
+    video = torch.rand(3, 1, 32, 48).repeat(1, 11, 1, 1)
+    output_file = tmp_path / "video.mp4"
+    write_video(video, str(output_file), fps=24, chunk_frames=4)
+
+    with av.open(str(output_file)) as container:
+        frames = [f.to_ndarray(format="rgb24") for f in container.decode(video=0)]
+    assert len(frames) == 11
+    assert frames[0].shape == (32, 48, 3)
+
+
+def test_writer_reports_encoder_errors(tmp_path):
+    writer = BackgroundVideoWriter(str(tmp_path / "video.mp4"), fps=24)
+    writer.write(np.zeros((2, 16, 16), dtype=np.uint8))
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+
+class FailingFlushStream:
+    """Encodes frames but fails when flushed, after the writer consumed the end marker."""
+
+    def encode(self, frame=None):
+        if frame is None:
+            raise ValueError("flush failed")
+        return []
+
+
+class FakeContainer:
+    def add_stream(self, *args, **kwargs):
+        return FailingFlushStream()
+
+    def mux(self, packets):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_writer_reports_flush_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        video_writer.av, "open", lambda *args, **kwargs: FakeContainer()
+    )
+    writer = BackgroundVideoWriter(str(tmp_path / "video.mp4"), fps=24)
+    writer.write(np.zeros((2, 16, 16, 3), dtype=np.uint8))
+
+    errors = []
+
+    def close():
+        try:
+            writer.close()
+        except RuntimeError as e:
+            errors.append(e)
+
+    # close() used to hang, draining a queue that had already been drained
+    closer = threading.Thread(target=close, daemon=True)
+    closer.start()
+    closer.join(timeout=10)
+    assert not closer.is_alive()
+    assert len(errors) == 1
+    assert isinstance(errors[0].__cause__, ValueError)
@@ -1,4 +1,4 @@
 from .pipeline import process_frame
-from .svd_pipeline import generate_svd
+from .svd_pipeline import generate_svd, generate_svd_batch, release_svd_pipeline
 
-__all__ = ["process_frame", "generate_svd"]
\ No newline at end of file
+__all__ = ["process_frame", "generate_svd", "generate_svd_batch", "release_svd_pipeline"]
\ No newline at end of file
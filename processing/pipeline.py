@@ -1,10 +1,14 @@
 import cv2
 import numpy as np
+
+
 def process_frame(frame_bytes: bytes) -> bytes:
-    # バイト列を NumPy 配列に変換
+    # バイト列を NumPy 配列に変換（コピーなし）
     arr = np.frombuffer(frame_bytes, np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    # OpenCV 処理実行 (例: グレースケール)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    # OpenCV 処理実行 (例: グレースケール)。デコード時に直接グレースケールにすると、
+    # カラー画像の配列を確保せず cvtColor も不要になる（JPEG は色差成分を復号しない）
+    gray = cv2.imdecode(arr, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("フレームをデコードできません")
     _, buf = cv2.imencode('.jpg', gray)
-    return buf.tobytes()
\ No newline at end of file
+    return buf.tobytes()
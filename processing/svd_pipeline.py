@@ -1,61 +1,156 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
-from typing import Union, List
+from typing import Dict, Iterable, List, Optional, Union
 
 from PIL import Image
 
+SVD_MODEL_ID = "stabilityai/stable-video-diffusion-img2vid"
 
-def generate_svd(
-    input_image: Union[str, Path],
-    output_path: Union[str, Path],
-    frame_num: int,
-    steps: int,
-    guidance_scale: float,
-) -> Path:
-    """Run Stable Video Diffusion and save an MP4 file.
+# プロセス内でロード済みのパイプラインを保持する（model_id -> pipeline）
+_pipelines: Dict[str, object] = {}
+_pipelines_lock = threading.Lock()
 
-    This implementation uses diffusers and enables CPU offload to reduce
-    GPU memory requirements.
+
+def get_svd_pipeline(model_id: str = SVD_MODEL_ID):
+    """Return a loaded Stable Video Diffusion pipeline, loading it on first use.
+
+    The pipeline is kept for the lifetime of the process so that repeated
+    generations skip `from_pretrained`. Call `release_svd_pipeline` to free it.
     """
-    from diffusers import StableVideoDiffusionPipeline
+    with _pipelines_lock:
+        if model_id not in _pipelines:
+            from diffusers import StableVideoDiffusionPipeline
+            import torch
+
+            pipe = StableVideoDiffusionPipeline.from_pretrained(
+                model_id,
+                torch_dtype=torch.float16,
+                variant="fp16",
+            )
+            pipe.enable_model_cpu_offload()
+            _pipelines[model_id] = pipe
+        return _pipelines[model_id]
+
+
+def release_svd_pipeline(model_id: Optional[str] = None) -> None:
+    """Drop a cached pipeline, or all of them when `model_id` is None."""
+    import gc
     import torch
-    import tempfile
-    import ffmpeg
 
-    input_image = Path(input_image)
+    with _pipelines_lock:
+        if model_id is None:
+            _pipelines.clear()
+        else:
+            _pipelines.pop(model_id, None)
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def encode_mp4(frames, output_path: Union[str, Path], fps: int = 25) -> Path:
+    """Encode `(F, H, W, 3)` uint8 RGB frames to an H.264 MP4 with PyAV."""
+    import av
+
     output_path = Path(output_path)
+    height, width = frames.shape[1] // 2 * 2, frames.shape[2] // 2 * 2
+    with av.open(str(output_path), "w", format="mp4") as container:
+        stream = container.add_stream("libx264", rate=fps)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = "yuv420p"
+        for frame in frames[:, :height, :width]:
+            av_frame = av.VideoFrame.from_ndarray(frame, format="rgb24")
+            container.mux(stream.encode(av_frame))
+        container.mux(stream.encode())
+    return output_path
 
-    pipe = StableVideoDiffusionPipeline.from_pretrained(
-        "stabilityai/stable-video-diffusion-img2vid",
-        torch_dtype=torch.float16,
-        variant="fp16",
-    )
-    pipe.enable_model_cpu_offload()
 
-    image = Image.open(input_image).convert("RGB")
+def _run_svd_batch(
+    pipe,
+    input_images: List[Path],
+    output_paths: List[Path],
+    frame_num: int,
+    steps: int,
+    guidance_scale: float,
+) -> List[Path]:
+    import numpy as np
+
+    # SVD は入力を同じ解像度にリサイズするので、サイズの違う画像も1回の呼び出しにまとめられる
+    images = [Image.open(image).convert("RGB") for image in input_images]
     result = pipe(
-        image=image,
+        image=images,
         num_frames=frame_num,
         num_inference_steps=steps,
-        guidance_scale=guidance_scale,
+        # SVD のガイダンスはフレームごとに min から max まで上がる。guidance_scale はその上限
+        max_guidance_scale=guidance_scale,
+        output_type="np",
     )
 
-    frames: List[Image.Image] = result.frames
-    temp_dir = Path(tempfile.mkdtemp())
-    for i, frame in enumerate(frames):
-        frame.save(temp_dir / f"{i:04d}.png")
-
-    (
-        ffmpeg
-        .input(str(temp_dir / "%04d.png"), framerate=25)
-        .output(str(output_path), vcodec="libx264", pix_fmt="yuv420p")
-        .overwrite_output()
-        .run()
-    )
+    outputs = []
+    for video_frames, output_path in zip(result.frames, output_paths):
+        # PIL 変換と同じ丸めで uint8 にし、一時ファイルを介さずエンコーダへ渡す
+        frames = (np.asarray(video_frames) * 255).round().astype(np.uint8)
+        outputs.append(encode_mp4(np.ascontiguousarray(frames), output_path))
+    return outputs
+
+
+def generate_svd(
+    input_image: Union[str, Path],
+    output_path: Union[str, Path],
+    frame_num: int,
+    steps: int,
+    guidance_scale: float,
+) -> Path:
+    """Run Stable Video Diffusion and save an MP4 file.
+
+    This implementation uses diffusers and enables CPU offload to reduce
+    GPU memory requirements. The pipeline is cached across calls and frames
+    are encoded in-process without temporary files.
+    """
+    return _run_svd_batch(
+        get_svd_pipeline(),
+        [Path(input_image)],
+        [Path(output_path)],
+        frame_num,
+        steps,
+        guidance_scale,
+    )[0]
 
-    for p in temp_dir.glob("*.png"):
-        p.unlink()
-    temp_dir.rmdir()
 
-    return output_path
\ No newline at end of file
+def generate_svd_batch(
+    input_images: Iterable[Union[str, Path]],
+    output_dir: Union[str, Path],
+    frame_num: int,
+    steps: int,
+    guidance_scale: float,
+    batch_size: int = 2,
+) -> List[Path]:
+    """Run Stable Video Diffusion for several images with one loaded pipeline.
+
+    Images are generated `batch_size` at a time in one pipeline call each.
+    The i-th video is written to `output_dir` as `<i>_<image stem>.mp4`, so
+    images with the same file name in different folders do not overwrite
+    each other. Returns the video paths in input order.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    input_images = [Path(image) for image in input_images]
+    output_paths = [
+        output_dir / f"{index:04d}_{image.stem}.mp4"
+        for index, image in enumerate(input_images)
+    ]
+    pipe = get_svd_pipeline()
+    batch_size = max(1, batch_size)
+    outputs: List[Path] = []
+    for start in range(0, len(input_images), batch_size):
+        outputs += _run_svd_batch(
+            pipe,
+            input_images[start : start + batch_size],
+            output_paths[start : start + batch_size],
+            frame_num,
+            steps,
+            guidance_scale,
+        )
+    return outputs
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# API/・app/・processing/ をパッケージとして読み込めるようにリポジトリのルートを通す
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
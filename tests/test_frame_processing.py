@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.websocket import connection_stats, router  # noqa: E402
+from processing.pipeline import process_frame  # noqa: E402
+
+
+def make_jpeg(height, width, seed=0):
+    rng = np.random.default_rng(seed)
+    image = (rng.random((height, width, 3)) * 255).astype(np.uint8)
+    image = cv2.GaussianBlur(image, (15, 15), 0)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_process_frame_returns_grayscale_jpeg():
+    frame = make_jpeg(48, 64)
+    output = cv2.imdecode(np.frombuffer(process_frame(frame), np.uint8), -1)
+
+    color = cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_COLOR)
+    expected = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+    assert output.shape == expected.shape
+    # 出力は JPEG で再圧縮されるので、誤差は圧縮ノイズ程度
+    assert np.abs(output.astype(int) - expected).mean() < 2
+
+
+def test_process_frame_in_parallel_threads():
+    frames = [make_jpeg(32 + 16 * (i % 3), 48, seed=i) for i in range(12)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = list(executor.map(process_frame, frames))
+    # スレッド間で結果が混ざらない
+    assert outputs == [process_frame(frame) for frame in frames]
+
+
+def test_process_frame_rejects_undecodable_bytes():
+    with pytest.raises(ValueError):
+        process_frame(b"not an image")
+
+
+def test_ws_drops_undecodable_frame_and_keeps_streaming():
+    app = FastAPI()
+    app.include_router(router)
+    frame = make_jpeg(48, 64)
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws") as ws:
+            ws.send_bytes(b"not an image")
+            ws.send_bytes(frame)
+            # 壊れたフレームで接続が切れず、次のフレームの結果が返る
+            assert ws.receive_bytes() == process_frame(frame)
+            (stats,) = connection_stats.values()
+            assert (stats.received, stats.dropped) == (2, 1)
+            # サーバ側の後始末が終わるのを待ってから抜ける（TestClient は抜けると
+            # 残ったタスクをキャンセルする）
+            ws.close()
+            deadline = time.monotonic() + 5
+            while connection_stats and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert not connection_stats
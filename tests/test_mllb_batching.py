@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+import API.MLLB as mllb
+
+
+class StubTranslator:
+    """翻訳パイプラインの代わりに、呼ばれたバッチを記録して大文字にして返す"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, texts, batch_size):
+        self.batches.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [{"translation_text": text.upper()} for text in texts]
+
+
+@pytest.fixture
+def translator(monkeypatch):
+    stub = StubTranslator()
+    monkeypatch.setattr(mllb, "get_translator", lambda model_key: stub)
+    monkeypatch.setattr(mllb, "BATCH_WINDOW_MS", 50)
+    return stub
+
+
+def run_batcher(texts):
+    async def main():
+        batcher = mllb.MicroBatcher("stub")
+        try:
+            return await asyncio.gather(
+                *(batcher.translate(text) for text in texts), return_exceptions=True
+            )
+        finally:
+            batcher.worker.cancel()
+
+    return asyncio.run(main())
+
+
+def test_cache_evicts_least_recently_used():
+    cache = mllb.TranslationCache(max_size=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+def test_concurrent_requests_share_one_batch(translator):
+    assert run_batcher(["a", "b", "a"]) == ["A", "B", "A"]
+    # 同時に届いたリクエストは1回にまとめ、同じ文は1回だけ翻訳する
+    assert translator.batches == [["a", "b"]]
+
+
+def test_batches_are_capped(translator, monkeypatch):
+    monkeypatch.setattr(mllb, "MAX_BATCH_SIZE", 2)
+    assert run_batcher(["a", "b", "c", "d", "e"]) == ["A", "B", "C", "D", "E"]
+    assert [len(batch) for batch in translator.batches] == [2, 2, 1]
+
+
+def test_failure_reaches_every_caller(translator):
+    translator.error = RuntimeError("model crashed")
+    results = run_batcher(["a", "b", "a"])
+    assert all(result is translator.error for result in results)
+    assert len(translator.batches) == 1
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import API.MLLB as mllb
+from app import preview_relay
+
+
+@pytest.fixture
+def client():
+    # デモが自動起動する API サーバ（API/run_api.sh → API.MLLB:app）で確かめる。
+    # with で開くと全接続が同じイベントループで動き、接続間の転送が実際と同じになる
+    with TestClient(mllb.app) as client:
+        yield client
+    preview_relay.preview_channels.clear()
+
+
+def test_preview_reaches_viewer_and_cancel_reaches_publisher(client):
+    with client.websocket_connect("/ws/previews/job1") as viewer:
+        with client.websocket_connect("/ws/previews/job1/publish") as publisher:
+            publisher.send_text(json.dumps({"status": "running", "step": 1}))
+            publisher.send_bytes(b"jpeg")
+            assert json.loads(viewer.receive_text()) == {"status": "running", "step": 1}
+            assert viewer.receive_bytes() == b"jpeg"
+
+            viewer.send_text("cancel")
+            assert publisher.receive_text() == "cancel"
+            assert json.loads(viewer.receive_text()) == {"status": "cancelling"}
+            assert client.get("/ws/previews").json() == {
+                "job1": {"publishing": True, "subscribers": 1, "cancel_requested": True}
+            }
+
+
+def test_cancel_before_publisher_connects(client):
+    with client.websocket_connect("/ws/previews/job2") as viewer:
+        viewer.send_text("cancel")
+        assert json.loads(viewer.receive_text()) == {"status": "cancelling"}
+        with client.websocket_connect("/ws/previews/job2/publish") as publisher:
+            assert publisher.receive_text() == "cancel"
@@ -0,0 +1,92 @@
+import av
+import numpy as np
+import pytest
+from PIL import Image
+
+# processing パッケージは読み込み時に OpenCV を使う
+pytest.importorskip("cv2")
+
+import diffusers  # noqa: E402
+
+from processing import svd_pipeline  # noqa: E402
+
+
+class StubSVDPipeline:
+    """SVD パイプラインの代わり。呼ばれた画像の枚数を記録し、単色の動画を返す"""
+
+    loads = 0
+
+    def __init__(self):
+        self.calls = []
+
+    @classmethod
+    def from_pretrained(cls, model_id, **kwargs):
+        cls.loads += 1
+        return cls()
+
+    def enable_model_cpu_offload(self):
+        pass
+
+    def __call__(self, image, num_frames, output_type, **kwargs):
+        self.calls.append(len(image))
+        frames = np.stack(
+            [np.full((num_frames, 16, 24, 3), i / 10) for i in range(len(image))]
+        )
+        return type("Output", (), {"frames": frames})()
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    StubSVDPipeline.loads = 0
+    monkeypatch.setattr(diffusers, "StableVideoDiffusionPipeline", StubSVDPipeline)
+    svd_pipeline.release_svd_pipeline()
+    yield StubSVDPipeline
+    svd_pipeline.release_svd_pipeline()
+
+
+def read_frames(path):
+    with av.open(str(path)) as container:
+        return [f.to_ndarray(format="rgb24") for f in container.decode(video=0)]
+
+
+def test_pipeline_is_loaded_once_until_released(stub_pipeline):
+    pipe = svd_pipeline.get_svd_pipeline()
+    assert svd_pipeline.get_svd_pipeline() is pipe
+    assert stub_pipeline.loads == 1
+
+    svd_pipeline.release_svd_pipeline()
+    assert svd_pipeline.get_svd_pipeline() is not pipe
+    assert stub_pipeline.loads == 2
+
+
+def test_encode_mp4_crops_odd_sizes(tmp_path):
+    frames = np.zeros((5, 17, 23, 3), dtype=np.uint8)
+    output = svd_pipeline.encode_mp4(frames, tmp_path / "video.mp4", fps=10)
+    decoded = read_frames(output)
+    assert len(decoded) == 5
+    assert decoded[0].shape == (16, 22, 3)
+
+
+def test_batch_keeps_same_named_images_apart(stub_pipeline, tmp_path):
+    images = []
+    for folder in ["a", "b", "c"]:
+        (tmp_path / folder).mkdir()
+        images.append(tmp_path / folder / "img.png")
+        Image.new("RGB", (32, 32)).save(images[-1])
+
+    outputs = svd_pipeline.generate_svd_batch(
+        images,
+        tmp_path / "out",
+        frame_num=4,
+        steps=2,
+        guidance_scale=3.0,
+        batch_size=2,
+    )
+
+    assert svd_pipeline.get_svd_pipeline().calls == [2, 1]
+    assert len(set(outputs)) == 3
+    # 入力の順に、それぞれの画像の動画が書かれている
+    for i, output in enumerate(outputs):
+        frames = read_frames(output)
+        assert len(frames) == 4
+        assert abs(int(frames[0].mean()) - round(i % 2 / 10 * 255)) <= 3